@@ -44,6 +44,11 @@ export default function HomeScreen() {
   });
 
 
+  const selectedBand = useMemo(
+    () => difficultyOptions.find((opt) => opt.id === selectedDifficulty)?.band ?? null,
+    [difficultyOptions, selectedDifficulty]
+  );
+
   const filteredSites = useMemo(() => {
     const q = searchText.trim().toLowerCase();
 
@@ -65,8 +70,9 @@ export default function HomeScreen() {
 
       
       if (selectedDifficulty) {
-        const hasRouteWithDifficulty = (site.routes || []).some(
-          (route) => route.difficulty === selectedDifficulty
+        // 按跨体系难度段比较：选 HVS 时同一段的 5c / f5c 也算
+        const hasRouteWithDifficulty = (site.grades || []).some((grade) =>
+          selectedBand !== null ? grade.band === selectedBand : grade.name === selectedDifficulty
         );
         if (!hasRouteWithDifficulty) {
           return false;
@@ -78,8 +84,8 @@ export default function HomeScreen() {
         const inCounty = (site.countyName || '').toLowerCase().includes(q);
         const inName = site.name.toLowerCase().includes(q);
         const inCluster = (site.cluster_label || '').toLowerCase().includes(q);
-        const inRoutes = (site.routes || []).some((r) =>
-          r.name.toLowerCase().includes(q)
+        const inRoutes = (site.route_names || []).some((r) =>
+          r.toLowerCase().includes(q)
         );
 
         if (!inCounty && !inName && !inCluster && !inRoutes) {
@@ -89,7 +95,7 @@ export default function HomeScreen() {
 
       return true;
     });
-  }, [allSites, searchText, selectedCounty, selectedTypes, selectedDifficulty]);
+  }, [allSites, searchText, selectedCounty, selectedTypes, selectedDifficulty, selectedBand]);
 
   
   const suggestedSites = useMemo(() => {
@@ -1,12 +1,12 @@
 
 import LogClimbingModal from '@/components/LogClimbingModal';
 import { useClimbingLog } from '@/hooks/use-climbing-log';
-import { useClimbingSites } from '@/hooks/use-climbing-sites';
+import { useClimbingSites, useSiteRoutes } from '@/hooks/use-climbing-sites';
 import { useRouteFavorites } from '@/hooks/use-route-favorites';
 import { Ionicons } from '@expo/vector-icons';
 import { useFocusEffect, useLocalSearchParams, useRouter } from 'expo-router';
 import React, { useCallback, useState } from 'react';
-import { Linking, ScrollView, StyleSheet, Text, TouchableOpacity, View } from 'react-native';
+import { ActivityIndicator, Linking, ScrollView, StyleSheet, Text, TouchableOpacity, View } from 'react-native';
 import { useOpenMap } from '../../hooks/use-open-map';
 
 export default function SpotDetails() {
@@ -16,6 +16,8 @@ export default function SpotDetails() {
   const { openMap } = useOpenMap();
   const decodedName = typeof name === 'string' ? decodeURIComponent(name) : '';
   const site = allSites.find(s => s.name === decodedName);
+  // 路线详情不在启动时加载的索引里，打开页面时才从该郡的数据文件里取
+  const { routes, loading: routesLoading } = useSiteRoutes(site);
   const { isFavorite, toggleFavorite } = useRouteFavorites();
   const { hasClimbedRoute, loadLogs } = useClimbingLog(); 
   const [showLogModal, setShowLogModal] = useState(false);
@@ -52,13 +54,13 @@ export default function SpotDetails() {
   React.useEffect(() => {
     console.log(`SpotDetails render #${refreshTrigger}`);
     if (site) {
-      console.log(`Checking ${site.routes?.length || 0} routes:`);
-      site.routes?.forEach((route, index) => {
+      console.log(`Checking ${routes.length} routes:`);
+      routes.forEach((route, index) => {
         const hasClimbed = hasClimbedRoute(site.name, route.name);
         console.log(`  ${index + 1}. ${route.name}: ${hasClimbed ? 'YES' : 'NO'}`);
       });
     }
-  }, [site, hasClimbedRoute, refreshTrigger]);
+  }, [site, routes, hasClimbedRoute, refreshTrigger]);
 
   const handleOpenWiki = () => {
     if (site?.url) {
@@ -104,7 +106,7 @@ export default function SpotDetails() {
           )}
           
           <Text style={styles.routesCount}>
-            {site.routes_count || site.routes?.length || 0} climbing routes
+            {site.routes_count || routes.length || 0} climbing routes
           </Text>
           
           {site.url && (
@@ -117,7 +119,9 @@ export default function SpotDetails() {
         <View style={styles.routesSection}>
           <Text style={styles.sectionTitle}>Climbing Routes</Text>
           
-          {(site.routes || []).map((route, index) => {
+          {routesLoading && <ActivityIndicator style={styles.routesLoading} color="#007AFF" />}
+
+          {routes.map((route, index) => {
             
             const hasClimbed = hasClimbedRoute(site.name, route.name);
             
@@ -342,6 +346,9 @@ const styles = StyleSheet.create({
   routesSection: {
     padding: 16,
   },
+  routesLoading: {
+    marginVertical: 16,
+  },
   sectionTitle: {
     fontSize: 20,
     fontWeight: 'bold',
@@ -80,7 +80,12 @@ export const ClimbingMap: React.FC<Props> = ({
           if (!site?.coordinates) return null;
 
           const routesCount = site.routes_count ?? site.routes?.length ?? 0;
-          const firstDifficulty = site.routes && site.routes[0]?.difficulty;
+          // 汇总在导出时算好 (site.stats)，这里不再遍历路线
+          const stats = site.stats;
+          const difficultyRange =
+            stats?.grade_min && stats.grade_max && stats.grade_min !== stats.grade_max
+              ? `${stats.grade_min} – ${stats.grade_max}`
+              : stats?.grade_min ?? site.grades?.[0]?.name;
           const isSelected = !!selectedSite && selectedSite.id === site.id;
 
           return (
@@ -110,15 +115,29 @@ export const ClimbingMap: React.FC<Props> = ({
                     Routes: {routesCount}
                   </Text>
 
-                  {firstDifficulty && (
+                  {difficultyRange && (
                     <Text style={styles.calloutDescription}>
-                      Difficulty: {firstDifficulty}
+                      Difficulty: {difficultyRange}
                     </Text>
                   )}
 
-                  {site.cluster_label && (
+                  {stats?.height_max != null && (
                     <Text style={styles.calloutDescription}>
-                      Style: {site.cluster_label}
+                      Tallest: {stats.height_max}m
+                    </Text>
+                  )}
+
+                  {stats?.fa_year_min != null && (
+                    <Text style={styles.calloutDescription}>
+                      First ascents: {stats.fa_year_min === stats.fa_year_max
+                        ? stats.fa_year_min
+                        : `${stats.fa_year_min} – ${stats.fa_year_max}`}
+                    </Text>
+                  )}
+
+                  {(site.cluster_label || stats?.style) && (
+                    <Text style={styles.calloutDescription}>
+                      Style: {site.cluster_label || stats?.style}
                     </Text>
                   )}
 
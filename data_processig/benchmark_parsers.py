@@ -0,0 +1,269 @@
+"""
+解析器离线基准测试，不访问 wiki。
+
+    # 1. 录制：把 *_all_data.json 里每个攀岩点的原始 wikitext 存成本地语料
+    python benchmark_parsers.py record
+    python benchmark_parsers.py record --from-cache      # 只用 wiki_page_cache.sqlite，不联网
+    python benchmark_parsers.py record --synthetic       # 没有网络时用 JSON 里的字段拼出语料
+
+    # 2. 回放：跑 get_climbing_routes_from_page / enrich_route_data / _determine_crag_type
+    python benchmark_parsers.py run --collector A --save-baseline baseline_A.json
+
+    # 3. 回归：和之前保存的基线比较路线数量和字段，有差异时退出码为 1
+    python benchmark_parsers.py run --collector A --baseline baseline_A.json
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from crawl_logging import setup_logging
+from json_stream import data_files, load_json
+
+DEFAULT_CORPUS = os.path.join('benchmarks', 'wikitext_corpus.jsonl.gz')
+# 两个解析器每个页面都跑这几步，报告里写明，A/B 的耗时才可以直接比较
+REPLAY_STEPS = ('routes_section', 'crag_type', 'get_climbing_routes_from_page', 'enrich_route_data')
+ROUTE_FIELDS = ('name', 'height', 'difficulty', 'overall_grade', 'technical_grade',
+                'sub_routes', 'first_ascent', 'description')
+
+
+def load_sites(data_dir='.'):
+    """读取所有 *_all_data.json（包括压缩的），返回 [(郡, 站点)]"""
+    sites = []
+    for path in data_files(data_dir):
+        for county, county_data in load_json(path).items():
+            for site in county_data['climbing_sites']:
+                sites.append((county, site))
+    return sites
+
+
+def write_corpus(path, pages):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for page in pages:
+            f.write(json.dumps(page, ensure_ascii=False) + '\n')
+
+
+def read_corpus(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_corpus(data_dir, path, from_cache=False):
+    """按郡批量抓取（或从缓存读取）原始 wikitext"""
+    from finalTest_A import IrishClimbingRobust
+
+    collector = IrishClimbingRobust(offline=from_cache)
+    by_county = {}
+    for county, site in load_sites(data_dir):
+        by_county.setdefault(county, []).append(site)
+
+    pages = []
+    missing = 0
+    for county, sites in by_county.items():
+        raw_pages = collector._fetch_pages_wikitext([site['page_title'] for site in sites])
+        for site in sites:
+            raw = raw_pages[site['page_title']]
+            if 'error' in raw:
+                missing += 1
+                continue
+            pages.append({'county': county, 'name': site['name'],
+                          'page_title': site['page_title'], 'content': raw['content']})
+
+    write_corpus(path, pages)
+    print(f"已录制 {len(pages)} 个页面到 {path}（{missing} 个页面没有内容）")
+
+
+def synthesize_corpus(data_dir, path, seed=1):
+    """
+    没有网络时的替代语料：用 JSON 里已有的路线字段拼出几种常见的 wiki 写法。
+    只适合测速度和做回归比较，不能代替真实页面
+    """
+    rnd = random.Random(seed)
+    pages = []
+    for county, site in load_sites(data_dir):
+        lines = [
+            "A fine " + rnd.choice(['sea cliff', 'quarry', 'mountain crag', 'bolted sport wall', 'boulder field']) + ".",
+            rnd.choice(["Grid Ref: J 123 456", "OS Grid Ref H123456", "", "{{coord|54.1|-6.2}}"]),
+            "==Routes==",
+        ]
+        for i, route in enumerate(site['routes']):
+            name = route['name']
+            grade = route.get('difficulty') or 'VS'
+            height = route.get('height') or 12
+            lines.append(rnd.choice([
+                f"{i + 1}. '''{name}''' {height}m {grade}",
+                f"'''[[{name}|{name}]]''' ** {height}m {grade} 4c",
+                f"* {name} {height}m {grade}",
+                f"{name} * {height} m ({grade})",
+            ]))
+            if route.get('first_ascent') and route['first_ascent'] != 'Unknown':
+                lines.append(route['first_ascent'] + rnd.choice(['', '<br>']))
+            if rnd.random() < 0.3:
+                lines.append("1) 20m 4c Climb the crack to a ledge. 2) 15m 4b Finish up the groove.")
+            if route.get('description'):
+                lines.append(route['description'])
+            elif rnd.random() < 0.4:
+                lines.append("Climb the obvious [[crack]] line past a {{tmpl}} <b>bulge</b> to the top.")
+        lines.append("==Access==")
+        lines.append("Park at the road.")
+        pages.append({'county': county, 'name': site['name'],
+                      'page_title': site['page_title'], 'content': '\n'.join(lines)})
+
+    write_corpus(path, pages)
+    print(f"已生成 {len(pages)} 个合成页面到 {path}")
+
+
+def make_parser(collector_name):
+    if collector_name == 'A':
+        from finalTest_A import IrishClimbingRobust
+        return IrishClimbingRobust(cache_path=None, offline=True, geocode_cache_path=None)
+    from finalTest import IrishClimbingRobust
+    return IrishClimbingRobust()
+
+
+def parse_page(parser, collector_name, page):
+    """对一个页面跑一遍解析，返回 {'crag_type', 'routes'}"""
+    content = page['content']
+    routes_section = parser._extract_routes_section(content)
+    page_content = {'title': page['page_title'], 'content': content, 'routes_section': routes_section}
+
+    if collector_name == 'A':
+        crag_type = parser._determine_crag_type(content)
+        routes = parser.get_climbing_routes_from_page(page_content)
+        enrich_content = routes_section
+    else:
+        crag_type = parser.extract_climbing_type(content)
+        page_content['plain_text'] = parser._wikitext_to_plain(routes_section)
+        routes = parser.get_climbing_routes_from_page(page_content)
+        enrich_content = page_content['plain_text']
+
+    # 两个解析器都单独再跑一次 enrich_route_data（按路线名定位的那条路径），计时的工作量相同；
+    # 输入是各自 get_climbing_routes_from_page 用的文本
+    # 在副本上跑，不改动要和基线比较的结果
+    for route in routes:
+        parser.enrich_route_data(dict(route, sub_routes=[]), enrich_content, route['name'])
+
+    return {'crag_type': crag_type, 'routes': routes}
+
+
+def replay(parser, collector_name, pages):
+    return {page['page_title']: parse_page(parser, collector_name, page) for page in pages}
+
+
+def benchmark(collector_name, pages, repeat=3):
+    parser = make_parser(collector_name)
+
+    # 先跑一遍热身，同时拿到结果用于回归比较（过一遍 JSON，和读回来的基线类型一致）
+    results = json.loads(json.dumps(replay(parser, collector_name, pages), ensure_ascii=False))
+    route_total = sum(len(r['routes']) for r in results.values())
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        replay(parser, collector_name, pages)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+
+    # 峰值内存单独测一遍（tracemalloc 会拖慢速度，不和计时混在一起）
+    tracemalloc.start()
+    replay(parser, collector_name, pages)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    report = {
+        'collector': collector_name,
+        'steps': list(REPLAY_STEPS),
+        'pages': len(pages),
+        'routes': route_total,
+        'best_seconds': round(best, 4),
+        'pages_per_sec': round(len(pages) / best, 1) if best else None,
+        'routes_per_sec': round(route_total / best, 1) if best else None,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+    return report, results
+
+
+def compare_results(baseline, results, max_report=20):
+    """逐页比较路线数量、岩场类型和每条路线的字段，返回差异列表"""
+    diffs = []
+    for title in sorted(set(baseline) | set(results)):
+        old, new = baseline.get(title), results.get(title)
+        if old is None or new is None:
+            diffs.append(f"{title}: 页面{'新增' if old is None else '缺失'}")
+            continue
+        if old['crag_type'] != new['crag_type']:
+            diffs.append(f"{title}: crag_type {old['crag_type']!r} -> {new['crag_type']!r}")
+        if len(old['routes']) != len(new['routes']):
+            diffs.append(f"{title}: 路线数 {len(old['routes'])} -> {len(new['routes'])}")
+        for old_route, new_route in zip(old['routes'], new['routes']):
+            for field in ROUTE_FIELDS:
+                if old_route.get(field) != new_route.get(field):
+                    diffs.append(f"{title} / {old_route.get('name')}: {field} "
+                                 f"{str(old_route.get(field))[:60]!r} -> {str(new_route.get(field))[:60]!r}")
+
+    for line in diffs[:max_report]:
+        print(f"  {line}")
+    if len(diffs) > max_report:
+        print(f"  ... 还有 {len(diffs) - max_report} 处差异")
+    return diffs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='解析器离线基准测试')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='录制 wikitext 语料')
+    rec.add_argument('--data-dir', default='.')
+    rec.add_argument('--corpus', default=DEFAULT_CORPUS)
+    rec.add_argument('--from-cache', action='store_true', help='只从本地页面缓存读取，不联网')
+    rec.add_argument('--synthetic', action='store_true', help='用 JSON 里的字段生成合成语料')
+
+    run = sub.add_parser('run', help='回放语料并计时')
+    run.add_argument('--corpus', default=DEFAULT_CORPUS)
+    run.add_argument('--collector', choices=['A', 'B'], default='A', help='A = finalTest_A.py, B = finalTest.py')
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--save-baseline', help='把解析结果保存为基线')
+    run.add_argument('--baseline', help='和基线比较，有差异时退出码为 1')
+    run.add_argument('--report', help='把速度/内存报告写成 JSON')
+
+    args = parser.parse_args(argv)
+    setup_logging(quiet=True)
+
+    if args.command == 'record':
+        if args.synthetic:
+            synthesize_corpus(args.data_dir, args.corpus)
+        else:
+            record_corpus(args.data_dir, args.corpus, args.from_cache)
+        return 0
+
+    pages = read_corpus(args.corpus)
+    report, results = benchmark(args.collector, pages, max(1, args.repeat))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"基线已保存到 {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        diffs = compare_results(baseline, results)
+        if diffs:
+            print(f"回归检查失败: {len(diffs)} 处差异")
+            return 1
+        print("回归检查通过: 路线数量和字段与基线一致")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+// 由 data_processig/export_bundle.py 生成，不要手动修改
+// require 写在函数里：打开某个郡的站点详情时才解析对应的 JSON
+export const detailShards: Record<string, () => unknown> = {
+  "antrim": () => require('./antrim.json'),
+  "armagh": () => require('./armagh.json'),
+  "carlow": () => require('./carlow.json'),
+  "cavan": () => require('./cavan.json'),
+  "clare": () => require('./clare.json'),
+  "cork": () => require('./cork.json'),
+  "derry": () => require('./derry.json'),
+  "donegal": () => require('./donegal.json'),
+  "down": () => require('./down.json'),
+  "dublin": () => require('./dublin.json'),
+  "fermanagh": () => require('./fermanagh.json'),
+  "galway": () => require('./galway.json'),
+  "kerry": () => require('./kerry.json'),
+  "kildare": () => require('./kildare.json'),
+  "kilkenny": () => require('./kilkenny.json'),
+  "laois": () => require('./laois.json'),
+  "leitrim": () => require('./leitrim.json'),
+  "limerick": () => require('./limerick.json'),
+  "longford": () => require('./longford.json'),
+  "louth": () => require('./louth.json'),
+  "mayo": () => require('./mayo.json'),
+  "meath": () => require('./meath.json'),
+  "westmeath": () => require('./westmeath.json'),
+  "monaghan": () => require('./monaghan.json'),
+  "offaly": () => require('./offaly.json'),
+  "roscommon": () => require('./roscommon.json'),
+  "sligo": () => require('./sligo.json'),
+  "tipperary": () => require('./tipperary.json'),
+  "tyrone": () => require('./tyrone.json'),
+  "waterford": () => require('./waterford.json'),
+  "wexford": () => require('./wexford.json'),
+  "wicklow": () => require('./wicklow.json'),
+};
@@ -0,0 +1,93 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class CrawlJournal:
+    """
+    完整抓取的进度日志（SQLite，先写日志再汇总）：
+    - 每个站点解析完立刻写一条（压缩后的 site_data JSON），崩溃时最多丢掉正在处理的站点
+    - 每个郡的 JSON 文件写完后记一笔，--resume 时整郡跳过
+    - meta 里记本次运行的开始时间等，续跑时沿用
+    """
+
+    def __init__(self, path='crawl_journal.sqlite'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            '''CREATE TABLE IF NOT EXISTS sites (
+                county TEXT NOT NULL,
+                page_title TEXT NOT NULL,
+                data BLOB NOT NULL,
+                finished_at REAL NOT NULL,
+                PRIMARY KEY (county, page_title)
+            );
+            CREATE TABLE IF NOT EXISTS saved_files (
+                name TEXT PRIMARY KEY,
+                saved_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );'''
+        )
+        self.conn.commit()
+
+    def record_site(self, county, site_data):
+        blob = zlib.compress(json.dumps(site_data, ensure_ascii=False).encode('utf-8'))
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO sites (county, page_title, data, finished_at) VALUES (?, ?, ?, ?)',
+                (county, site_data['page_title'], blob, time.time())
+            )
+            self.conn.commit()
+
+    def done_titles(self, county):
+        with self.lock:
+            rows = self.conn.execute('SELECT page_title FROM sites WHERE county = ?', (county,)).fetchall()
+        return {title for (title,) in rows}
+
+    def load_site(self, county, page_title):
+        with self.lock:
+            row = self.conn.execute('SELECT data FROM sites WHERE county = ? AND page_title = ?',
+                                    (county, page_title)).fetchone()
+        return None if row is None else json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def mark_saved(self, name):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO saved_files (name, saved_at) VALUES (?, ?)', (name, time.time()))
+            self.conn.commit()
+
+    def is_saved(self, name):
+        with self.lock:
+            row = self.conn.execute('SELECT 1 FROM saved_files WHERE name = ?', (name,)).fetchone()
+        return row is not None
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_meta(self, key, value):
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+            self.conn.commit()
+
+    def counts(self):
+        with self.lock:
+            sites = self.conn.execute('SELECT COUNT(*) FROM sites').fetchone()[0]
+            files = self.conn.execute('SELECT COUNT(*) FROM saved_files').fetchone()[0]
+        return {'sites': sites, 'saved_files': files}
+
+    def clear(self):
+        """开始新的一次完整抓取"""
+        with self.lock:
+            self.conn.executescript('DELETE FROM sites; DELETE FROM saved_files; DELETE FROM meta;')
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,92 @@
+"""
+爬虫日志：finalTest.py / finalTest_A.py 以及各个辅助模块共用。
+
+- 所有 logger 都挂在 'climbing' 下面，setup_logging 统一设置级别和输出
+- 解析循环里用 logger.debug('... %s', x) 这种延迟格式化：级别不够时连字符串都不拼
+- 每个站点处理完输出一条结构化摘要 (SiteSummary)，可以单独写成 JSON Lines 文件
+"""
+import json
+import logging
+import sys
+
+LOGGER_NAME = 'climbing'
+
+
+def get_logger(name=None):
+    return logging.getLogger(f'{LOGGER_NAME}.{name}' if name else LOGGER_NAME)
+
+
+class SiteSummary:
+    """
+    一个站点的结构化摘要。作为日志参数传入，只有真正输出时才序列化成 JSON；
+    fields 同时通过 extra 挂在日志记录上，SiteSummaryHandler 直接读取
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def __str__(self):
+        return json.dumps(self.fields, ensure_ascii=False)
+
+
+class SiteSummaryHandler(logging.Handler):
+    """只收集带 site_summary 的日志记录，每条写成一行 JSON"""
+
+    def __init__(self, path):
+        super().__init__(logging.INFO)
+        self.stream = open(path, 'a', encoding='utf-8')
+
+    def emit(self, record):
+        fields = getattr(record, 'site_summary', None)
+        if fields is None:
+            return
+        try:
+            self.stream.write(json.dumps(fields, ensure_ascii=False) + '\n')
+            self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            super().close()
+
+
+def log_site_summary(logger, **fields):
+    logger.info('站点摘要 %s', SiteSummary(**fields), extra={'site_summary': fields})
+
+
+def setup_logging(verbosity=0, quiet=False, log_file=None, summary_file=None):
+    """
+    verbosity: 0 只输出进度和站点摘要 (INFO)，>= 1 输出逐行解析细节 (DEBUG)；
+    quiet: 只输出警告和错误。log_file 不为空时日志写到文件而不是 stdout
+    """
+    if quiet:
+        level = logging.WARNING
+    elif verbosity > 0:
+        level = logging.DEBUG
+    else:
+        level = logging.INFO
+
+    root = logging.getLogger(LOGGER_NAME)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+    root.propagate = False
+
+    if log_file:
+        handler = logging.FileHandler(log_file, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    root.addHandler(handler)
+
+    if summary_file:
+        # 摘要文件不受 quiet 影响
+        root.setLevel(min(level, logging.INFO))
+        handler.setLevel(level)
+        root.addHandler(SiteSummaryHandler(summary_file))
+    return root
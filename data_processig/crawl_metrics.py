@@ -0,0 +1,112 @@
+"""
+爬虫运行指标：每个阶段的耗时、按域名统计的 HTTP 请求数/字节数、缓存命中率、
+各种坐标来源的使用次数。所有 worker 线程共用一个 CrawlMetrics，运行结束时写成 JSON
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# 不用 hit/miss 命名的缓存计数组：(算命中的键, 算未命中的键)
+CACHE_HIT_KEYS = {
+    'index_cache': (('not_modified', 'unchanged', 'offline', 'stale'), ('parsed', 'miss')),
+}
+
+
+class CrawlMetrics:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.stages = defaultdict(lambda: {'calls': 0, 'seconds': 0.0})
+        self.http = defaultdict(lambda: {'requests': 0, 'errors': 0, 'bytes': 0, 'status': defaultdict(int)})
+        self.counters = defaultdict(lambda: defaultdict(int))
+
+    @contextmanager
+    def stage(self, name):
+        """统计一个阶段的调用次数和累计耗时（多线程时是各线程耗时之和）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    def record_stage(self, name, seconds):
+        """直接记一次阶段耗时（耗时不是一段连续代码时用）"""
+        with self.lock:
+            stage = self.stages[name]
+            stage['calls'] += 1
+            stage['seconds'] += seconds
+
+    def record_http(self, host, status=None, nbytes=0, error=False):
+        with self.lock:
+            entry = self.http[host]
+            entry['requests'] += 1
+            entry['bytes'] += nbytes
+            if error:
+                entry['errors'] += 1
+            else:
+                entry['status'][str(status)] += 1
+
+    def count(self, group, key, n=1):
+        """通用计数器，例如 count('page_cache', 'hit') / count('coordinate_source', 'osm_search')"""
+        with self.lock:
+            self.counters[group][key] += n
+
+    def merge(self, report):
+        """合并另一个进程的 report()（阶段耗时、HTTP 统计和计数器相加）"""
+        with self.lock:
+            for name, stage in report.get('stages', {}).items():
+                self.stages[name]['calls'] += stage['calls']
+                self.stages[name]['seconds'] += stage['seconds']
+            for host, h in report.get('http', {}).items():
+                entry = self.http[host]
+                entry['requests'] += h['requests']
+                entry['errors'] += h['errors']
+                entry['bytes'] += h['bytes']
+                for status, n in h['status'].items():
+                    entry['status'][status] += n
+            for group, values in report.get('counters', {}).items():
+                for key, n in values.items():
+                    self.counters[group][key] += n
+
+    def report(self):
+        with self.lock:
+            stages = {
+                name: {'calls': s['calls'], 'seconds': round(s['seconds'], 3)}
+                for name, s in sorted(self.stages.items())
+            }
+            http = {
+                host: {'requests': h['requests'], 'errors': h['errors'], 'bytes': h['bytes'],
+                       'status': dict(h['status'])}
+                for host, h in sorted(self.http.items())
+            }
+            counters = {group: dict(values) for group, values in sorted(self.counters.items())}
+
+        # 缓存类计数组额外给出命中率：hit / (hit + miss)，或者按 CACHE_HIT_KEYS 里声明的键
+        cache_hit_rates = {}
+        for group, values in counters.items():
+            hit_keys, miss_keys = CACHE_HIT_KEYS.get(group, (('hit',), ('miss',)))
+            if not any(key in values for key in hit_keys + miss_keys):
+                continue
+            hits = sum(values.get(key, 0) for key in hit_keys)
+            total = hits + sum(values.get(key, 0) for key in miss_keys)
+            cache_hit_rates[group] = round(hits / total, 4) if total else None
+
+        return {
+            'started_at': self.started_at,
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+            'stages': stages,
+            'http': http,
+            'cache_hit_rates': cache_hit_rates,
+            'counters': counters,
+        }
+
+    def write_report(self, path):
+        report = self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
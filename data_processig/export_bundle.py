@@ -0,0 +1,521 @@
+"""
+把所有 *_all_data.json 导出成 App 用的紧凑列式数据包（climbing_bundle.json）。
+
+- 字符串全部放进一张去重的字符串表，其它地方只存下标
+- 难度 / 岩场类型 / 坐标来源用小整数枚举
+- 经纬度存成定点整数（乘以 COORD_SCALE）
+- 郡、站点、路线各自按列存储（平行数组），站点和路线按顺序连续排列，只记录数量
+- 不认识的字段放进 extra 列，decode_bundle(encode_bundle(data)) == data
+
+App 实际加载的是两层数据 (export_app_data)：
+- climbing_index.json：启动时加载的小索引，只有画地图标记、筛选和搜索要用的字段
+- climbing_details/<郡>.json：每个郡一个上面格式的数据包，打开站点详情时才加载；
+  climbing_details/shards.ts 是自动生成的 郡 -> require() 表
+- climbing_spatial.json：站点坐标的瓦片空间索引和各缩放级别的聚合标记 (spatial_index.py)
+- climbing_search.json：站点名 / 路线名 / 首攀者 / 描述关键词的倒排索引 (search_index.py)
+- climbing_stats.json：每个站点和每个郡的汇总统计 (site_stats.py)，站点的摘要同时放进索引
+
+App 端的解码器在 lib/climbing-bundle.ts，格式改动时两边要一起改
+"""
+import argparse
+import glob
+import json
+import os
+import re
+
+from json_stream import atomic_open, data_files, load_json
+from search_index import SearchIndex
+from site_stats import aggregate, site_stats
+from spatial_index import SpatialIndex
+
+BUNDLE_VERSION = 2
+INDEX_VERSION = 3
+COORD_SCALE = 10_000_000  # 7 位小数（Nominatim 返回的精度）
+URL_PREFIX = 'http://wiki.climbing.ie/index.php?title='
+
+ROUTE_KEYS = ('name', 'height', 'difficulty', 'overall_grade', 'technical_grade',
+              'sub_routes', 'first_ascent', 'description',
+              'grade', 'grade_system', 'grade_band', 'grade_sort')
+SITE_KEYS = ('name', 'page_title', 'climbing_type', 'url', 'routes', 'routes_count', 'coordinates')
+COORD_KEYS = ('latitude', 'longitude', 'source', 'estimated')
+
+
+class _Interner:
+    """值 -> 下标，按第一次出现的顺序编号"""
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def __call__(self, value):
+        if value is None:
+            return None
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+
+def _extra(record, known_keys):
+    extra = {k: v for k, v in record.items() if k not in known_keys}
+    return extra or None
+
+
+def _fixed(value):
+    return None if value is None else round(value * COORD_SCALE)
+
+
+def _url_ref(site, strings):
+    """null 表示由 page_title 推出，-1 表示 url 为 None"""
+    url = site.get('url')
+    if url == URL_PREFIX + site.get('page_title', ''):
+        return None
+    if url is None:
+        return -1
+    return strings(url)
+
+
+def _plain_coordinates(site):
+    """常规的 {'latitude', 'longitude', ...} 坐标，否则返回 None"""
+    coords = site.get('coordinates')
+    if coords is None or _extra(coords, COORD_KEYS) or 'latitude' not in coords or 'longitude' not in coords:
+        return None
+    return coords
+
+
+def encode_bundle(all_data):
+    """{郡: {'county_info', 'climbing_sites'}} -> 列式数据包 (dict)"""
+    strings = _Interner()
+    grades = _Interner()
+    grade_systems = _Interner()
+    climbing_types = _Interner()
+    coord_sources = _Interner()
+
+    counties = {'name': [], 'site_count': [], 'extra': []}
+    sites = {k: [] for k in ('name', 'page_title', 'climbing_type', 'url', 'route_count',
+                             'routes_count', 'lat', 'lon', 'coord_source', 'estimated', 'extra')}
+    routes = {k: [] for k in ROUTE_KEYS + ('extra',)}
+
+    for county, county_data in all_data.items():
+        county_info = county_data['county_info']
+        county_extra = _extra(county_data, ('county_info', 'climbing_sites'))
+        if county_info.get('name') != county or len(county_info) != 1:
+            county_extra = dict(county_extra or {}, county_info=county_info)
+        counties['name'].append(strings(county))
+        counties['site_count'].append(len(county_data['climbing_sites']))
+        counties['extra'].append(county_extra)
+
+        for site in county_data['climbing_sites']:
+            url_ref = _url_ref(site, strings)
+            coords = _plain_coordinates(site)
+            extra = _extra(site, SITE_KEYS) or {}
+            if coords is None:
+                extra['coordinates'] = site.get('coordinates')  # 空的或非常规的坐标结构原样保存
+                coords = {}
+            for key in SITE_KEYS:
+                if key not in site:
+                    extra.setdefault('_missing', []).append(key)
+
+            sites['name'].append(strings(site.get('name')))
+            sites['page_title'].append(strings(site.get('page_title')))
+            sites['climbing_type'].append(climbing_types(site.get('climbing_type')))
+            sites['url'].append(url_ref)
+            sites['route_count'].append(len(site.get('routes', [])))
+            routes_count = site.get('routes_count')
+            sites['routes_count'].append(None if routes_count == len(site.get('routes', [])) else routes_count)
+            sites['lat'].append(_fixed(coords.get('latitude')))
+            sites['lon'].append(_fixed(coords.get('longitude')))
+            sites['coord_source'].append(coord_sources(coords.get('source')))
+            sites['estimated'].append(None if 'estimated' not in coords else int(bool(coords['estimated'])))
+            sites['extra'].append(extra or None)
+
+            for route in site.get('routes', []):
+                routes['name'].append(strings(route.get('name')))
+                routes['height'].append(route.get('height'))
+                for key in ('difficulty', 'overall_grade', 'technical_grade', 'grade'):
+                    routes[key].append(grades(route.get(key)))
+                routes['grade_system'].append(grade_systems(route.get('grade_system')))
+                routes['grade_band'].append(route.get('grade_band'))
+                routes['grade_sort'].append(route.get('grade_sort'))
+                routes['sub_routes'].append(route.get('sub_routes') or None)
+                routes['first_ascent'].append(strings(route.get('first_ascent')))
+                routes['description'].append(strings(route.get('description')))
+                route_extra = _extra(route, ROUTE_KEYS) or {}
+                missing = [key for key in ROUTE_KEYS if key not in route]
+                if 'sub_routes' in route and route['sub_routes'] is None:
+                    route_extra['sub_routes'] = None
+                if missing:
+                    route_extra['_missing'] = missing
+                routes['extra'].append(route_extra or None)
+
+    # extra 列全是 null 时整列省掉
+    for table in (counties, sites, routes):
+        if all(v is None for v in table['extra']):
+            del table['extra']
+
+    return {
+        'version': BUNDLE_VERSION,
+        'coord_scale': COORD_SCALE,
+        'url_prefix': URL_PREFIX,
+        'strings': strings.values,
+        'enums': {
+            'grade': grades.values,
+            'grade_system': grade_systems.values,
+            'climbing_type': climbing_types.values,
+            'coord_source': coord_sources.values,
+        },
+        'counties': counties,
+        'sites': sites,
+        'routes': routes,
+    }
+
+
+def decode_bundle(bundle):
+    """列式数据包 -> {郡: {'county_info', 'climbing_sites'}}，和 encode_bundle 的输入一致"""
+    if bundle.get('version') != BUNDLE_VERSION:
+        raise ValueError(f"不支持的数据包版本: {bundle.get('version')}")
+
+    strings = bundle['strings']
+    enums = bundle['enums']
+    scale = bundle['coord_scale']
+    url_prefix = bundle['url_prefix']
+    counties, sites, routes = bundle['counties'], bundle['sites'], bundle['routes']
+    no_extra = [None] * max(len(counties['name']), len(sites['name']), len(routes['name']))
+
+    def s(i):
+        return None if i is None else strings[i]
+
+    def e(name, i):
+        return None if i is None else enums[name][i]
+
+    def decode_route(r):
+        extra = (routes.get('extra') or no_extra)[r] or {}
+        route = {
+            'name': s(routes['name'][r]),
+            'height': routes['height'][r],
+            'difficulty': e('grade', routes['difficulty'][r]),
+            'overall_grade': e('grade', routes['overall_grade'][r]),
+            'technical_grade': e('grade', routes['technical_grade'][r]),
+            'sub_routes': routes['sub_routes'][r] or [],
+            'first_ascent': s(routes['first_ascent'][r]),
+            'description': s(routes['description'][r]),
+            'grade': e('grade', routes['grade'][r]),
+            'grade_system': e('grade_system', routes['grade_system'][r]),
+            'grade_band': routes['grade_band'][r],
+            'grade_sort': routes['grade_sort'][r],
+        }
+        for key in extra.get('_missing', []):
+            del route[key]
+        route.update((k, v) for k, v in extra.items() if k != '_missing')
+        return route
+
+    def decode_site(i, route_start):
+        extra = dict((sites.get('extra') or no_extra)[i] or {})
+        page_title = s(sites['page_title'][i])
+        url_ref = sites['url'][i]
+        if url_ref is None:
+            url = url_prefix + (page_title or '')
+        else:
+            url = None if url_ref == -1 else strings[url_ref]
+
+        site_routes = [decode_route(r) for r in range(route_start, route_start + sites['route_count'][i])]
+        routes_count = sites['routes_count'][i]
+
+        if 'coordinates' in extra:
+            coordinates = extra.pop('coordinates')
+        else:
+            lat, lon = sites['lat'][i], sites['lon'][i]
+            coordinates = {
+                'latitude': None if lat is None else lat / scale,
+                'longitude': None if lon is None else lon / scale,
+            }
+            source = e('coord_source', sites['coord_source'][i])
+            if source is not None:
+                coordinates['source'] = source
+            if sites['estimated'][i] is not None:
+                coordinates['estimated'] = bool(sites['estimated'][i])
+
+        site = {
+            'name': s(sites['name'][i]),
+            'page_title': page_title,
+            'climbing_type': e('climbing_type', sites['climbing_type'][i]),
+            'url': url,
+            'routes': site_routes,
+            'routes_count': len(site_routes) if routes_count is None else routes_count,
+            'coordinates': coordinates,
+        }
+        for key in extra.pop('_missing', []):
+            del site[key]
+        site.update(extra)
+        return site
+
+    all_data = {}
+    site_index = 0
+    route_index = 0
+    for c, name_ref in enumerate(counties['name']):
+        county = strings[name_ref]
+        extra = dict((counties.get('extra') or no_extra)[c] or {})
+        county_sites = []
+        for _ in range(counties['site_count'][c]):
+            county_sites.append(decode_site(site_index, route_index))
+            route_index += sites['route_count'][site_index]
+            site_index += 1
+        county_data = {
+            'county_info': extra.pop('county_info', {'name': county}),
+            'climbing_sites': county_sites,
+        }
+        county_data.update(extra)
+        all_data[county] = county_data
+    return all_data
+
+
+def site_id(county, site):
+    """和 App 里 useClimbingSites 生成 id 的规则一致"""
+    return re.sub(r'[^a-zA-Z0-9]', '_', f"{county}_{site.get('area') or 'Unknown'}_{site['name']}")
+
+
+def shard_name(county):
+    """'Co. Antrim' -> 'antrim'"""
+    return re.sub(r'[^a-z0-9]+', '_', re.sub(r'^co\.?\s+', '', county.lower())).strip('_')
+
+
+def encode_site_index(all_data):
+    """
+    启动时加载的小索引：站点 id、名称、郡、坐标、岩场类型、路线数，
+    筛选/搜索要用的难度列表和路线名，以及地图标记上显示的汇总（难度范围、最高高度、
+    首攀年份、主要风格）；路线详情留在各郡的 detail shard 里。
+    难度是规范写法 (grades.py)，枚举表带着每个难度的排序键和跨体系难度段。
+    站点按郡连续排列，和 detail shard 里的 climbing_sites 顺序一致
+    """
+    strings = _Interner()
+    grades = _Interner()
+    grade_sort = []
+    grade_band = []
+    climbing_types = _Interner()
+    styles = _Interner()
+
+    counties = {'name': [], 'site_count': [], 'shard': []}
+    sites = {k: [] for k in ('id', 'name', 'url', 'page_title', 'climbing_type', 'routes_count',
+                             'lat', 'lon', 'grades', 'route_names',
+                             'grade_min', 'grade_max', 'height_max', 'fa_year_min', 'fa_year_max', 'style')}
+
+    for county, county_data in all_data.items():
+        county_name = county_data['county_info'].get('name', county)
+        counties['name'].append(strings(county_name))
+        counties['site_count'].append(len(county_data['climbing_sites']))
+        counties['shard'].append(shard_name(county))
+
+        for site in county_data['climbing_sites']:
+            site_routes = site.get('routes', [])
+            coords = _plain_coordinates(site) or {}
+            site_grades = []
+            for route in site_routes:
+                g = grades(route.get('grade'))
+                if g is None:
+                    continue
+                if g == len(grade_sort):
+                    grade_sort.append(route.get('grade_sort'))
+                    grade_band.append(route.get('grade_band'))
+                if g not in site_grades:
+                    site_grades.append(g)
+
+            sites['id'].append(strings(site_id(county_name, site)))
+            sites['name'].append(strings(site.get('name')))
+            sites['url'].append(_url_ref(site, strings))
+            sites['page_title'].append(strings(site.get('page_title')))
+            sites['climbing_type'].append(climbing_types(site.get('climbing_type')))
+            sites['routes_count'].append(site.get('routes_count', len(site_routes)))
+            sites['lat'].append(_fixed(coords.get('latitude')))
+            sites['lon'].append(_fixed(coords.get('longitude')))
+            sites['grades'].append(site_grades)
+            sites['route_names'].append([strings(route.get('name')) for route in site_routes])
+            stats = site_stats(site)
+            sites['grade_min'].append(grades(stats['grade_min']))
+            sites['grade_max'].append(grades(stats['grade_max']))
+            sites['height_max'].append(stats['height_max'])
+            sites['fa_year_min'].append(stats['fa_year_min'])
+            sites['fa_year_max'].append(stats['fa_year_max'])
+            sites['style'].append(styles(stats['dominant_style']))
+
+    return {
+        'version': INDEX_VERSION,
+        'coord_scale': COORD_SCALE,
+        'url_prefix': URL_PREFIX,
+        'strings': strings.values,
+        'enums': {
+            'grade': grades.values,
+            'grade_sort': grade_sort,
+            'grade_band': grade_band,
+            'climbing_type': climbing_types.values,
+            'style': styles.values,
+        },
+        'counties': counties,
+        'sites': sites,
+    }
+
+
+def decode_site_index(index):
+    """索引 -> [站点摘要]，和 lib/climbing-bundle.ts 的 decodeClimbingIndex 一致"""
+    if index.get('version') != INDEX_VERSION:
+        raise ValueError(f"不支持的索引版本: {index.get('version')}")
+
+    strings = index['strings']
+    enums = index['enums']
+    scale = index['coord_scale']
+    counties, sites = index['counties'], index['sites']
+
+    def s(i):
+        return None if i is None else strings[i]
+
+    result = []
+    i = 0
+    for c, name_ref in enumerate(counties['name']):
+        for detail_index in range(counties['site_count'][c]):
+            page_title = s(sites['page_title'][i])
+            url_ref = sites['url'][i]
+            if url_ref is None:
+                url = index['url_prefix'] + (page_title or '')
+            else:
+                url = None if url_ref == -1 else strings[url_ref]
+            lat, lon = sites['lat'][i], sites['lon'][i]
+            climbing_type = sites['climbing_type'][i]
+            result.append({
+                'id': strings[sites['id'][i]],
+                'name': s(sites['name'][i]),
+                'county': strings[name_ref],
+                'shard': counties['shard'][c],
+                'detail_index': detail_index,
+                'url': url,
+                'page_title': page_title,
+                'climbing_type': None if climbing_type is None else enums['climbing_type'][climbing_type],
+                'routes_count': sites['routes_count'][i],
+                'coordinates': None if lat is None or lon is None else {'latitude': lat / scale,
+                                                                         'longitude': lon / scale},
+                'grades': [{'name': enums['grade'][g], 'band': enums['grade_band'][g], 'sort': enums['grade_sort'][g]}
+                           for g in sites['grades'][i]],
+                'route_names': [s(r) for r in sites['route_names'][i]],
+                'stats': {
+                    'grade_min': None if sites['grade_min'][i] is None else enums['grade'][sites['grade_min'][i]],
+                    'grade_max': None if sites['grade_max'][i] is None else enums['grade'][sites['grade_max'][i]],
+                    'height_max': sites['height_max'][i],
+                    'fa_year_min': sites['fa_year_min'][i],
+                    'fa_year_max': sites['fa_year_max'][i],
+                    'style': None if sites['style'][i] is None else enums['style'][sites['style'][i]],
+                },
+            })
+            i += 1
+    return result
+
+
+def _check_site_index(all_data, index):
+    """确认索引里的每个站点都能在对应的 detail shard 位置上找到"""
+    entries = decode_site_index(json.loads(json.dumps(index)))
+    expected = [(county, site) for county, county_data in all_data.items() for site in county_data['climbing_sites']]
+    if len(entries) != len(expected):
+        raise ValueError("索引站点数和原始数据不一致")
+    for entry, (county, site) in zip(entries, expected):
+        detail = all_data[county]['climbing_sites'][entry['detail_index']]
+        if detail is not site or entry['name'] != site.get('name') or entry['url'] != site.get('url') \
+                or entry['route_names'] != [r.get('name') for r in site.get('routes', [])]:
+            raise ValueError(f"索引和原始数据不一致: {county} / {site.get('name')}")
+
+
+def _write_shard_loader(shards, path):
+    """生成 App 端的 郡 -> require() 表。Metro 只认静态 require，所以每个郡写一行"""
+    lines = [
+        '// 由 data_processig/export_bundle.py 生成，不要手动修改',
+        '// require 写在函数里：打开某个郡的站点详情时才解析对应的 JSON',
+        'export const detailShards: Record<string, () => unknown> = {',
+    ]
+    lines += [f"  {json.dumps(name)}: () => require('./{name}.json')," for name in shards]
+    lines.append('};')
+    with atomic_open(path) as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def build_spatial_index(all_data):
+    """站点坐标的空间索引，key 是站点在 climbing_index.json 里的顺序编号"""
+    entries = []
+    for county_data in all_data.values():
+        for site in county_data['climbing_sites']:
+            coords = _plain_coordinates(site) or {}
+            entries.append((len(entries), coords.get('latitude'), coords.get('longitude')))
+    return SpatialIndex(entries)
+
+
+def export_app_data(all_data, output_dir='.', index_name='climbing_index.json', details_dir='climbing_details',
+                    spatial_name='climbing_spatial.json', search_name='climbing_search.json',
+                    stats_name='climbing_stats.json'):
+    """
+    写出 App 加载的两层数据：小索引 + 每个郡一个 detail shard（都先校验能无损解码），
+    以及站点的空间索引、全文搜索索引和汇总统计。all_data 和 collect_all_data() 的返回值格式相同；返回索引
+    """
+    for county, county_data in all_data.items():
+        if decode_bundle(json.loads(json.dumps(encode_bundle({county: county_data})))) != {county: county_data}:
+            raise ValueError(f"{county} 的 detail shard 解码结果和原始数据不一致，没有写出文件")
+    index = encode_site_index(all_data)
+    _check_site_index(all_data, index)
+
+    shard_dir = os.path.join(output_dir, details_dir)
+    os.makedirs(shard_dir, exist_ok=True)
+    shards = index['counties']['shard']
+    for county, name in zip(all_data, shards):
+        write_bundle(encode_bundle({county: all_data[county]}), os.path.join(shard_dir, f'{name}.json'))
+    # 删掉已经不存在的郡留下的旧 shard
+    for path in glob.glob(os.path.join(shard_dir, '*.json')):
+        if os.path.splitext(os.path.basename(path))[0] not in shards:
+            os.remove(path)
+    _write_shard_loader(shards, os.path.join(shard_dir, 'shards.ts'))
+    write_bundle(build_spatial_index(all_data).to_json(COORD_SCALE), os.path.join(output_dir, spatial_name))
+    write_bundle(SearchIndex.build(all_data).to_json(), os.path.join(output_dir, search_name))
+    write_bundle(aggregate(all_data), os.path.join(output_dir, stats_name))
+    write_bundle(index, os.path.join(output_dir, index_name))
+    return index
+
+
+def load_county_files(data_dir='.'):
+    """按文件名顺序读入所有 *_all_data.json（包括压缩的 .gz / .zst），合并成一个 dict"""
+    all_data = {}
+    for path in data_files(data_dir):
+        all_data.update(load_json(path))
+    return all_data
+
+
+def write_bundle(bundle, path):
+    with atomic_open(path) as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def export_bundle_file(data_dir='.', output='climbing_bundle.json'):
+    """读入所有郡的 JSON，编码后先校验能无损解码，再写出单个数据包；返回 bundle"""
+    all_data = load_county_files(data_dir)
+    bundle = encode_bundle(all_data)
+    if decode_bundle(json.loads(json.dumps(bundle))) != all_data:
+        raise ValueError("数据包解码结果和原始数据不一致，没有写出文件")
+    write_bundle(bundle, output)
+    return bundle
+
+
+def _size_kb(paths):
+    return sum(os.path.getsize(p) for p in paths) // 1024
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='导出 App 使用的紧凑列式数据')
+    parser.add_argument('--data-dir', default='.')
+    parser.add_argument('--output-dir', default='.', help='climbing_index.json 和 climbing_details/ 写到这里')
+    parser.add_argument('--single', metavar='FILE', help='改为导出单个完整数据包（不分层）')
+    args = parser.parse_args()
+
+    source_kb = _size_kb(data_files(args.data_dir))
+    if args.single:
+        bundle = export_bundle_file(args.data_dir, args.single)
+        print(f"已导出 {args.single}: {len(bundle['sites']['name'])} 个站点, {len(bundle['routes']['name'])} 条路线, "
+              f"{_size_kb([args.single])} KB（原始 JSON {source_kb} KB）")
+    else:
+        index = export_app_data(load_county_files(args.data_dir), args.output_dir)
+        index_path = os.path.join(args.output_dir, 'climbing_index.json')
+        shard_paths = glob.glob(os.path.join(args.output_dir, 'climbing_details', '*.json'))
+        print(f"已导出索引 {index_path}: {len(index['sites']['name'])} 个站点, {_size_kb([index_path])} KB；"
+              f"{len(shard_paths)} 个郡的详情共 {_size_kb(shard_paths)} KB（原始 JSON {source_kb} KB）")
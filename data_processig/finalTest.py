@@ -5,6 +5,12 @@ import time
 from bs4 import BeautifulSoup
 import urllib.parse
 
+import wikitext_grammar as grammar
+from grades import annotate_route, grade_hint
+from crawl_logging import get_logger, log_site_summary, setup_logging
+
+logger = get_logger('collector')
+
 
 class IrishClimbingRobust:
     def __init__(self):
@@ -18,7 +24,7 @@ class IrishClimbingRobust:
     
     def get_all_counties_and_sites_via_scraping(self):
         """通过网页爬取获取所有郡和攀岩点列表"""
-        print("通过网页爬取获取郡和攀岩点列表...")
+        logger.info("通过网页爬取获取郡和攀岩点列表...")
 
         try:
             response = self.session.get(
@@ -32,7 +38,7 @@ class IrishClimbingRobust:
             for element in soup.find_all(['h1', 'h2', 'h3', 'ul', 'p']):
                 if element.name in ['h1', 'h2', 'h3']:
                     text = element.get_text().strip()
-                    text = re.sub(r'\[edit\]', '', text).strip()
+                    text = grammar.EDIT_MARKER.sub('', text).strip()
 
                     if text.startswith('Co. ') and len(text) > 5:
                         current_county = text
@@ -40,7 +46,7 @@ class IrishClimbingRobust:
                             'county_info': {'name': current_county},
                             'climbing_sites': []
                         }
-                        print(f"\n找到郡: {current_county}")
+                        logger.info("找到郡: %s", current_county)
 
                 elif element.name in ['ul', 'p'] and current_county:
                     links = element.find_all('a', href=True)
@@ -56,12 +62,12 @@ class IrishClimbingRobust:
                                 'url': f"{self.base_url}{href}" if href.startswith('/') else href
                             }
                             all_data[current_county]['climbing_sites'].append(site_data)
-                            print(f"  ✓ {text}")
+                            logger.debug("  ✓ %s", text)
 
             return all_data
 
         except Exception as e:
-            print(f"网页爬取失败: {e}")
+            logger.error("网页爬取失败: %s", e)
             return {}
 
     
@@ -70,54 +76,33 @@ class IrishClimbingRobust:
         从整篇 wikitext 中截取出 Routes / Climbs 那一节，
         如果找不到，就返回全文兜底
         """
-        if not full_text:
-            return ""
-
-        pattern = r'==+\s*(Routes?|Climbs?)\s*==+'
-        m = re.search(pattern, full_text, flags=re.IGNORECASE)
-        if not m:
-            return full_text
-
-        start = m.end()
-        m2 = re.search(r'\n==[^=].*?==', full_text[start:], flags=re.IGNORECASE)
-        if m2:
-            end = start + m2.start()
-            return full_text[start:end]
-
-        return full_text[start:]
+        return grammar.extract_routes_section(full_text)
 
     def _wikitext_to_plain(self, text: str) -> str:
         """把 MediaWiki 的 wikitext 大致清洗成纯文本"""
         if not text:
             return ""
 
-        text = re.sub(r'<!--.*?-->', '', text, flags=re.DOTALL)
-        text = re.sub(r'\{\{.*?\}\}', '', text, flags=re.DOTALL)
-        text = re.sub(r'\[\[File:.*?\]\]', '', text, flags=re.IGNORECASE)
+        text = grammar.HTML_COMMENT.sub('', text)
+        text = grammar.TEMPLATE.sub('', text)
+        text = grammar.FILE_LINK.sub('', text)
 
-        text = re.sub(r'\[\[(?:[^|\]]*\|)?([^\]]+)\]\]', r'\1', text)
-        text = re.sub(r'\[(?:https?://[^\s]+)\s+([^\]]+)\]', r'\1', text)
+        text = grammar.WIKILINK.sub(r'\1', text)
+        text = grammar.EXTERNAL_LINK.sub(r'\1', text)
 
         text = text.replace('<br>', '\n').replace('<br/>', '\n').replace('<br />', '\n')
-        text = re.sub(r"'''(.*?)'''", r'**\1**', text)  
-        text = re.sub(r"''(.*?)''", r'**\1**', text)
+        text = grammar.BOLD.sub(r'**\1**', text)  
+        text = grammar.ITALIC.sub(r'**\1**', text)
 
-        text = re.sub(r'[ \t]+', ' ', text)
-        text = re.sub(r'\n\s*\n+', '\n', text)
+        text = grammar.SPACES.sub(' ', text)
+        text = grammar.BLANK_LINES.sub('\n', text)
 
         return text.strip()
 
     
     def clean_route_name(self, name: str) -> str:
         """清理路线名：去编号、星号、多余符号"""
-        if not name:
-            return ""
-
-        name = re.sub(r'^\s*\d+[a-zA-Z]?\.?\s*', '', name)  
-        cleaned = re.sub(r'[\*\#\|\-]+', ' ', name)
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-        cleaned = cleaned.strip(' \t\n\r\"\'')
-        return cleaned
+        return grammar.clean_route_name(name)
     def extract_climbing_type(self, page_content: str) -> str:
         """
         从页面内容中提取攀岩类型
@@ -149,48 +134,18 @@ class IrishClimbingRobust:
         
         for keyword, climbing_type in type_keywords.items():
             if keyword in content_lower:
-                print(f"    🎯 识别到类型 '{climbing_type}' (关键词: {keyword})")
+                logger.debug("    🎯 识别到类型 '%s' (关键词: %s)", climbing_type, keyword)
                 return climbing_type
     
         
-        print("    ⚠️  未识别到具体类型，标记为 'other'")
+        logger.debug("    ⚠️  未识别到具体类型，标记为 'other'")
         return 'other'
     
     
 
     def _looks_like_grade(self, difficulty: str) -> bool:
         """判断字符串看起来是不是攀岩等级（只接受带字母的）"""
-        if not difficulty:
-            return False
-
-        d = difficulty.strip()
-
-        
-        uk_trad_grades = {
-            "M", "MS","D", "VD", "Diff", "VDiff", "HVD",
-            "S", "HS", "VS", "HVS",
-            "E1", "E2", "E3", "E4", "E5", "E6", "E7", "E8", "E9"
-        }
-        if d in uk_trad_grades:
-            return True
-
-        
-        if re.fullmatch(r"E[1-9](/[1-9])?", d):
-            return True
-
-        
-        dl = d.lower()
-
-        
-        if re.fullmatch(r"[3-9][abc][+-]?", dl):
-            return True
-
-        
-        if re.fullmatch(r"[3-9][ABCD][+-]?", d):
-            return True
-
-        
-        return False
+        return grammar.looks_like_grade(difficulty)
 
     def _parse_route_line(self, line: str):
         """
@@ -227,7 +182,7 @@ class IrishClimbingRobust:
             return None
 
         
-        line = re.sub(r'^\s*\d+[a-zA-Z]?\.?\s*', '', line)
+        line = grammar.NUMBER_PREFIX.sub('', line)
         line = line.strip()
         if not line:
             return None
@@ -241,7 +196,7 @@ class IrishClimbingRobust:
 
         
         for i, tok in enumerate(tokens):
-            m = re.fullmatch(r'(\d{1,3})m', tok)
+            m = grammar.HEIGHT_TOKEN.fullmatch(tok)
             if m:
                 height = int(m.group(1))
                 height_idx = i
@@ -351,7 +306,7 @@ class IrishClimbingRobust:
             return {'error': '页面不存在', 'page_title': clean_title}
 
         except Exception as e:
-            print(f"    API请求失败: {str(e)}")
+            logger.warning("    API请求失败: %s", e)
             return {'error': str(e), 'page_title': page_title}
 
     def get_climbing_routes_from_page(self, page_content):
@@ -365,8 +320,7 @@ class IrishClimbingRobust:
         if not plain_text:
             return routes
         
-        print(f"    处理后的文本前500字符:")
-        print(f"    {plain_text[:500]}")
+        logger.debug("    处理后的文本前500字符:\n    %.500s", plain_text)
 
         
         bold_routes = self._parse_bold_format_routes(plain_text)
@@ -375,7 +329,7 @@ class IrishClimbingRobust:
         else:
             
             routes = self._parse_line_format_routes(plain_text)
-            print(f"    通过行格式找到 {len(routes)} 条路线")
+            logger.debug("    通过行格式找到 %d 条路线", len(routes))
 
         return routes
 
@@ -410,20 +364,13 @@ class IrishClimbingRobust:
         remaining_content = content[route_start:]
     
         
-        next_route_patterns = [
-            r'\n\s*\*\*[^*]+\s+\d+m\s+[A-Z]',      
-            r'\n\s*\d+[a-zA-Z]?\.?\s+[A-Z]',       
-            r'\n\s*[A-Z][A-Za-z]*(?:\s+[A-Z][A-Za-z]*)*\s+\d+m\s+[A-Z]',  
-        ]
-    
-        
         title_end = route_match.end()
         content_after_title = remaining_content[title_end:]
     
         next_route_start = len(content_after_title)  
     
-        for pattern in next_route_patterns:
-            match = re.search(pattern, content_after_title)
+        for pattern in grammar.NEXT_ROUTE_PATTERNS:
+            match = pattern.search(content_after_title)
             if match and match.start() < next_route_start:
                 next_route_start = match.start()
                 break
@@ -435,17 +382,11 @@ class IrishClimbingRobust:
             route_specific_content = content_after_title
     
         
-        first_ascent_patterns = [
-            r'^([A-Z][^\.]+?\.\s*\d{2,4}[^\.]*\.)',  
-            r'^([A-Z][^\.]+?\d{4}[^\.]*\.)',         
-            r'([A-Z][^\.]+?\.\s*\d{2,4}[^\.]*\.)',   
-        ]
-    
         first_ascent_text = None
         remaining_description = route_specific_content
     
-        for pattern in first_ascent_patterns:
-            match = re.search(pattern, route_specific_content)
+        for pattern in grammar.FA_SENTENCE_PATTERNS:
+            match = pattern.search(route_specific_content)
             if match:
                 first_ascent_text = match.group(1).strip()
                 
@@ -459,11 +400,11 @@ class IrishClimbingRobust:
         clean_description = remaining_description
     
         
-        clean_description = re.sub(r'\*\*.+?\d+m\s+[A-Z].+?\*\*', '', clean_description)
-        clean_description = re.sub(r'^\s*[A-Z].*?\d+m\s+[A-Z].*?$', '', clean_description, flags=re.MULTILINE)
+        clean_description = grammar.BOLD_HEADLINE.sub('', clean_description)
+        clean_description = grammar.HEADLINE_LINE.sub('', clean_description)
     
         
-        clean_description = re.sub(r'\s+', ' ', clean_description)
+        clean_description = grammar.WHITESPACE.sub(' ', clean_description)
         clean_description = clean_description.strip()
     
         
@@ -484,13 +425,8 @@ class IrishClimbingRobust:
                 continue
         
             
-            pitch_patterns = [
-                r'(\d+)/\s*\.?\s*(\d+)m\s*([\w/+]+)?\s*(.*)',  
-                r'Pitch\s+(\d+)[:\s]*(\d+)m\s*([\w/+]+)?\s*(.*)',  
-            ]
-        
-            for pattern in pitch_patterns:
-                match = re.match(pattern, line, re.IGNORECASE)
+            for pattern in grammar.PITCH_LINE_PATTERNS:
+                match = pattern.match(line)
                 if match:
                     pitch_data = {
                         'pitch_number': int(match.group(1)),
@@ -506,7 +442,7 @@ class IrishClimbingRobust:
 
     def parse_pitch_line(self, route_data, line):
         """解析子路线行"""
-        pitch_match = re.match(r'(\d+)/\.\s*(\d+)m\s*([\dabc+/]+)?\s*(.*)', line)
+        pitch_match = grammar.PITCH_SLASH_LINE.match(line)
         if pitch_match:
             pitch_number = int(pitch_match.group(1))
             height = int(pitch_match.group(2))
@@ -528,8 +464,7 @@ class IrishClimbingRobust:
         """清理普通文本"""
         if not text:
             return ""
-        cleaned = re.sub(r'\s+', ' ', text)
-        return cleaned.strip()
+        return grammar.collapse_whitespace(text)
 
     
     def _clean_page_title(self, page_title):
@@ -573,9 +508,7 @@ class IrishClimbingRobust:
         seen_names = set()
     
         
-        bold_pattern = r'\*\*([^*]+?)\s+(\d+)m\s+([A-Z/]+)\*\*'
-    
-        matches = re.findall(bold_pattern, plain_text)
+        matches = grammar.BOLD_ROUTE.findall(plain_text)
     
         for match in matches:
             raw_name = match[0].strip()
@@ -609,7 +542,7 @@ class IrishClimbingRobust:
             seen_names.add(route_name)
     
         if matches:
-            print(f"    通过粗体格式找到 {len(routes)} 条路线")
+            logger.debug("    通过粗体格式找到 %d 条路线", len(routes))
     
         return routes
     
@@ -651,12 +584,11 @@ class IrishClimbingRobust:
         county_keyword: 可以是 'Co. Cavan' 或者 'Cavan' 这样的关键字
         max_sites: (可选) 限制最多抓多少个攀岩点，调试时可以设一个小数字
         """
-        print(f"只收集包含关键字 '{county_keyword}' 的郡的数据...")
-        print("=" * 60)
+        logger.info("只收集包含关键字 '%s' 的郡的数据...", county_keyword)
 
         all_structure = self.get_all_counties_and_sites_via_scraping()
         if not all_structure:
-            print("无法获取基础结构数据")
+            logger.error("无法获取基础结构数据")
             return {}
 
         
@@ -667,17 +599,16 @@ class IrishClimbingRobust:
         }
 
         if not selected:
-            print(f"没有找到包含 '{county_keyword}' 的郡名")
+            logger.warning("没有找到包含 '%s' 的郡名", county_keyword)
             return {}
 
         for county in selected.keys():
-            print(f"将处理郡: {county}")
+            logger.info("将处理郡: %s", county)
 
         all_complete_data = {}
 
         for county, county_data in selected.items():
-            print(f"\n处理郡: {county}")
-            print("-" * 40)
+            logger.info("处理郡: %s", county)
 
             all_complete_data[county] = {
                 'county_info': county_data['county_info'],
@@ -689,10 +620,13 @@ class IrishClimbingRobust:
                 sites = sites[:max_sites]
 
             for site in sites:
-                print(f"  正在处理: {site['name']}")
+                logger.debug("  正在处理: %s", site['name'])
 
                 page_content = self.get_full_page_content_via_api(site['page_title'])
                 routes = self.get_climbing_routes_from_page(page_content)
+                hint = grade_hint(page_content.get('climbing_type'))
+                for route in routes:
+                    annotate_route(route, hint)
 
                 site_data = {
                     'name': site['name'],
@@ -710,11 +644,17 @@ class IrishClimbingRobust:
                 all_complete_data[county]['climbing_sites'].append(site_data)
 
                 for r in routes[:2]:
-                    print(f"    - {r['name']} ({r['height'] or '?'}m {r['difficulty']})")
-                if len(routes) > 2:
-                    print(f"    ... 还有 {len(routes) - 2} 条路线")
+                    logger.debug("    - %s (%sm %s)", r['name'], r['height'] or '?', r['difficulty'])
                 if not routes:
-                    print("    ⚠️ 未识别出任何路线（可能页面格式比较特别）")
+                    logger.warning("    ⚠️ %s 未识别出任何路线（可能页面格式比较特别）", site['name'])
+                log_site_summary(
+                    logger,
+                    name=site['name'],
+                    page_title=site['page_title'],
+                    error=page_content.get('error'),
+                    climbing_type=site_data['climbing_type'],
+                    routes_count=len(routes),
+                )
 
                 time.sleep(1)
 
@@ -722,25 +662,21 @@ class IrishClimbingRobust:
     
     def collect_all_data(self):
         """主函数：收集所有数据"""
-        print("开始完整的爱尔兰攀岩数据收集...")
-        print("=" * 60)
+        logger.info("开始完整的爱尔兰攀岩数据收集...")
 
         all_structure = self.get_all_counties_and_sites_via_scraping()
 
         if not all_structure:
-            print("无法获取基础结构数据")
+            logger.error("无法获取基础结构数据")
             return {}
 
         total_sites = sum(len(data['climbing_sites']) for data in all_structure.values())
-        print(f"\n=== 基础结构获取完成 ===")
-        print(f"总共找到 {len(all_structure)} 个郡")
-        print(f"总共找到 {total_sites} 个攀岩点")
+        logger.info("基础结构获取完成: 共 %d 个郡, %d 个攀岩点", len(all_structure), total_sites)
 
         all_complete_data = {}
 
         for county, county_data in all_structure.items():
-            print(f"\n处理郡: {county}")
-            print("-" * 40)
+            logger.info("处理郡: %s", county)
 
             all_complete_data[county] = {
                 'county_info': county_data['county_info'],
@@ -748,10 +684,13 @@ class IrishClimbingRobust:
             }
 
             for site in county_data['climbing_sites']:
-                print(f"  正在处理: {site['name']}")
+                logger.debug("  正在处理: %s", site['name'])
 
                 page_content = self.get_full_page_content_via_api(site['page_title'])
                 routes = self.get_climbing_routes_from_page(page_content)
+                hint = grade_hint(page_content.get('climbing_type'))
+                for route in routes:
+                    annotate_route(route, hint)
 
                 site_data = {
                     'name': site['name'],
@@ -769,11 +708,17 @@ class IrishClimbingRobust:
                 all_complete_data[county]['climbing_sites'].append(site_data)
 
                 for r in routes[:2]:
-                    print(f"    - {r['name']} ({r['height'] or '?'}m {r['difficulty']})")
-                if len(routes) > 2:
-                    print(f"    ... 还有 {len(routes) - 2} 条路线")
+                    logger.debug("    - %s (%sm %s)", r['name'], r['height'] or '?', r['difficulty'])
                 if not routes:
-                    print("    ⚠️ 未识别出任何路线（可能页面格式比较特别）")
+                    logger.warning("    ⚠️ %s 未识别出任何路线（可能页面格式比较特别）", site['name'])
+                log_site_summary(
+                    logger,
+                    name=site['name'],
+                    page_title=site['page_title'],
+                    error=page_content.get('error'),
+                    climbing_type=site_data['climbing_type'],
+                    routes_count=len(routes),
+                )
 
                 time.sleep(1)
 
@@ -782,7 +727,7 @@ class IrishClimbingRobust:
     def save_complete_data(self, data, filename='complete_irish_climbing_data.json'):
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"\n完整数据已保存到 {filename}")
+        logger.info("完整数据已保存到 %s", filename)
 
     def generate_summary(self, data):
         total_counties = len(data)
@@ -794,23 +739,20 @@ class IrishClimbingRobust:
             for site in county_data['climbing_sites']:
                 total_routes += len(site['routes'])
 
-        print(f"\n📊 最终数据摘要:")
-        print(f"  总郡数: {total_counties}")
-        print(f"  总攀岩点: {total_sites}")
-        print(f"  总路线数: {total_routes}")
+        logger.info("📊 最终数据摘要: 郡 %d | 攀岩点 %d | 路线 %d", total_counties, total_sites, total_routes)
 
-        print(f"\n📈 各郡统计:")
         for county, county_data in data.items():
             county_routes = sum(len(site['routes']) for site in county_data['climbing_sites'])
-            print(f"  {county}: {len(county_data['climbing_sites'])} 个攀岩点, {county_routes} 条路线")
+            logger.info("  %s: %d 个攀岩点, %d 条路线", county, len(county_data['climbing_sites']), county_routes)
 
 
 
 if __name__ == "__main__":
+    setup_logging()
     collector = IrishClimbingRobust()
 
     
-    print("=== 测试单个郡 ===")
+    logger.info("=== 测试单个郡 ===")
     test_data = collector.collect_county_data("Antrim", max_sites=3)  
     
     if test_data:
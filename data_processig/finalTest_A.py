@@ -1,10 +1,34 @@
 import requests
+import argparse
+import copy
+import hashlib
 import json
+import os
 import re
 import time
-from bs4 import BeautifulSoup
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
+from bs4 import BeautifulSoup, SoupStrainer
 import urllib.parse
 
+from geocoder import GazetteerBackend, GeocodeCache, Geocoder, NominatimBackend
+from grades import annotate_route, grade_hint
+from http_retry import (MAXLAG, MAXLAG_DEFAULT_WAIT, RETRY_EXCEPTIONS, RETRY_STATUS, CircuitBreaker,
+                        CircuitOpenError, RetryPolicy, is_maxlag, parse_retry_after)
+from irish_grid import gridref_to_wgs84, parse_gridref
+from json_stream import atomic_open, data_files, load_json, other_variants, write_all_data
+from page_cache import PageCache
+from site_stats import county_stats
+import wikitext_grammar as grammar
+from crawl_journal import CrawlJournal
+from crawl_logging import get_logger, log_site_summary, setup_logging
+from crawl_metrics import CrawlMetrics
+from export_bundle import export_app_data, load_county_files
+from wikitext_tokenizer import WikiLine, iter_lines, tokenize
+
 MANUAL_COORDS = {
     "Dalkey Quarry": {"latitude": 53.272, "longitude": -6.108},
     "Fair Head": {"latitude": 55.216, "longitude": -6.136},
@@ -12,8 +36,83 @@ MANUAL_COORDS = {
     "Burren": {"latitude": 53.056, "longitude": -9.167},
 }
 
+# 每个域名的礼貌限速: (每秒请求数, 突发容量)
+HOST_RATE_LIMITS = {
+    "wiki.climbing.ie": (1.0, 2),
+    "nominatim.openstreetmap.org": (1.0, 1),  # Nominatim 使用政策: 最多 1 次/秒
+}
+DEFAULT_HOST_RATE_LIMIT = (1.0, 1)
+
+# 首页：按郡列出所有攀岩点；解析结果缓存在 wiki_index_cache.json
+INDEX_PAGE_TITLE = 'Irish_Climbing_Wiki'
+INDEX_CACHE_VERSION = 1
+try:
+    import lxml  # noqa: F401  装了 lxml 就用它解析首页，快很多
+    INDEX_PARSER = 'lxml'
+except ImportError:
+    INDEX_PARSER = 'html.parser'
+
+# 失败的页面批次在整个郡请求完以后再试一次，最多等熔断器冷却这么久（秒）
+DEFERRED_MAX_WAIT = 120
+
+# 增量更新: 上次抓取时间记录在这个文件里
+CRAWL_STATE_FILE = 'crawl_state.json'
+# MediaWiki 默认只保留 90 天的 recentchanges，更早的改用逐页 revision 时间戳比较
+RECENTCHANGES_MAX_AGE_DAYS = 90
+# MediaWiki API 返回的时间戳格式（UTC），同一格式的时间可以直接按字符串比较
+API_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+logger = get_logger('crawler')
+
+
+def normalize_timestamp(value):
+    """
+    '2024-01-01'、'2024-01-01T10:00'、'2024-01-01T10:00:00+01:00'、'2024-01-01T10:00:00Z' 这类写法
+    -> API 时间戳格式的 UTC 时间；没写时区的按 UTC。认不出来抛 ValueError
+    """
+    text = value.strip()
+    if text[-1:] in ('Z', 'z'):
+        text = text[:-1] + '+00:00'
+    when = datetime.fromisoformat(text)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.astimezone(timezone.utc).strftime(API_TIMESTAMP_FORMAT)
+
+
+def _since_argument(value):
+    try:
+        return normalize_timestamp(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"认不出的时间: {value!r}（例如 2024-01-01 或 2024-01-01T00:00:00Z）")
+
+class TokenBucket:
+    """线程安全的令牌桶限速器，所有 worker 共享"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
 class IrishClimbingRobust:
-    def __init__(self):
+    def __init__(self, workers=1, global_rate=4.0, host_rate_limits=None,
+                 cache_path='wiki_page_cache.sqlite', cache_ttl=7 * 24 * 3600,
+                 cache_max_bytes=200 * 1024 * 1024, offline=False,
+                 geocode_cache_path='geocode_cache.sqlite', gazetteer_path=None,
+                 max_routes_per_site=None, index_cache_path='wiki_index_cache.json'):
         self.base_url = "http://wiki.climbing.ie"
         self.api_url = "http://wiki.climbing.ie/api.php"
         self.session = requests.Session()
@@ -21,93 +120,272 @@ class IrishClimbingRobust:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
 
+        # 并发抓取: worker 数量 + 全局限速 + 按域名限速
+        self.workers = max(1, workers)
+        self.global_limiter = TokenBucket(global_rate, max(1, int(global_rate)))
+        self.host_rate_limits = dict(HOST_RATE_LIMITS)
+        if host_rate_limits:
+            self.host_rate_limits.update(host_rate_limits)
+        self._host_limiters = {}
+        self._host_limiters_lock = threading.Lock()
+
+        # 失败重试（指数退避 + 抖动，遵守 Retry-After / maxlag）和按域名的熔断器
+        self.retry_policy = RetryPolicy()
+        self._host_breakers = {}
+
+        # 运行指标：阶段耗时、HTTP 统计、缓存命中、坐标来源
+        self.metrics = CrawlMetrics()
+
+        # 本地 wikitext 缓存；offline=True 时只用缓存，不检查 revid 也不联网
+        self.page_cache = PageCache(cache_path, cache_ttl, cache_max_bytes) if cache_path else None
+        self.offline = offline
+
+        # 地理编码：先查离线地名表（如果有），再查 Nominatim；结果（包括没找到的）都会缓存。
+        # 离线时没查 Nominatim，找不到不代表真的没有，不写负缓存
+        self.geocode_cache_path = geocode_cache_path
+        self.gazetteer_path = gazetteer_path
+        backends = []
+        if gazetteer_path:
+            backends.append(GazetteerBackend(gazetteer_path))
+        if not offline:
+            backends.append(NominatimBackend(self._http_get))
+        geocode_cache = GeocodeCache(geocode_cache_path) if geocode_cache_path else None
+        self.geocoder = Geocoder(backends, geocode_cache, metrics=self.metrics, cache_negative=not offline)
+
+        # 首页（郡 -> 攀岩点列表）的解析结果缓存，同一次运行里只解析一次
+        self.index_cache_path = index_cache_path
+        self._index_structure = None
+
+        # 每个岩场最多保留多少条路线，None 表示全部
+        self.max_routes_per_site = max_routes_per_site
+
+        # 完整抓取的进度日志 (CrawlJournal)，由主程序打开；None 表示不记录
+        self.journal = None
+
+    def _get_host_limiter(self, host):
+        with self._host_limiters_lock:
+            limiter = self._host_limiters.get(host)
+            if limiter is None:
+                rate, capacity = self.host_rate_limits.get(host, DEFAULT_HOST_RATE_LIMIT)
+                limiter = TokenBucket(rate, capacity)
+                self._host_limiters[host] = limiter
+            return limiter
+
+    def _get_host_breaker(self, host):
+        with self._host_limiters_lock:
+            breaker = self._host_breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker()
+                self._host_breakers[host] = breaker
+            return breaker
+
+    def _http_get(self, url, use_session=True, **kwargs):
+        """
+        所有网络请求的统一入口：先过该域名的熔断器，再过全局限速和域名限速。
+        连接错误 / 超时 / 429 / 5xx / maxlag 按 retry_policy 重试；重试用完后连接错误照常抛出，
+        错误状态码的响应照常返回给调用方。熔断器断开时抛 CircuitOpenError
+        """
+        host = urllib.parse.urlparse(url).netloc
+        breaker = self._get_host_breaker(host)
+        if url == self.api_url:
+            kwargs['params'] = dict(kwargs.get('params') or {}, maxlag=MAXLAG)
+
+        for attempt in range(self.retry_policy.max_attempts):
+            if not breaker.allow():
+                self.metrics.count('circuit_breaker', 'rejected')
+                raise CircuitOpenError(host, breaker.retry_in())
+            self.global_limiter.acquire()
+            self._get_host_limiter(host).acquire()
+            last_attempt = attempt == self.retry_policy.max_attempts - 1
+            try:
+                if use_session:
+                    response = self.session.get(url, **kwargs)
+                else:
+                    response = requests.get(url, **kwargs)
+            except RETRY_EXCEPTIONS as e:
+                self.metrics.record_http(host, error=True)
+                self._record_host_failure(host, breaker)
+                if last_attempt:
+                    raise
+                wait = self.retry_policy.delay(attempt)
+                self.metrics.count('http_retry', type(e).__name__)
+                logger.debug("    %s 请求失败 (%s)，%.1f 秒后重试", host, e, wait)
+                time.sleep(wait)
+                continue
+            except Exception:
+                # 不重试的错误（例如 ChunkedEncodingError）也要记一次失败，
+                # 否则半开状态下的试探请求一直不结束，这个域名整个运行期间都会被拒绝
+                self.metrics.record_http(host, error=True)
+                self._record_host_failure(host, breaker)
+                raise
+            self.metrics.record_http(host, response.status_code, len(response.content))
+
+            if is_maxlag(response):
+                # 服务器本身没问题，只是从库延迟大，不算熔断失败
+                breaker.record_success()
+                reason = 'maxlag'
+                wait = parse_retry_after(response.headers.get('Retry-After')) or MAXLAG_DEFAULT_WAIT
+            elif response.status_code in RETRY_STATUS:
+                self._record_host_failure(host, breaker)
+                reason = str(response.status_code)
+                wait = self.retry_policy.delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+            else:
+                breaker.record_success()
+                return response
+
+            if last_attempt:
+                return response
+            self.metrics.count('http_retry', reason)
+            logger.debug("    %s 返回 %s，%.1f 秒后重试", host, reason, wait)
+            time.sleep(wait)
+
+    def _record_host_failure(self, host, breaker):
+        if breaker.record_failure():
+            self.metrics.count('circuit_breaker', 'opened')
+            logger.warning("    %s 连续失败，暂停请求 %.0f 秒", host, breaker.reset_timeout)
+
     def get_all_counties_and_sites_via_scraping(self):
-        print("通过网页爬取获取郡和攀岩点列表...")
+        """
+        郡 -> 攀岩点列表。解析结果存在 index_cache_path 里，并记下 ETag / Last-Modified：
+        - 同一次运行里只请求一次（每个郡都会调用这里）
+        - 之后的运行发条件请求，304 或者内容没变时直接用缓存，不再解析 HTML
+        - 离线、请求失败或者返回错误页时退回到缓存
+        空结果（没有缓存又请求失败）不记住，下一个郡会重新请求
+        """
+        if not self._index_structure:
+            self._index_structure = self._load_index_structure()
+        return copy.deepcopy(self._index_structure)
+
+    def _load_index_structure(self):
+        cached = self._load_index_cache()
+        if self.offline:
+            self.metrics.count('index_cache', 'offline' if cached else 'miss')
+            return cached['structure'] if cached else {}
+
+        logger.info("通过网页爬取获取郡和攀岩点列表...")
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
         try:
-            response = self.session.get(f"{self.base_url}/index.php?title=Irish_Climbing_Wiki")
-            soup = BeautifulSoup(response.content, 'html.parser')
-            all_data = {}
-            current_county = None
-
-            for element in soup.find_all(['h1', 'h2', 'h3', 'ul', 'p']):
-                if element.name in ['h1', 'h2', 'h3']:
-                    text = element.get_text().strip()
-                    text = re.sub(r'\[edit\]', '', text).strip()
-                    if text.startswith('Co. ') and len(text) > 5:
-                        current_county = text
-                        all_data[current_county] = {'county_info': {'name': current_county}, 'climbing_sites': []}
-                        print(f"\n找到郡: {current_county}")
-
-                elif element.name in ['ul', 'p'] and current_county:
-                    links = element.find_all('a', href=True)
-                    for link in links:
-                        text = link.get_text().strip()
-                        href = link['href']
-                        if self._is_valid_climbing_site(text, href):
-                            page_title = self._extract_page_title(href)
-                            site_data = {
-                                'name': text,
-                                'page_title': page_title,
-                                'url': f"{self.base_url}{href}" if href.startswith('/') else href
-                            }
-                            all_data[current_county]['climbing_sites'].append(site_data)
-                            print(f"  ✓ {text}")
-            return all_data
+            response = self._http_get(f"{self.base_url}/index.php?title={INDEX_PAGE_TITLE}", headers=headers)
+            if response.status_code == 304 and cached:
+                self.metrics.count('index_cache', 'not_modified')
+                logger.info("首页没有变化，使用缓存的郡和攀岩点列表")
+                return cached['structure']
+            if response.status_code != 200:
+                # 重试用完的 5xx、没有缓存时的 304 等：不能当成首页解析
+                raise RuntimeError(f"首页返回状态码 {response.status_code}")
+
+            digest = hashlib.sha1(response.content).hexdigest()
+            if cached and cached.get('sha1') == digest:
+                # 服务器不支持条件请求时，内容相同也不用重新解析
+                self.metrics.count('index_cache', 'unchanged')
+                structure = cached['structure']
+            else:
+                self.metrics.count('index_cache', 'parsed')
+                with self.metrics.stage('index_parse'):
+                    structure = self._parse_index_html(response.content)
+                if not structure:
+                    raise RuntimeError("首页里没有找到任何郡")
+            self._save_index_cache({
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha1': digest,
+                'structure': structure,
+            })
+            return structure
         except Exception as e:
-            print(f"网页爬取失败: {e}")
+            if cached:
+                logger.warning("网页爬取失败，使用缓存的郡和攀岩点列表: %s", e)
+                self.metrics.count('index_cache', 'stale')
+                return cached['structure']
+            logger.error("网页爬取失败: %s", e)
             return {}
 
+    def _parse_index_html(self, content):
+        # 只建标题和段落/列表的节点，其它标签（导航栏、脚本等）解析时直接跳过
+        soup = BeautifulSoup(content, INDEX_PARSER, parse_only=SoupStrainer(['h1', 'h2', 'h3', 'ul', 'p']))
+        all_data = {}
+        current_county = None
+
+        for element in soup.find_all(['h1', 'h2', 'h3', 'ul', 'p']):
+            if element.name in ['h1', 'h2', 'h3']:
+                text = element.get_text().strip()
+                text = grammar.EDIT_MARKER.sub('', text).strip()
+                if text.startswith('Co. ') and len(text) > 5:
+                    current_county = text
+                    all_data[current_county] = {'county_info': {'name': current_county}, 'climbing_sites': []}
+                    logger.info("找到郡: %s", current_county)
+
+            elif element.name in ['ul', 'p'] and current_county:
+                links = element.find_all('a', href=True)
+                for link in links:
+                    text = link.get_text().strip()
+                    href = link['href']
+                    if self._is_valid_climbing_site(text, href):
+                        page_title = self._extract_page_title(href)
+                        site_data = {
+                            'name': text,
+                            'page_title': page_title,
+                            'url': f"{self.base_url}{href}" if href.startswith('/') else href
+                        }
+                        all_data[current_county]['climbing_sites'].append(site_data)
+                        logger.debug("  ✓ %s", text)
+        return all_data
+
+    def _load_index_cache(self):
+        if not self.index_cache_path or not os.path.exists(self.index_cache_path):
+            return None
+        try:
+            with open(self.index_cache_path, encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("首页缓存读取失败: %s", e)
+            return None
+        if cached.get('version') != INDEX_CACHE_VERSION or not cached.get('structure'):
+            return None
+        return cached
+
+    def _save_index_cache(self, entry):
+        if not self.index_cache_path or not entry.get('structure'):
+            return
+        with atomic_open(self.index_cache_path) as f:
+            json.dump(dict(entry, version=INDEX_CACHE_VERSION), f, ensure_ascii=False)
+
     def _extract_routes_section(self, full_text: str) -> str:
-        if not full_text: return ""
-        pattern = r'==+\s*(Routes?|Climbs?)\s*==+'
-        m = re.search(pattern, full_text, flags=re.IGNORECASE)
-        if not m: return full_text
-        start = m.end()
-        m2 = re.search(r'\n==[^=].*?==', full_text[start:], flags=re.IGNORECASE)
-        if m2: return full_text[start:start + m2.start()]
-        return full_text[start:]
+        return grammar.extract_routes_section(full_text)
 
     def _wikitext_to_plain(self, text: str) -> str:
         if not text:
             return ""
 
-        text = re.sub(r'', '', text, flags=re.DOTALL)
-        text = re.sub(r'\{\{.*?\}\}', '', text, flags=re.DOTALL)
+        text = grammar.HTML_COMMENT.sub('', text)
+        text = grammar.TEMPLATE.sub('', text)
 
-        text = re.sub(r'<(?:br|p|div)\s*/?>', '\n', text, flags=re.IGNORECASE)
-        text = re.sub(r'</(?:p|div)>', '\n', text, flags=re.IGNORECASE)
+        text = grammar.BLOCK_TAG_OPEN.sub('\n', text)
+        text = grammar.BLOCK_TAG_CLOSE.sub('\n', text)
         
-        text = re.sub(r'</?(?:b|strong|i|em|span)[^>]*>', ' ', text, flags=re.IGNORECASE)
+        text = grammar.INLINE_TAG.sub(' ', text)
 
-        text = re.sub(r'\[\[(?:[^|\]]*\|)?([^\]]+)\]\]', r'\1', text)
+        text = grammar.WIKILINK.sub(r'\1', text)
         
-        text = re.sub(r'\[(?:https?://[^\s]+)\s+([^\]]+)\]', r'\1', text)
+        text = grammar.EXTERNAL_LINK.sub(r'\1', text)
 
-        text = re.sub(r"''+", '', text)
+        text = grammar.QUOTE_MARKUP.sub('', text)
 
-        text = re.sub(r'[ \t]+', ' ', text)
-        text = re.sub(r'\n\s*\n+', '\n', text)
+        text = grammar.SPACES.sub(' ', text)
+        text = grammar.BLANK_LINES.sub('\n', text)
 
         return text.strip()
 
 
     def clean_route_name(self, name: str) -> str:
-        if not name: return ""
-        name = re.sub(r'^\s*\d+[a-zA-Z]?\.?\s*', '', name)
-        cleaned = re.sub(r'[\*\#\|\-]+', ' ', name)
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-        cleaned = cleaned.strip(' \t\n\r\"\'')
-        return cleaned
+        return grammar.clean_route_name(name)
 
     def _looks_like_grade(self, difficulty: str) -> bool:
-        if not difficulty: return False
-        d = difficulty.strip()
-        uk_trad_grades = {"M", "MS","D", "VD", "Diff", "VDiff", "HVD", "S", "HS", "VS", "HVS", "E1", "E2", "E3", "E4", "E5", "E6", "E7", "E8", "E9"}
-        if d in uk_trad_grades: return True
-        if re.fullmatch(r"E[1-9](/[1-9])?", d): return True
-        if re.fullmatch(r"[3-9][abc][+-]?", d.lower()): return True
-        if re.fullmatch(r"[3-9][ABCD][+-]?", d): return True
-        return False
+        return grammar.looks_like_grade(difficulty)
 
     #def _parse_route_line(self, line: str):
         if not line: return None
@@ -193,13 +471,12 @@ class IrishClimbingRobust:
         """重写 - 适配wikitext格式"""
         if not line:
             return None
-        
-        line = line.strip()
-        
-        # 移除wikitext标记
-        line = re.sub(r"''+", '', line)  # 移除粗体/斜体标记
-        line = re.sub(r'\[\[[^|\]]*\|([^\]]+)\]\]', r'\1', line)  # 转换[[链接|显示文本]]为显示文本
-        line = re.sub(r'\[\[([^\]]+)\]\]', r'\1', line)  # 转换[[页面名]]为页面名
+        return self._parse_route_tokens(WikiLine(0, line))
+
+    def _parse_route_tokens(self, wline):
+        """从已经切好 token 的一行里解析路线名/高度/难度"""
+        # 粗体/斜体标记已去掉，[[链接|显示文本]] / [[页面名]] 只保留文字
+        line = wline.plain
         
         # 跳过太长的行（通常是段落）
         if len(line) > 100:
@@ -212,27 +489,19 @@ class IrishClimbingRobust:
             return None
         
         # 移除数字编号（1., 2), 3.等）
-        line = re.sub(r'^\s*\d+[\.\)]\s*', '', line)
+        line = grammar.LIST_NUMBER.sub('', line)
         
         # 检查是否包含高度（必须）
-        height_match = re.search(r'(\d+)\s*m', line, re.IGNORECASE)
+        height_match = grammar.HEIGHT.search(line)
         if not height_match:
             return None
         
         height = int(height_match.group(1))
         
         # 检查是否包含难度（必须）- 爱尔兰攀岩常用难度等级
-        grade_patterns = [
-            r'\b(E[1-9][0-9]?)\b',  # E1, E2, E3...
-            r'\b(HVS|VS|HS|S|VD|HVD|D|MS|M)\b',  # 传统难度
-            r'\b([1-9][abc])\b',  # 技术难度 5a, 6b等
-            r'\b(F[0-9][abc])\b',  # 法国难度
-            r'\b([A-Z][0-9])\b',  # A1, A2等
-        ]
-        
         grade = None
-        for pattern in grade_patterns:
-            grade_match = re.search(pattern, line, re.IGNORECASE)
+        for pattern in grammar.ROUTE_LINE_GRADES:
+            grade_match = pattern.search(line)
             if grade_match:
                 grade = grade_match.group(1).upper()
                 break
@@ -244,16 +513,15 @@ class IrishClimbingRobust:
         height_pos = height_match.start()
         name_part = line[:height_pos].strip()
         
-        # 清理路线名
-        name_part = re.sub(r'^[\*\-\:\s]+', '', name_part)  # 移除开头的特殊字符
-        name_part = re.sub(r'[\*\-\:\s]+$', '', name_part)  # 移除结尾的特殊字符
+        # 清理路线名：移除开头和结尾的特殊字符
+        name_part = grammar.NAME_EDGE_SYMBOLS.sub('', name_part)
         
         # 如果路线名太短或太长，跳过
         if len(name_part) < 2 or len(name_part) > 60:
             return None
         
         # 检查路线名是否有效
-        if re.match(r'^[\d\s]+$', name_part):  # 纯数字
+        if grammar.DIGITS_ONLY.match(name_part):  # 纯数字
             return None
         
         return {
@@ -270,18 +538,18 @@ class IrishClimbingRobust:
         
         location = 'Inland'
         
-        if any(word in text_lower for word in ['sea cliff', 'sea-cliff', 'tidal', 'coastal', 'cliff']):
+        if grammar.SEA_CLIFF_WORDS.search(text_lower):
             location = 'Sea Cliff'
-        elif any(word in text_lower for word in ['quarry', 'quarries']):
+        elif grammar.QUARRY_WORDS.search(text_lower):
             location = 'Quarry'
-        elif any(word in text_lower for word in ['mountain', 'hill', 'alpine', 'slieve']):
+        elif grammar.MOUNTAIN_WORDS.search(text_lower):
             location = 'Mountain'
 
         style = 'Trad'
         
-        if any(word in text_lower for word in ['sport', 'bolt', 'bolted', 'clip']):
+        if grammar.SPORT_WORDS.search(text_lower):
             style = 'Sport'
-        elif any(word in text_lower for word in ['boulder', 'problem']):
+        elif grammar.BOULDER_WORDS.search(text_lower):
             style = 'Boulder'
         
         return [location, style]
@@ -332,281 +600,125 @@ class IrishClimbingRobust:
     
     
     
-    def _guess_county_from_query(self, query):
-        """从查询中猜测郡名"""
-        # 常见的爱尔兰郡
-        counties = ["Antrim", "Dublin", "Wicklow", "Cork", "Clare", "Galway", "Kerry", "Donegal"]
-        
-        query_lower = query.lower()
-        
-        # 检查查询中是否包含郡名
-        for county in counties:
-            if county.lower() in query_lower:
-                return county
-        
-        # 默认返回Antrim（因为大部分测试是Antrim）
-        return "Antrim"
-
     def _fetch_coords_from_osm(self, query):
-        """强制返回坐标 - 找不到精确的就返回爱尔兰的大致位置"""
-        try:
-            clean_query = query.replace('_', ' ').strip()
-            
-            # 尝试精确搜索
-            print(f"      搜索: '{clean_query}'")
-            
-            # 先尝试直接搜索
-            url = "https://nominatim.openstreetmap.org/search"
-            params = {
-                'q': f"{clean_query}, Ireland",
-                'format': 'json',
-                'limit': 5,
-                'addressdetails': 1
-            }
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            time.sleep(1)
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data:
-                    # 优先选择自然特征或包含查询词的
-                    for result in data:
-                        display_name = str(result.get('display_name', '')).lower()
-                        result_type = str(result.get('type', '')).lower()
-                        
-                        # 检查是否在爱尔兰
-                        if any(word in display_name for word in ['ireland', 'irish', 'co.']):
-                            coords = {
-                                "latitude": float(result['lat']),
-                                "longitude": float(result['lon'])
-                            }
-                            print(f"      找到精确坐标: {coords}")
-                            print(f"          地点: {display_name[:60]}...")
-                            return coords
-                    
-                    # 如果没有在爱尔兰的，至少返回第一个结果
-                    first_result = data[0]
-                    coords = {
-                        "latitude": float(first_result['lat']),
-                        "longitude": float(first_result['lon'])
-                    }
-                    print(f"     找到坐标（可能不在爱尔兰）: {coords}")
-                    return coords
-            
-            # 如果精确搜索失败，尝试备用搜索
-            print(f"      精确搜索失败，尝试备用策略...")
-            
-            # 策略1：搜索"climbing crag"
-            if 'climbing' not in clean_query.lower():
-                backup_params = {'q': f"{clean_query} climbing, Ireland", 'format': 'json', 'limit': 1}
-                time.sleep(1)
-                response = requests.get(url, params=backup_params, headers=headers, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data:
-                        coords = {
-                            "latitude": float(data[0]['lat']),
-                            "longitude": float(data[0]['lon'])
-                        }
-                        print(f"     通过climbing关键词找到坐标: {coords}")
-                        return coords
-            
-            # 策略2：只搜索郡名（从查询中提取或猜测）
-            county = self._guess_county_from_query(query)
-            if county:
-                county_params = {'q': f"{county}, Ireland", 'format': 'json', 'limit': 1}
-                time.sleep(1)
-                response = requests.get(url, params=county_params, headers=headers, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data:
-                        coords = {
-                            "latitude": float(data[0]['lat']),
-                            "longitude": float(data[0]['lon'])
-                        }
-                        print(f"    使用{county}郡中心坐标: {coords}")
-                        return None
-            
-            # 策略3：返回爱尔兰的地理中心（保底）
-            ireland_center = {"latitude": 53.3498, "longitude": -6.2603}  # 都柏林
-            print(f"      🏴󠁧󠁢󠁩󠁥󠁿 使用爱尔兰中心坐标: {ireland_center}")
-            return None
-            
-        except Exception as e:
-            print(f"     搜索出错: {e}")
-            # 即使出错也返回爱尔兰中心
+        """通过 geocoder 查询坐标（带缓存），找不到返回 None"""
+        clean_query = query.replace('_', ' ').strip()
+        logger.debug("      搜索: '%s'", clean_query)
+
+        coords = self.geocoder.geocode(clean_query)
+        if not coords:
             return None
+
+        coords = dict(coords)
+        backend = coords.pop('backend', None)
+        if backend == 'gazetteer':
+            coords['source'] = 'gazetteer'
+        logger.debug("      找到坐标: %s", coords)
+        return coords
+
+    def geocode_titles(self, titles, retry_not_found=False):
+        """批量地理编码：跨所有郡去重后再查询，返回 {title: coords 或 None}"""
+        results = self.geocoder.geocode_many([title.replace('_', ' ').strip() for title in titles], retry_not_found)
+        return {title: results[title.replace('_', ' ').strip()] for title in titles}
+
+    def fill_backup_coordinates(self, all_data, retry_not_found=False):
+        """对使用备用坐标的站点统一做一次批量地理编码（例如添加了新的地名表之后）"""
+        self._fill_backup_sites(
+            [site for county_data in all_data.values() for site in county_data['climbing_sites']], retry_not_found)
+        return all_data
+
+    def _fill_backup_sites(self, sites, retry_not_found=False):
+        """sites 里用备用坐标的站点去重后批量查询，找到的直接改 site['coordinates']，返回这些站点"""
+        pending = [site for site in sites if (site.get('coordinates') or {}).get('source') == 'backup']
+        found = self.geocode_titles([site['page_title'] for site in pending], retry_not_found)
+        filled = []
+        for site in pending:
+            coords = found.get(site['page_title'])
+            if coords:
+                coords = dict(coords)
+                coords['source'] = 'gazetteer' if coords.pop('backend', None) == 'gazetteer' else 'osm_search'
+                site['coordinates'] = coords
+                filled.append(site)
+        self.metrics.count('backup_geocode', 'filled', len(filled))
+        self.metrics.count('backup_geocode', 'still_backup', len(pending) - len(filled))
+        logger.info("批量地理编码: %d/%d 个站点找到坐标", len(filled), len(pending))
+        return filled
+
+    def geocode_backup_sites(self, data_dir='.'):
+        """
+        已有的 *_all_data.json 里所有用备用坐标的站点，跨郡去重后一起查一次坐标（之前没找到的也重新查，
+        例如加了 --gazetteer 地名表之后），有站点找到坐标的文件写回。返回 {文件: 找到坐标的站点数}
+        """
+        county_data_by_file = {path: load_json(path) for path in data_files(data_dir)}
+        sites_by_file = {
+            path: [site for county_data in data.values() for site in county_data['climbing_sites']]
+            for path, data in county_data_by_file.items()
+        }
+        with self.metrics.stage('backup_geocode'):
+            filled = {id(site) for site in self._fill_backup_sites(
+                [site for sites in sites_by_file.values() for site in sites], retry_not_found=True)}
+
+        updated = {}
+        for path, sites in sites_by_file.items():
+            count = sum(1 for site in sites if id(site) in filled)
+            if count:
+                self.save_complete_data(county_data_by_file[path], path)
+                updated[path] = count
+        return updated
         
     def extract_grid_ref_coords(self, wikitext):
         """从wiki文本中提取Grid Ref并转换为坐标"""
-        print(f"      [Grid Ref] 开始提取...")
-        
         if not wikitext:
-            print(f"      [Grid Ref] wikitext为空")
+            logger.debug("      [Grid Ref] wikitext为空")
             return None
         
         # 1. 提取Grid Ref字符串
-        print(f"      [Grid Ref] 调用_extract_grid_ref...")
         grid_ref = self._extract_grid_ref(wikitext)
         
         if not grid_ref:
-            print(f"      [Grid Ref] 未找到Grid Ref字符串")
-            # 调试：显示wikitext的前200字符，看看里面有什么
-            print(f"      [Grid Ref] wikitext预览: '{wikitext[:200]}'")
+            logger.debug("      [Grid Ref] 未找到Grid Ref字符串")
             return None
         
-        print(f"      [Grid Ref] 找到Grid Ref: {grid_ref}")
-        
         # 2. 转换为坐标
-        print(f"      [Grid Ref] 调用_convert_gridref...")
         coords = self._convert_gridref(grid_ref)
         if coords:
-            print(f"      [Grid Ref] 转换成功: {coords}")
+            logger.debug("      [Grid Ref] %s 转换成功: %s", grid_ref, coords)
             coords["source"] = "grid_reference"
             return coords
         else:
-            print(f"      [Grid Ref] 转换失败")
+            logger.debug("      [Grid Ref] %s 转换失败", grid_ref)
             return None
 
     def _extract_grid_ref(self, text):
         """提取Grid Ref字符串"""
-        print(f"        [提取Grid Ref] 文本长度: {len(text)}")
-        
         if not text:
-            print(f"        [提取Grid Ref] 文本为空")
             return None
         
-        # 先显示文本开头，看看有什么
-        preview = text[:200].replace('\n', ' ').replace('\r', ' ')
-        print(f"        [提取Grid Ref] 文本预览: '{preview}...'")
-        
-        patterns = [
-            r'Grid\s*Ref\.?\s*:?\s*([A-Z]{1,2}\s*\d{6})',
-            r'Grid\s*Reference\.?\s*:?\s*([A-Z]{1,2}\s*\d{6})',
-            r'OS\s*Grid\s*Ref\.?\s*:?\s*([A-Z]{1,2}\s*\d{6})',
-            r'OS\s*Grid\s*Reference\.?\s*:?\s*([A-Z]{1,2}\s*\d{6})',
-            r'([A-Z]{1,2}\s*\d{6})\s*\(OS\s*Grid\)',
-            r'([A-Z]{1,2}\s*\d{3}\s*\d{3})',
-            r'([A-Z]{1,2}\s*\d{5,6})',
-        ]
-        
-        for i, pattern in enumerate(patterns):
-            print(f"        [提取Grid Ref] 尝试模式{i+1}: {pattern[:30]}...")
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                grid_ref = match.group(1).replace(' ', '').strip()
-                if len(grid_ref) >= 6:  # 基本验证
-                    print(f"        [提取Grid Ref] ✓ 模式{i+1}匹配成功: {grid_ref}")
-                    return grid_ref.upper()
-            else:
-                print(f"        [提取Grid Ref] ✗ 模式{i+1}未匹配")
+        for i, pattern in enumerate(grammar.GRID_REF_PATTERNS):
+            for match in pattern.finditer(text):
+                grid_ref = match.group(1).replace(' ', '').strip().upper()
+                # 正则只是粗筛（例如奇数位数字也能匹配上），转换不了的继续找下一个
+                if parse_gridref(grid_ref) is None:
+                    logger.debug("        [提取Grid Ref] 模式%d 匹配到无效的 %s，继续", i + 1, grid_ref)
+                    continue
+                logger.debug("        [提取Grid Ref] ✓ 模式%d (%.30s) 匹配成功: %s", i + 1, pattern.pattern, grid_ref)
+                return grid_ref
         
-        print(f"        [提取Grid Ref] ✗ 所有模式都未匹配")
+        logger.debug("        [提取Grid Ref] ✗ %d 个模式都未匹配 (文本长度 %d)", len(grammar.GRID_REF_PATTERNS), len(text))
         return None
 
     def _convert_gridref(self, grid_ref):
-        """转换Grid Ref为经纬度（简化版）"""
+        """转换Grid Ref为经纬度（本地 Irish Grid -> WGS84，不联网）"""
         try:
-            # 先尝试在线API转换
-            api_coords = self._convert_gridref_via_api(grid_ref)
-            if api_coords:
-                return api_coords
-            
-            # 如果API失败，尝试本地转换（针对北爱尔兰的H/I网格）
-            return self._convert_gridref_locally(grid_ref)
+            coords = gridref_to_wgs84(grid_ref)
+            if not coords:
+                logger.debug("      不是有效的爱尔兰网格: %s", grid_ref)
+            return coords
             
         except Exception as e:
-            print(f"      转换错误: {e}")
+            logger.warning("      Grid Ref %s 转换错误: %s", grid_ref, e)
             return None
 
-    def _convert_gridref_via_api(self, grid_ref):
-        """使用在线API转换Grid Ref"""
-        try:
-            # 尝试gridreferencefinder.com
-            url = "https://gridreferencefinder.com/gridRefAjax.php"
-            params = {'gridref': grid_ref}
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            
-            print(f"      调用在线API转换: {grid_ref}")
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                text = response.text
-                
-                # 解析API响应
-                lat_match = re.search(r'Latitude[:\s]*([\d\.\-]+)', text, re.IGNORECASE)
-                lon_match = re.search(r'Longitude[:\s]*([\d\.\-]+)', text, re.IGNORECASE)
-                
-                if lat_match and lon_match:
-                    lat = float(lat_match.group(1))
-                    lon = float(lon_match.group(1))
-                    return {"latitude": lat, "longitude": lon}
-                    
-        except Exception as e:
-            print(f"      API转换失败: {e}")
-        
-        return None
-
-    def _convert_gridref_locally(self, grid_ref):
-        """本地转换Grid Ref（针对北爱尔兰）"""
-        try:
-            # 只处理北爱尔兰的H/I网格
-            if not grid_ref.startswith(('H', 'I')):
-                print(f"      仅支持北爱尔兰网格(H/I)")
-                return None
-            
-            # 清理网格参考
-            grid_ref = grid_ref.upper().replace(' ', '')
-            
-            if len(grid_ref) != 7:  # H + 6位数字
-                print(f"      网格格式错误: {grid_ref}")
-                return None
-            
-            letter = grid_ref[0]
-            numbers = grid_ref[1:]
-            
-            # H网格的基础坐标（北爱尔兰）
-            if letter == 'H':
-                base_easting = 200000  # 500km方格
-                base_northing = 400000
-            elif letter == 'I':
-                base_easting = 300000
-                base_northing = 400000
-            else:
-                return None
-            
-            # 提取东距和北距（6位数字：前3后3）
-            easting_str = numbers[:3]
-            northing_str = numbers[3:]
-            
-            easting = base_easting + int(easting_str) * 10  # 转换为米
-            northing = base_northing + int(northing_str) * 10
-            
-            # 简化的坐标转换公式（近似）
-            # 注意：这是简化转换，精确转换需要专业库
-            lon = -6.5 + (easting - 250000) / 150000
-            lat = 54.5 + (northing - 450000) / 150000
-            
-            # 限制在合理范围内
-            lat = max(53.0, min(55.5, lat))
-            lon = max(-8.0, min(-5.5, lon))
-            
-            return {
-                "latitude": round(lat, 6),
-                "longitude": round(lon, 6)
-            }
-            
-        except Exception as e:
-            print(f"      本地转换失败: {e}")
-            return None    
-
     #def _extract_coordinates_logic(self, title, wikitext):
         if title in MANUAL_COORDS:
             return MANUAL_COORDS[title]
@@ -628,61 +740,49 @@ class IrishClimbingRobust:
     
     def _extract_coordinates_logic(self, title, wikitext):
         """分层次坐标提取"""
-        print(f"\n      获取坐标: {title}")
+        logger.debug("      获取坐标: %s", title)
         
         # 1. 手动坐标（最高优先级）
         if title in MANUAL_COORDS:
-            print(f"      ✓ 使用手动坐标")
+            logger.debug("      ✓ 使用手动坐标")
             coords = MANUAL_COORDS[title].copy()
             coords["source"] = "manual"
             return coords
         
         # 2. Wiki坐标模板
         try:
-            coord_pattern = r"\{\{[Cc]oord\|([0-9\.]+)\|([0-9\.\-]+)\}\}"
-            match = re.search(coord_pattern, wikitext, re.IGNORECASE)
+            match = grammar.COORD_TEMPLATE.search(wikitext)
             if match:
                 coords = {
                     "latitude": float(match.group(1)),
                     "longitude": float(match.group(2)),
                     "source": "wiki_template"
                 }
-                print(f"      ✓ 从Wiki模板获取坐标")
+                logger.debug("      ✓ 从Wiki模板获取坐标")
                 return coords
         except Exception as e:
-            print(f"      Wiki模板提取错误: {e}")
-            pass
+            logger.warning("      Wiki模板提取错误: %s", e)
         
-        # 4. OSM失败，尝试Grid Ref（第二层）← 问题可能在这里！
-        print(f"      → OSM失败，尝试Grid Ref...")
+        # 3. Grid Ref
+        if wikitext and len(wikitext) < 10:
+            logger.warning("      ✗ %s 的 wikitext太短(%d字符)，可能有问题", title, len(wikitext))
         
-        # 先检查wikitext是否有效
-        if not wikitext:
-            print(f"      ✗ wikitext为空，无法提取Grid Ref")
-        elif len(wikitext) < 10:
-            print(f"      ✗ wikitext太短({len(wikitext)}字符)，可能有问题")
-        else:
-            print(f"      wikitext长度: {len(wikitext)}字符")
-        
-        grid_coords = self.extract_grid_ref_coords(wikitext)
+        with self.metrics.stage('coordinates.grid_reference'):
+            grid_coords = self.extract_grid_ref_coords(wikitext)
         if grid_coords:
-            print(f"      ✓ Grid Ref找到坐标")
+            logger.debug("      ✓ Grid Ref找到坐标")
             return grid_coords
-        else:
-            print(f"      ✗ Grid Ref未找到坐标")
 
-        # 3. 先尝试OSM搜索（第一层）
-        print(f"      → 尝试OSM搜索...")
-        osm_coords = self._fetch_coords_from_osm(title)
+        # 4. OSM搜索
+        with self.metrics.stage('coordinates.osm_search'):
+            osm_coords = self._fetch_coords_from_osm(title)
         if osm_coords:
-            osm_coords["source"] = "osm_search"
-            print(f"      ✓ OSM找到坐标")
+            osm_coords.setdefault("source", "osm_search")
+            logger.debug("      ✓ OSM找到坐标")
             return osm_coords
-        else:
-            print(f"      ✗ OSM未找到坐标")
         
         # 5. 所有方法都失败，使用备用坐标
-        print(f"      → 所有方法失败，使用备用坐标")
+        logger.debug("      → 所有方法失败，使用备用坐标")
         return {
             "latitude": 54.864, 
             "longitude": -6.268,
@@ -691,69 +791,227 @@ class IrishClimbingRobust:
         }
 
     def get_full_page_content_via_api(self, page_title):
-        try:
-            clean_title = self._clean_page_title(page_title)
-            
+        return self.get_full_pages_content_via_api([page_title])[page_title]
+
+    def _build_page_content(self, clean_title, content):
+        """把一页 wikitext 整理成 get_full_page_content_via_api 的返回结构"""
+        with self.metrics.stage('routes_section'):
+            routes_section = self._extract_routes_section(content)
+        
+        # 不要转换成 plain_text，保留原始内容！
+        # plain_routes_text = self._wikitext_to_plain(routes_section)
+        
+        with self.metrics.stage('coordinates'):
+            coordinates = self._extract_coordinates_logic(clean_title, content)
+        self.metrics.count('coordinate_source', coordinates.get('source'))
+        with self.metrics.stage('crag_type'):
+            crag_type = self._determine_crag_type(content)
+
+        return {
+            'title': clean_title,
+            'content': content,
+            'routes_section': routes_section,  # 新增：原始路线部分
+            'coordinates': coordinates,
+            'crag_type': crag_type
+        }
+
+    def get_full_pages_content_via_api(self, page_titles, batch_size=50):
+        """
+        批量获取多个页面的内容：MediaWiki 一次 query 最多接受 50 个 titles（用 | 连接），
+        一个郡通常一两次请求就能拿完。
+        返回 {原始 page_title: 和 get_full_page_content_via_api 相同结构的 dict}
+        """
+        results = {}
+        for page_title, raw in self._fetch_pages_wikitext(page_titles, batch_size).items():
+            if 'error' in raw:
+                results[page_title] = raw
+            else:
+                results[page_title] = self._build_page_content(raw['title'], raw['content'])
+        return results
+
+    def _fetch_pages_wikitext(self, page_titles, batch_size=50):
+        """
+        只负责批量下载 wikitext，不做解析/坐标查询
+        返回 {原始 page_title: {'title', 'content'} 或 {'error', 'page_title', 'normalized_title'}}，
+        出错时 page_title 总是调用方传入的原始标题，normalized_title 是清理后实际请求的标题
+        """
+        results = {}
+        if not page_titles:
+            return results
+
+        # 原始标题 -> 清理后的标题（去重但保持顺序）
+        clean_map = {}
+        for page_title in page_titles:
+            clean_map.setdefault(page_title, self._clean_page_title(page_title))
+        clean_titles = list(dict.fromkeys(clean_map.values()))
+
+        contents = self._get_cached_wikitext(clean_titles)
+        missing = [title for title in clean_titles if title not in contents]
+        self.metrics.count('page_cache', 'hit', len(contents))
+        self.metrics.count('page_cache', 'miss', len(missing))
+        if contents:
+            logger.info("    缓存命中 %d/%d 个页面", len(contents), len(clean_titles))
+        if self.offline:
+            missing = []
+
+        batch_size = max(1, min(batch_size, 50))
+        deferred = []  # 重试用完或者熔断的批次，整个郡的其它批次请求完以后再试一次
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            logger.info("    批量请求 %d 个页面 (%d-%d/%d)", len(batch), start + 1, start + len(batch), len(missing))
+            try:
+                contents.update(self._fetch_revisions_batch(batch))
+            except Exception as e:
+                logger.warning("    批量API请求失败，稍后重试: %s", e)
+                deferred.append(batch)
+
+        if deferred:
+            self.metrics.count('deferred_batches', 'queued', len(deferred))
+            wait = min(self._get_host_breaker(urllib.parse.urlparse(self.api_url).netloc).retry_in(),
+                       DEFERRED_MAX_WAIT)
+            if wait:
+                logger.info("    等待 %.0f 秒后重试 %d 个失败的批次", wait, len(deferred))
+                time.sleep(wait)
+        for batch in deferred:
+            try:
+                contents.update(self._fetch_revisions_batch(batch))
+                self.metrics.count('deferred_batches', 'recovered')
+            except Exception as e:
+                logger.warning("    批量API请求失败: %s", e)
+                self.metrics.count('deferred_batches', 'failed')
+                for clean_title in batch:
+                    contents[clean_title] = {'error': str(e)}
+
+        for page_title, clean_title in clean_map.items():
+            content = contents.get(clean_title)
+            if content is None:
+                results[page_title] = {'error': '页面不存在', 'page_title': page_title, 'normalized_title': clean_title}
+            elif isinstance(content, dict):
+                results[page_title] = {'error': content['error'], 'page_title': page_title,
+                                       'normalized_title': clean_title}
+            else:
+                results[page_title] = {'title': clean_title, 'content': content}
+
+        if self.page_cache and missing:
+            self.page_cache.evict()
+
+        return results
+
+    def _get_cached_wikitext(self, clean_titles):
+        """
+        从本地缓存取 wikitext：ttl 内直接用；过期的用一次 prop=info 查询最新 revid，
+        revid 没变就继续用缓存。返回 {标题: wikitext}
+        """
+        if not self.page_cache:
+            return {}
+
+        hits = {}
+        stale = {}
+        for title in clean_titles:
+            entry = self.page_cache.get(title)
+            if entry is None:
+                continue
+            if self.offline or self.page_cache.is_fresh(entry):
+                hits[title] = entry['content']
+            else:
+                stale[title] = entry
+
+        if stale:
+            try:
+                latest = self._fetch_latest_revids(list(stale))
+            except Exception as e:
+                logger.warning("    revid 检查失败: %s", e)
+                latest = {}
+            for title, entry in stale.items():
+                if entry['revid'] is not None and latest.get(title) == entry['revid']:
+                    self.page_cache.touch(title)
+                    hits[title] = entry['content']
+                    self.metrics.count('page_cache_revalidation', 'unchanged')
+                else:
+                    self.metrics.count('page_cache_revalidation', 'changed')
+
+        return hits
+
+    def _fetch_latest_revids(self, clean_titles):
+        """用 prop=info 批量查询页面当前的 lastrevid（不下载正文），返回 {标题: revid}"""
+        revids = {}
+        for start in range(0, len(clean_titles), 50):
+            batch = clean_titles[start:start + 50]
             params = {
-                'action': 'query', 
-                'prop': 'revisions', 
-                'titles': clean_title, 
-                'rvprop': 'content', 
+                'action': 'query',
+                'prop': 'info',
+                'titles': '|'.join(batch),
                 'format': 'json'
             }
-            response = self.session.get(self.api_url, params=params, timeout=10)
+            response = self._http_get(self.api_url, params=params, timeout=30)
+            query = response.json().get('query', {})
+            title_alias = self._normalized_title_alias(query, batch)
+            for page_id, page_data in query.get('pages', {}).items():
+                if 'lastrevid' in page_data:
+                    requested = title_alias.get(page_data.get('title'), page_data.get('title'))
+                    revids[requested] = page_data['lastrevid']
+        return revids
+
+    def _normalized_title_alias(self, query, clean_titles):
+        """API 会把标题规范化（下划线 -> 空格、首字母大写等），建立 规范标题 -> 请求标题 的映射"""
+        title_alias = {title: title for title in clean_titles}
+        for item in query.get('normalized', []):
+            title_alias[item['to']] = title_alias.get(item['from'], item['from'])
+        return title_alias
+
+    def _fetch_revisions_batch(self, clean_titles):
+        """
+        一批页面的 wikitext，返回 {请求时的标题: wikitext}。
+        结果超过 API 的大小限制时只返回一部分页面的正文并带上 continue，接着请求直到没有 continue
+        """
+        params = {
+            'action': 'query',
+            'prop': 'revisions',
+            'titles': '|'.join(clean_titles),
+            'rvprop': 'ids|content',
+            'format': 'json'
+        }
+        contents = {}
+        while True:
+            response = self._http_get(self.api_url, params=params, timeout=30)
             data = response.json()
-            pages = data['query']['pages']
-            
-            for page_id, page_data in pages.items():
-                if 'revisions' in page_data:
-                    content = page_data['revisions'][0]['*']
-                    
-                    routes_section = self._extract_routes_section(content)
-                    
-                    # 不要转换成 plain_text，保留原始内容！
-                    # plain_routes_text = self._wikitext_to_plain(routes_section)
-                    
-                    coordinates = self._extract_coordinates_logic(clean_title, content)
-                    crag_type = self._determine_crag_type(content)
-
-                    return {
-                        'title': clean_title,
-                        'content': content,
-                        'routes_section': routes_section,  # 新增：原始路线部分
-                        'coordinates': coordinates,
-                        'crag_type': crag_type
-                    }
+            query = data.get('query', {})
+            title_alias = self._normalized_title_alias(query, clean_titles)
 
-            return {'error': '页面不存在', 'page_title': clean_title}
-            
-        except Exception as e:
-            print(f"    API请求失败: {str(e)}")
-            return {'error': str(e), 'page_title': page_title}
-
-
-    def get_climbing_routes_from_page(self, page_content):
-        routes = []
+            for page_id, page_data in query.get('pages', {}).items():
+                if 'revisions' not in page_data:
+                    continue
+                requested = title_alias.get(page_data.get('title'), page_data.get('title'))
+                revision = page_data['revisions'][0]
+                contents[requested] = revision['*']
+                if self.page_cache:
+                    self.page_cache.put(requested, revision.get('revid'), revision['*'])
+
+            if 'continue' not in data:
+                return contents
+            self.metrics.count('page_fetch', 'continued')
+            params.update(data['continue'])
+
+
+    def iter_climbing_routes(self, page_content):
+        """
+        逐条产出路线（生成器）：只在调用方要下一条时才继续往下解析，
+        内存里只保留当前路线块，大岩场也不会一次性展开整页
+        """
         if not page_content or 'error' in page_content: 
-            return routes
+            return
         
         # 使用 routes_section，不是 plain_text！
         routes_section = page_content.get('routes_section', '') or ''
         if not routes_section:
-            return routes
+            return
 
-        lines = [line.strip() for line in routes_section.split('\n') if line.strip()]
+        # 逐行切 token，每行只处理一次；调用方停止迭代后剩下的行不再处理
+        stream = iter_lines(routes_section)
         seen_names = set()
 
-        for line in lines:
-
-            if len(routes) >= 20:
-                print(f"    已收集20条路线，停止解析")
-                break
-
-            parsed = self._parse_route_line(line)
-            if not parsed: 
-                continue
+        # 一遍切出所有路线块，每条路线只用自己块里的行补充首攀/描述
+        for parsed, headline, block in self._iter_route_blocks(stream):
             name = parsed['name']
             if name in seen_names: 
                 continue
@@ -766,12 +1024,26 @@ class IrishClimbingRobust:
                 'technical_grade': parsed['technical_grade'],
                 'sub_routes': [],
             }
-            # 使用 routes_section，保留HTML结构！
-            self.enrich_route_data(route_data, routes_section, name)
-            routes.append(route_data)
+            self._fill_route_from_block(route_data, block)
             seen_names.add(name)
-
-        print(f"    找到 {len(routes)} 条路线")
+            yield route_data
+
+    def iter_route_pages(self, page_content, page_size=50):
+        """按页产出路线列表，每页最多 page_size 条"""
+        routes = self.iter_climbing_routes(page_content)
+        while True:
+            page = list(islice(routes, page_size))
+            if not page:
+                return
+            yield page
+
+    def get_climbing_routes_from_page(self, page_content, max_routes=None):
+        """返回路线列表；max_routes 为 None 时返回全部路线"""
+        routes = list(islice(self.iter_climbing_routes(page_content), max_routes))
+        if max_routes is not None and len(routes) >= max_routes:
+            logger.debug("    已收集%d条路线，停止解析", max_routes)
+
+        logger.debug("    找到 %d 条路线", len(routes))
         return routes
     
     #def get_climbing_routes_from_page(self, page_content):
@@ -1137,87 +1409,103 @@ class IrishClimbingRobust:
         print(f"      完成处理 (子路线: {len(route_data.get('sub_routes', []))}, 描述: {'有' if route_data.get('description') else '无'}, 首攀: {'有' if route_data.get('first_ascent') else '无'})")
 
     def enrich_route_data(self, route_data, content, route_name):
-        """重写 - 针对wikitext格式"""
+        """重写 - 针对wikitext格式；content 可以是原始 wikitext，也可以是 tokenize() 的结果"""
         if not content or not route_name:
             return
         
-        print(f"      处理路线: {route_name}")
-        
-        # 1. 在wikitext中定位路线
-        lines = content.split('\n')
-        
-        # 找到路线标题行
-        route_line_index = -1
-        route_line_text = ""
+        # 在wikitext中定位路线标题行（包含路线名、高度和难度）
+        lines = tokenize(content) if isinstance(content, str) else content
         
-        for i, line in enumerate(lines):
-            # 移除wikitext标记后检查
-            line_clean = re.sub(r"''+", '', line)
-            line_clean = re.sub(r'\[\[[^\]]+\]\]', '', line_clean)
+        for i, wline in enumerate(lines):
+            line_clean = wline.bare
             
             if route_name.lower() in line_clean.lower():
-                # 确认这是路线标题行（包含高度和难度）
-                if re.search(r'\d+\s*m', line_clean, re.IGNORECASE):
-                    if re.search(r'\b(E[1-9]|HVS|VS|HS|S|VD|[1-9][abc])\b', line_clean, re.IGNORECASE):
-                        route_line_index = i
-                        route_line_text = line
-                        print(f"      找到路线行[{i}]: {line_clean[:100]}")
-                        break
-        
-        if route_line_index == -1:
-            print(f"     未找到路线: {route_name}")
-            route_data['first_ascent'] = "Unknown"
-            route_data['description'] = "No description available"
-            return
+                if grammar.HEIGHT.search(line_clean) and grammar.ROUTE_GRADE_HINT.search(line_clean):
+                    logger.debug("      找到路线行[%d]: %.100s", i, line_clean)
+                    # 标题行之后到下一条路线/下一个标题之前就是这条路线的块
+                    block = []
+                    for next_line in lines[i + 1:]:
+                        if next_line.heading or self._parse_route_tokens(next_line):
+                            break
+                        block.append(next_line)
+                    self._fill_route_from_block(route_data, block)
+                    return
+        
+        logger.debug("     未找到路线: %s", route_name)
+        route_data['first_ascent'] = "Unknown"
+        route_data['description'] = "No description available"
+
+    def _iter_route_blocks(self, stream):
+        """
+        一遍扫描把路线段落切成块：每块从一行路线标题开始，到下一行路线标题
+        （或 == 小标题 ==）为止。产出 (解析结果, 标题行, 块内其余行)
+        """
+        parsed, headline, block = None, None, []
+        for wline in stream:
+            if wline.heading:
+                if parsed:
+                    yield parsed, headline, block
+                parsed, headline, block = None, None, []
+                continue
+
+            route = self._parse_route_tokens(wline) if wline.stripped else None
+            if route:
+                if parsed:
+                    yield parsed, headline, block
+                parsed, headline, block = route, wline, []
+            elif parsed:
+                block.append(wline)
+
+        if parsed:
+            yield parsed, headline, block
+
+    def _fill_route_from_block(self, route_data, block):
+        """只看这条路线自己的块：标题后 4 行以内找首攀，其余正文作为描述"""
+        route_name = route_data['name']
+        logger.debug("      处理路线: %s", route_name)
         
-        # 2. 提取首攀信息
+        # 1. 提取首攀信息
         first_ascent = "Unknown"
+        fa_index = None
         
-        # 在路线行之后查找首攀信息
-        for i in range(route_line_index + 1, min(route_line_index + 5, len(lines))):
-            line = lines[i].strip()
+        for i, wline in enumerate(block[:4]):
+            line = wline.stripped
             
             # 跳过空行和wiki标记行
             if not line or line.startswith(('*', '#', ':', ';', '{', '|')):
                 continue
             
-            line_clean = re.sub(r"''+", '', line)
-            line_clean = re.sub(r'\[\[[^\]]+\]\]', '', line_clean)
+            line_clean = wline.bare
             
             # 检查是否包含首攀特征
-            if re.search(r'[A-Z][a-z]+', line_clean):  # 包含人名
-                if re.search(r'\d{4}', line_clean):  # 包含年份
-                    first_ascent = re.split(r'<br\s*/?>', line_clean.strip())[0]
-                    print(f"      找到首攀[{i}]: {first_ascent[:80]}")
+            if grammar.CAPITALISED_WORD.search(line_clean):  # 包含人名
+                if grammar.YEAR.search(line_clean):  # 包含年份
+                    first_ascent = grammar.BR.split(line_clean.strip())[0]
+                    fa_index = i
+                    logger.debug("      找到首攀: %.80s", first_ascent)
                     break
             
             # 检查FA:标记
-            if re.search(r'FA[:\.]|First\s+Ascent', line, re.IGNORECASE):
-                fa_match = re.search(r'FA[:\.]\s*(.+?)(?=\n|$|<br>)', line, re.IGNORECASE)
+            if grammar.FA_MARKER.search(line):
+                fa_match = grammar.FA_TEXT.search(line)
                 if fa_match:
                     first_ascent = fa_match.group(1).strip()
-                    print(f"      找到FA标记: {first_ascent[:80]}")
+                    fa_index = i
+                    logger.debug("      找到FA标记: %.80s", first_ascent)
                     break
         
-        route_data['first_ascent'] = first_ascent if first_ascent != "Unknown" else "Unknown"
+        route_data['first_ascent'] = first_ascent
         
-        # 3. 提取描述信息
+        # 2. 提取描述信息（块内除首攀行以外的正文）
         description_lines = []
+        description_length = 0
         
-        # 从路线行下一行开始，直到遇到下一个路线标题
-        for i in range(route_line_index + 1, len(lines)):
-            line = lines[i].strip()
+        for i, wline in enumerate(block):
+            line = wline.stripped
             
-            if not line:
+            if not line or i == fa_index:
                 continue
             
-            # 检查是否是下一条路线
-            if re.search(r'[A-Z][a-z]+', line_clean):  # 包含人名
-                if re.search(r'\d{4}', line_clean):  # 包含年份
-                    first_ascent = line_clean.strip().split('<br>')[0]
-                    print(f"      找到首攀[{i}]: {first_ascent[:80]}")
-                    break
-            
             # 跳过wiki标记行
             if line.startswith(('==', '*', '#', ':', ';', '{', '|', '[[Category', '[[File')):
                 continue
@@ -1226,48 +1514,32 @@ class IrishClimbingRobust:
             if first_ascent != "Unknown" and first_ascent in line:
                 continue
             
-            # 清理wikitext标记
-            line_clean = re.sub(r"''+", '', line)
-            line_clean = re.sub(r'\[\[[^|\]]*\|([^\]]+)\]\]', r'\1', line_clean)
-            line_clean = re.sub(r'\[\[([^\]]+)\]\]', r'\1', line_clean)
-            line_clean = re.sub(r'\{\{[^\}]+\}\}', '', line_clean)
-            line_clean = re.sub(r'<[^>]+>', '', line_clean)
-            line_clean = re.sub(r'\s+', ' ', line_clean).strip()
+            line_clean = wline.text
             
-            # 只保留有意义的描述文本
-            if len(line_clean) > 15:
-                # 跳过看起来像路线标题的行
-                if not re.search(r'^\d+[\.\)]?\s*\w+\s+\d+m', line_clean):
-                    description_lines.append(line_clean)
+            # 只保留有意义的描述文本，跳过看起来像路线标题的行
+            if len(line_clean) > 15 and not grammar.ROUTE_HEADLINE.search(line_clean):
+                description_lines.append(line_clean)
+                description_length += len(line_clean) + 1
             
             # 限制描述长度
-            if len(' '.join(description_lines)) > 500:
+            if description_length > 500:
                 break
         
         if description_lines:
             description = ' '.join(description_lines)
-            description = re.sub(r'\s+', ' ', description).strip()
+            description = grammar.collapse_whitespace(description)
             route_data['description'] = description[:500]
-            print(f"      找到描述: {description[:100]}...")
+            logger.debug("      找到描述: %.100s...", description)
         else:
             route_data['description'] = None
         
-        print(f"      完成: {route_name}")
-        
     def _extract_first_ascent(self, text):
         """多种格式提取首攀信息"""
-        patterns = [
-            r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*(?:,\s*[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)*\.?\s*(?:\d{1,2}/\d{1,2}/)?\d{4}\.?)\b',
-            r'([A-Z]\s+[A-Z][a-z]+(?:,\s*[A-Z]\s+[A-Z][a-z]+)*\.\s*(?:\d{1,2}/)?\d{4}\.?)\b',
-            r'(?:FA[:\s]+)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*(?:,\s*[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)*\s+(?:\d{1,2}/\d{1,2}/)?\d{4})',
-            r'(?:First\s+ascent[:\s]+)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*(?:,\s*[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)*[^.]+\d{4}\.?)\b',
-            r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*[^.]+\d{4})\.',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        for pattern in grammar.FIRST_ASCENT_PATTERNS:
+            match = pattern.search(text)
             if match:
                 fa_text = match.group(1).strip()
-                fa_text = re.sub(r'\s+', ' ', fa_text)
+                fa_text = grammar.WHITESPACE.sub(' ', fa_text)
                 return fa_text
         
         return None
@@ -1276,23 +1548,16 @@ class IrishClimbingRobust:
         """提取分段信息"""
         sub_routes = []
         
-        patterns = [
-            r'(\d+)\)\s*(\d+)m\.?\s*(.*?)(?=\s*\d+\)\s*\d+m|$)',
-            r'(\d+)/\s*(\d+)m\.?\s*(.*?)(?=\s*\d+/\s*\d+m|$)',
-            r'Pitch\s*(\d+)[:\-]\s*(\d+)m\.?\s*(.*?)(?=\s*Pitch\s*\d+[:\-]|$)',
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE | re.DOTALL)
-            for match in matches:
+        for pattern in grammar.SUB_ROUTE_PATTERNS:
+            for match in pattern.finditer(text):
                 pitch_num = int(match.group(1))
                 height = int(match.group(2))
                 description = match.group(3).strip()
                 
-                description = re.sub(r'\s+', ' ', description)
+                description = grammar.WHITESPACE.sub(' ', description)
                 
                 technical_grade = None
-                grade_match = re.search(r'\b([A-Z][0-9]?[a-z]?[+-]?|[0-9][abc][+-]?)\b', description)
+                grade_match = grammar.PITCH_GRADE.search(description)
                 if grade_match:
                     technical_grade = grade_match.group(1)
                 
@@ -1325,23 +1590,23 @@ class IrishClimbingRobust:
             if not line:
                 continue
             
-            if re.match(r'^\d+[\)/]', line):
+            if grammar.PITCH_PREFIX.match(line):
                 continue
-            if re.search(r'^\d+m\s+[A-Z]', line):
+            if grammar.HEIGHT_GRADE_START.search(line):
                 continue
             if len(line) < 10:
                 continue
-            if re.search(r'[12]\d{3}\b', line) and re.search(r'[A-Z][a-z]+,', line):
+            if grammar.YEAR_1000S.search(line) and grammar.SURNAME_COMMA.search(line):
                 continue
             
             meaningful_lines.append(line)
         
         if meaningful_lines:
             description = ' '.join(meaningful_lines)
-            description = re.sub(r'\s+', ' ', description).strip()
+            description = grammar.collapse_whitespace(description)
             
-            description = re.sub(r'\s*\*\*.*$', '', description)
-            description = re.sub(r'\s*\[\[.*$', '', description)
+            description = grammar.TRAILING_BOLD.sub('', description)
+            description = grammar.TRAILING_LINK.sub('', description)
             
             return description if len(description) > 15 else None
         
@@ -1349,14 +1614,14 @@ class IrishClimbingRobust:
 
     def parse_pitch_line(self, route_data, line):
         """辅助方法：解析单个分段行"""
-        pitch_match = re.match(r'(\d+)[)/]\.?\s*(\d+)m\.?\s*(.*)', line)
+        pitch_match = grammar.PITCH_LINE.match(line)
         if pitch_match:
             sub_route = {
                 'pitch_number': int(pitch_match.group(1)), 
                 'height': int(pitch_match.group(2)), 
                 'description': self.clean_text(pitch_match.group(3))
             }
-            grade_match = re.search(r'\b([A-Z][0-9]?[a-z]?[+-]?|[0-9][abc][+-]?)\b', sub_route['description'])
+            grade_match = grammar.PITCH_GRADE.search(sub_route['description'])
             if grade_match:
                 sub_route['technical_grade'] = grade_match.group(1)
             
@@ -1366,8 +1631,7 @@ class IrishClimbingRobust:
 
     def clean_text(self, text):
         if not text: return ""
-        cleaned = re.sub(r'\s+', ' ', text)
-        return cleaned.strip()
+        return grammar.collapse_whitespace(text)
 
     def _clean_page_title(self, page_title):
         cleaned = urllib.parse.unquote(page_title)
@@ -1388,93 +1652,476 @@ class IrishClimbingRobust:
         return href.replace('/', '')
 
     def collect_all_data(self):
-        print("开始完整的爱尔兰攀岩数据收集...")
-        all_structure = self.get_all_counties_and_sites_via_scraping()
-        if not all_structure: return {}
+        return {county: dict(county_data, climbing_sites=list(county_data['climbing_sites']))
+                for county, county_data in self.iter_all_data()}
+
+    def iter_all_data(self):
+        """collect_all_data 的流式版本：save_complete_data(iter_all_data(), ...) 内存里只有正在处理的站点"""
+        logger.info("开始完整的爱尔兰攀岩数据收集...")
+        with self.metrics.stage('index_scrape'):
+            all_structure = self.get_all_counties_and_sites_via_scraping()
+        if not all_structure: return
 
-        all_complete_data = {}
         for county, county_data in all_structure.items():
-            print(f"\n处理郡: {county}")
-            all_complete_data[county] = {'county_info': county_data['county_info'], 'climbing_sites': []}
-            
-            for site in county_data['climbing_sites']:
-                print(f"  正在处理: {site['name']}")
-                page_content = self.get_full_page_content_via_api(site['page_title'])
-                routes = self.get_climbing_routes_from_page(page_content)
-
-                site_data = {
-                    'name': site['name'], 'page_title': site['page_title'], 'url': site['url'],
-                    'routes': routes, 'routes_count': len(routes),
-                    'coordinates': page_content.get('coordinates', {'latitude': None, 'longitude': None}),
-                    'climbing_type': page_content.get('crag_type', 'Unknown')
-                }
-                all_complete_data[county]['climbing_sites'].append(site_data)
-                print(f"  {site_data['climbing_type']} | {site_data['coordinates']}")
-                time.sleep(1)
-        return all_complete_data
+            logger.info("处理郡: %s", county)
+            yield county, {
+                'county_info': county_data['county_info'],
+                'climbing_sites': self._iter_sites(county_data['climbing_sites'], county)
+            }
 
     def save_complete_data(self, data, filename='complete_irish_climbing_data.json'):
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"\n完整数据已保存到 {filename}")
+        """
+        流式写出（先写临时文件再替换，.gz / .zst 后缀时压缩）。data 可以是完整的 dict，
+        也可以是 iter_county_data() 这样边抓边产出的郡和站点；save 阶段只算写文件的时间，
+        等待下一个郡 / 站点产出（抓取和解析）的时间已经记在各自的阶段里，这里扣掉
+        """
+        producing = [0.0]
+
+        def timed(iterable):
+            iterator = iter(iterable)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    producing[0] += time.perf_counter() - start
+                yield item
+
+        def streamed(items):
+            for county, county_data in timed(items):
+                yield county, {key: timed(value) if key == 'climbing_sites' else value
+                               for key, value in county_data.items()}
+
+        start = time.perf_counter()
+        written = write_all_data(filename, data if isinstance(data, dict) else streamed(data))
+        self.metrics.record_stage('save', time.perf_counter() - start - producing[0])
+        logger.info("完整数据已保存到 %s (%d 个郡, %d 个站点)", filename, written['counties'], written['sites'])
+        return written
 
     def generate_summary(self, data):
-        total_counties = len(data)
         total_sites = 0; total_routes = 0
         for county, county_data in data.items():
-            total_sites += len(county_data['climbing_sites'])
-            for site in county_data['climbing_sites']:
-                total_routes += len(site['routes'])
-        print(f"\n 最终数据摘要: 郡 {total_counties} | 站点 {total_sites} | 路线 {total_routes}")
+            stats = county_stats(county_data)
+            total_sites += stats['sites_count']
+            total_routes += stats['routes_count']
+            if not stats['routes_count']:
+                logger.info("  %s: 站点 %d | 没有路线", county, stats['sites_count'])
+                continue
+            logger.info("  %s: 站点 %d (有坐标 %d) | 路线 %d | 难度 %s - %s | 最高 %sm | 首攀 %s - %s | 主要风格 %s",
+                        county, stats['sites_count'], stats['sites_with_coordinates'], stats['routes_count'],
+                        stats['grade_min'], stats['grade_max'], stats['height_max'],
+                        stats['fa_year_min'], stats['fa_year_max'], stats['dominant_style'])
+        logger.info("最终数据摘要: 郡 %d | 站点 %d | 路线 %d", len(data), total_sites, total_routes)
 
     def collect_county_data(self, county_keyword: str, max_sites: int = None):
-        print(f"只收集包含关键字 '{county_keyword}' 的郡的数据...")
-        all_structure = self.get_all_counties_and_sites_via_scraping()
-        
-        selected = {}
-        for county, data in all_structure.items():
-            if county_keyword.lower() in county.lower():
-                selected[county] = data
+        return {county: dict(county_data, climbing_sites=list(county_data['climbing_sites']))
+                for county, county_data in self.iter_county_data(county_keyword, max_sites)}
+
+    def iter_county_data(self, county_keyword: str, max_sites: int = None):
+        """
+        按顺序产出 (郡, {'county_info', 'climbing_sites': 站点生成器})，
+        下一个郡要等上一个郡的站点生成器用完才开始抓
+        """
+        logger.info("只收集包含关键字 '%s' 的郡的数据...", county_keyword)
+        with self.metrics.stage('index_scrape'):
+            all_structure = self.get_all_counties_and_sites_via_scraping()
         
-        if not selected:
-            return {}
-
-        all_complete_data = {}
-        for county, county_data in selected.items():
-            print(f"\n处理郡: {county}")
-            all_complete_data[county] = {'county_info': county_data['county_info'], 'climbing_sites': []}
-            
+        for county, county_data in all_structure.items():
+            if county_keyword.lower() not in county.lower():
+                continue
+            logger.info("处理郡: %s", county)
             sites = county_data['climbing_sites']
             if max_sites is not None:
                 sites = sites[:max_sites]
-
+            yield county, {'county_info': county_data['county_info'], 'climbing_sites': self._iter_sites(sites, county)}
+
+    def _collect_sites(self, sites, county=None):
+        """_iter_sites 的结果收成列表"""
+        return list(self._iter_sites(sites, county))
+
+    def _iter_sites(self, sites, county=None):
+        """
+        先批量下载整个郡的 wikitext，再把每个站点的解析 + 坐标查询交给线程池，
+        按 sites 的顺序逐个产出 site_data（可以直接交给 save_complete_data 边抓边写）。
+        workers=1 时就是原来的顺序处理。
+        设置了 self.journal 时，日志里已完成的站点直接取出来，不再下载和解析；
+        新解析完的站点立刻写进日志（页面下载失败的不写，续跑时会重试）
+        """
+        journal = self.journal if county is not None else None
+        done = journal.done_titles(county) if journal else set()
+        pending = [site for site in sites if site['page_title'] not in done]
+        if journal and len(pending) < len(sites):
+            self.metrics.count('journal', 'resumed', len(sites) - len(pending))
+            logger.info("从进度日志恢复 %d 个站点，还剩 %d 个", len(sites) - len(pending), len(pending))
+
+        raw_pages = {}
+        if pending:
+            with self.metrics.stage('fetch_pages'):
+                raw_pages = self._fetch_pages_wikitext([site['page_title'] for site in pending])
+
+        def process(site):
+            # 同一个郡里可能有几个站点指向同一页（例如 Co. Wicklow 里两次出现 Irish_Climbing_Wiki），
+            # 这些站点共用一次下载的结果，所以这里不能 pop
+            raw_page = raw_pages[site['page_title']]
+            site_data = self._process_site(site, raw_page)
+            if journal and 'error' not in raw_page:
+                journal.record_site(county, site_data)
+            return site_data
+
+        executor = None
+        if self.workers > 1 and len(pending) > 1:
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+            fresh = executor.map(process, pending)
+        else:
+            fresh = map(process, pending)
+        try:
             for site in sites:
-                print(f"  正在处理: {site['name']}")
-                page_content = self.get_full_page_content_via_api(site['page_title'])
-                routes = self.get_climbing_routes_from_page(page_content)
-                crag_types = page_content.get('crag_type', ['Inland', 'Trad'])
-                if isinstance(crag_types, list):
-                    climbing_type_str = ', '.join(crag_types)
+                if site['page_title'] in done:
+                    # 日志按页面存，指向同一页的几个站点共用一条记录，名称和链接用站点自己的
+                    yield dict(journal.load_site(county, site['page_title']), name=site['name'], url=site['url'])
                 else:
-                    climbing_type_str = crag_types
-
-                site_data = {
-                    'name': site['name'], 
-                    'page_title': site['page_title'], 
-                    'climbing_type': climbing_type_str,
-                    'url': site['url'],
-                    'routes': routes, 
-                    'routes_count': len(routes),
-                    'coordinates': page_content.get('coordinates', {'latitude': None, 'longitude': None}),
-                }
-                all_complete_data[county]['climbing_sites'].append(site_data)
-                print(f"   {site_data['climbing_type']} | {site_data['coordinates']}")
-                time.sleep(1)
-                
-        return all_complete_data
+                    yield next(fresh)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _process_site(self, site, raw_page):
+        """单个站点：解析路线、获取坐标和类型，返回写入 JSON 的 site_data"""
+        logger.debug("  正在处理: %s", site['name'])
+        if 'error' in raw_page:
+            page_content = raw_page
+        else:
+            page_content = self._build_page_content(raw_page['title'], raw_page['content'])
+
+        with self.metrics.stage('parse_routes'):
+            routes = self.get_climbing_routes_from_page(page_content, self.max_routes_per_site)
+        self.metrics.count('sites', 'error' if 'error' in page_content else 'ok')
+        self.metrics.count('routes', 'parsed', len(routes))
+        crag_types = page_content.get('crag_type', ['Inland', 'Trad'])
+        if isinstance(crag_types, list):
+            climbing_type_str = ', '.join(crag_types)
+        else:
+            climbing_type_str = crag_types
+
+        # 难度在这里统一识别一次，规范写法/排序键/难度段和路线一起保存
+        hint = grade_hint(climbing_type_str)
+        for route in routes:
+            annotate_route(route, hint)
+
+        site_data = {
+            'name': site['name'], 
+            'page_title': site['page_title'], 
+            'climbing_type': climbing_type_str,
+            'url': site['url'],
+            'routes': routes, 
+            'routes_count': len(routes),
+            'coordinates': page_content.get('coordinates', {'latitude': None, 'longitude': None}),
+        }
+        coordinates = site_data['coordinates']
+        log_site_summary(
+            logger,
+            name=site['name'],
+            page_title=site['page_title'],
+            error=page_content.get('error'),
+            climbing_type=climbing_type_str,
+            routes_count=len(routes),
+            routes_with_first_ascent=sum(1 for route in routes if route.get('first_ascent') not in (None, 'Unknown')),
+            routes_with_description=sum(1 for route in routes if route.get('description')),
+            coordinate_source=coordinates.get('source'),
+            estimated=bool(coordinates.get('estimated')),
+        )
+        return site_data
+
+    def reparse_cached_pages(self, data_dir='.', processes=None):
+        """
+        只解析、不联网：从本地页面缓存取出 *_all_data.json 里所有站点的 wikitext，
+        按郡分块交给进程池重新解析，再按原来的郡/站点顺序写回各个 JSON 文件。
+        缓存里没有的站点保持原样。返回 {文件路径: 重新解析的站点数}
+        """
+        if not self.page_cache:
+            logger.warning("没有页面缓存，无法只解析")
+            return {}
+
+        data_by_file = {}
+        chunks = []  # [(文件路径, 郡, 站点列表, {page_title: raw_page})]
+        for path in data_files(data_dir):
+            data_by_file[path] = load_json(path)
+            for county, county_data in data_by_file[path].items():
+                sites = county_data['climbing_sites']
+                raw_pages = {}
+                for site in sites:
+                    clean_title = self._clean_page_title(site['page_title'])
+                    entry = self.page_cache.get(clean_title)
+                    if entry is not None:
+                        raw_pages[site['page_title']] = {'title': clean_title, 'content': entry['content']}
+                self.metrics.count('page_cache', 'hit', len(raw_pages))
+                self.metrics.count('page_cache', 'miss', len(sites) - len(raw_pages))
+                chunks.append((path, county, sites, raw_pages))
+
+        logger.info("只解析模式: %d 个郡, %d/%d 个站点有缓存",
+                    len(chunks), sum(len(c[3]) for c in chunks), sum(len(c[2]) for c in chunks))
+
+        worker_options = {
+            'geocode_cache_path': self.geocode_cache_path,
+            'gazetteer_path': self.gazetteer_path,
+            'max_routes_per_site': self.max_routes_per_site,
+        }
+        level = logging.getLogger('climbing').getEffectiveLevel()
+        with self.metrics.stage('reparse'):
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_parse_worker,
+                                     initargs=(worker_options, level)) as executor:
+                # map 按提交顺序返回，合并结果和进程调度无关
+                results = list(executor.map(_parse_county_chunk, [(sites, raw_pages) for _, _, sites, raw_pages in chunks]))
+
+        reparsed = {}
+        for (path, county, sites, raw_pages), (new_sites, worker_metrics) in zip(chunks, results):
+            data_by_file[path][county]['climbing_sites'] = new_sites
+            self.metrics.merge(worker_metrics)
+            reparsed[path] = reparsed.get(path, 0) + len(raw_pages)
+
+        for path, data in data_by_file.items():
+            if reparsed.get(path):
+                self.save_complete_data(data, path)
+        return reparsed
+
+    def export_app_data(self, data_dir='.', output_dir='.'):
+        """导出阶段：用所有 *_all_data.json（collect_all_data 的格式）生成 App 的站点索引和各郡详情"""
+        if not output_dir:
+            return None
+        with self.metrics.stage('export_app_data'):
+            index = export_app_data(load_county_files(data_dir), output_dir)
+        logger.info("App 数据已导出到 %s (%d 个站点, %d 个郡的详情)",
+                    output_dir, len(index['sites']['name']), len(index['counties']['shard']))
+        return index
+
+    def update_changed_sites(self, data_dir='.', since=None):
+        """
+        增量更新：只重新抓取上次运行之后在 wiki 上修改过的页面，
+        并把结果写回已有的 *_all_data.json（其它站点保持不变）。
+        since: ISO 时间字符串（日期或带时区的时间都可以），不传就读 crawl_state.json 里的上次运行时间
+        """
+        run_started = self._utc_now_iso()
+        since = since or self._load_crawl_state(data_dir)
+        if not since:
+            logger.warning("没有上次抓取的时间记录，请先完整运行一次 collect_all_data")
+            return {}
+        # 后面要和 API 返回的时间戳按字符串比较，先统一格式
+        since = normalize_timestamp(since)
+
+        county_data_by_file = {}
+        known_titles = set()
+        for path in data_files(data_dir):
+            county_data_by_file[path] = load_json(path)
+            for county_data in county_data_by_file[path].values():
+                for site in county_data['climbing_sites']:
+                    known_titles.add(self._normalize_title(site['page_title']))
+
+        logger.info("检查 %s 之后修改过的页面...", since)
+        with self.metrics.stage('recent_changes'):
+            changed = self._get_changed_titles(since, known_titles)
+        logger.info("共 %d 个已知攀岩点页面有修改", len(changed))
+
+        updated = {}
+        for path, data in county_data_by_file.items():
+            for county, county_data in data.items():
+                sites = county_data['climbing_sites']
+                targets = [
+                    (i, site) for i, site in enumerate(sites)
+                    if self._normalize_title(site['page_title']) in changed
+                ]
+                if not targets:
+                    continue
+
+                logger.info("更新郡: %s (%d 个攀岩点)", county, len(targets))
+                if self.page_cache:
+                    for i, site in targets:
+                        self.page_cache.delete(self._clean_page_title(site['page_title']))
+
+                new_sites = self._collect_sites([site for i, site in targets])
+                for (i, old_site), new_site in zip(targets, new_sites):
+                    sites[i] = new_site
+                updated.setdefault(path, []).extend(site['name'] for i, site in targets)
+
+            if path in updated:
+                self.save_complete_data(data, path)
+
+        self._save_crawl_state(data_dir, run_started)
+        return updated
+
+    def _get_changed_titles(self, since, known_titles):
+        """返回 since 之后修改过、并且在已有数据里的页面标题（规范化后）"""
+        since_dt = datetime.strptime(since, API_TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+        if datetime.now(timezone.utc) - since_dt < timedelta(days=RECENTCHANGES_MAX_AGE_DAYS):
+            try:
+                return self._fetch_recent_changes(since) & known_titles
+            except Exception as e:
+                logger.warning("  recentchanges 查询失败，改用 revision 时间戳: %s", e)
+
+        return self._fetch_titles_revised_since(sorted(known_titles), since)
+
+    def _fetch_recent_changes(self, since):
+        """list=recentchanges：一两次请求拿到 since 之后所有被编辑/新建的主命名空间页面"""
+        titles = set()
+        params = {
+            'action': 'query',
+            'list': 'recentchanges',
+            'rcend': since,
+            'rcdir': 'older',
+            'rcnamespace': 0,
+            'rctype': 'edit|new',
+            'rcprop': 'title|timestamp|ids',
+            'rclimit': 500,
+            'format': 'json'
+        }
+        while True:
+            response = self._http_get(self.api_url, params=params, timeout=30)
+            data = response.json()
+            for change in data.get('query', {}).get('recentchanges', []):
+                titles.add(self._normalize_title(change['title']))
+            if 'continue' not in data:
+                return titles
+            params.update(data['continue'])
+
+    def _fetch_titles_revised_since(self, titles, since):
+        """
+        prop=revisions&rvprop=ids|timestamp：逐批比较每个页面最新修订的时间。
+        某一批查询失败时，这一批全部当作有修改（重新完整抓取），不让整个增量更新中断
+        """
+        changed = set()
+        for start in range(0, len(titles), 50):
+            batch = titles[start:start + 50]
+            params = {
+                'action': 'query',
+                'prop': 'revisions',
+                'titles': '|'.join(batch),
+                'rvprop': 'ids|timestamp',
+                'format': 'json'
+            }
+            try:
+                response = self._http_get(self.api_url, params=params, timeout=30)
+                pages = response.json().get('query', {}).get('pages', {})
+            except Exception as e:
+                logger.warning("  修订时间查询失败，%d 个页面直接重新抓取: %s", len(batch), e)
+                self.metrics.count('incremental', 'revision_check_failed', len(batch))
+                changed.update(batch)
+                continue
+            for page_id, page_data in pages.items():
+                revisions = page_data.get('revisions')
+                # ISO 8601 的 UTC 时间可以直接按字符串比较
+                if revisions and revisions[0]['timestamp'] > since:
+                    changed.add(self._normalize_title(page_data['title']))
+        return changed
+
+    def _normalize_title(self, page_title):
+        """统一成 MediaWiki 的规范标题：解码、下划线转空格、首字母大写"""
+        title = self._clean_page_title(page_title).replace('_', ' ').strip()
+        return title[:1].upper() + title[1:]
+
+    def _utc_now_iso(self):
+        return datetime.now(timezone.utc).strftime(API_TIMESTAMP_FORMAT)
+
+    def _load_crawl_state(self, data_dir):
+        path = os.path.join(data_dir, CRAWL_STATE_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f).get('last_crawl')
+
+    def _save_crawl_state(self, data_dir, timestamp):
+        # 先写临时文件再替换，中途崩溃时保留上一次的记录
+        with atomic_open(os.path.join(data_dir, CRAWL_STATE_FILE)) as f:
+            json.dump({'last_crawl': timestamp}, f, indent=2)
+
+# ---------- 只解析模式的进程池 worker（必须是模块级函数才能被 pickle）----------
+_parse_worker = None
+
+
+def _init_parse_worker(options, log_level):
+    global _parse_worker
+    setup_logging(verbosity=1 if log_level <= logging.DEBUG else 0, quiet=log_level >= logging.WARNING)
+    _parse_worker = IrishClimbingRobust(cache_path=None, offline=True, **options)
+
+
+def _parse_county_chunk(chunk):
+    """解析一个郡：有缓存的站点重新解析，没有的原样返回；同时返回这一块的指标"""
+    sites, raw_pages = chunk
+    metrics = CrawlMetrics()
+    _parse_worker.metrics = metrics
+    _parse_worker.geocoder.metrics = metrics
+
+    new_sites = []
+    for site in sites:
+        raw_page = raw_pages.get(site['page_title'])
+        if raw_page is None:
+            new_sites.append(site)
+            continue
+        new_sites.append(_parse_worker._process_site(site, raw_page))
+    return new_sites, metrics.report()
+
 
 if __name__ == "__main__":
-    collector = IrishClimbingRobust()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--incremental', action='store_true', help='只更新上次运行后修改过的页面')
+    parser.add_argument('--since', type=_since_argument,
+                        help='增量更新的起始时间 (例如 2024-01-01 或 2024-01-01T00:00:00Z，不写时区按 UTC)')
+    parser.add_argument('--max-routes', type=int, default=None, help='每个岩场最多保留的路线数（默认全部）')
+    parser.add_argument('--workers', type=int, default=4, help='同时解析 / 查坐标的线程数（1 表示顺序处理）')
+    parser.add_argument('--rate', type=float, default=4.0,
+                        help='所有域名合计每秒最多发多少个请求（每个域名另有自己的礼貌限速）')
+    parser.add_argument('-v', '--verbose', action='count', default=0, help='输出逐行解析细节')
+    parser.add_argument('-q', '--quiet', action='store_true', help='只输出警告和错误')
+    parser.add_argument('--log-file', help='日志写到文件而不是终端')
+    parser.add_argument('--summary-file', help='每个站点的结构化摘要写到这个 JSON Lines 文件')
+    parser.add_argument('--metrics-file', default='crawl_metrics.json', help='运行结束时写出的指标报告')
+    parser.add_argument('--reparse', action='store_true', help='只用本地缓存重新解析所有郡，不联网')
+    parser.add_argument('--processes', type=int, default=None, help='--reparse 使用的进程数（默认 CPU 核数）')
+    parser.add_argument('--gazetteer', help='离线地名表 (JSON 或 CSV)，查坐标时先查它再查 Nominatim')
+    parser.add_argument('--geocode-backup', action='store_true',
+                        help='只给已有数据里用备用坐标的站点重新查坐标（所有郡去重后批量查询），不抓取页面')
+    parser.add_argument('--resume', action='store_true', help='接着上次中断的完整抓取：跳过已保存的郡和进度日志里已完成的站点')
+    parser.add_argument('--journal', default='crawl_journal.sqlite', help='完整抓取的进度日志')
+    parser.add_argument('--compress', choices=['gz', 'zst'], help='完整抓取时郡数据文件压缩保存 (*_all_data.json.gz / .zst)')
+    parser.add_argument('--app-data-dir', default='.', help='运行结束后把 App 的站点索引和详情导出到这里（空字符串表示不导出）')
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error('--workers 至少是 1')
+    if args.rate <= 0:
+        parser.error('--rate 必须大于 0')
+
+    setup_logging(args.verbose, args.quiet, args.log_file, args.summary_file)
+
+    collector = IrishClimbingRobust(workers=args.workers, global_rate=args.rate,
+                                    max_routes_per_site=args.max_routes, gazetteer_path=args.gazetteer)
+
+    if args.geocode_backup:
+        collector.geocode_backup_sites('.')
+        collector.export_app_data('.', args.app_data_dir)
+        collector.metrics.write_report(args.metrics_file)
+        raise SystemExit(0)
+
+    if args.reparse:
+        collector.reparse_cached_pages('.', processes=args.processes)
+        collector.export_app_data('.', args.app_data_dir)
+        collector.metrics.write_report(args.metrics_file)
+        raise SystemExit(0)
+
+    if args.incremental:
+        collector.update_changed_sites('.', since=args.since)
+        collector.export_app_data('.', args.app_data_dir)
+        collector.metrics.write_report(args.metrics_file)
+        raise SystemExit(0)
+
+    journal = CrawlJournal(args.journal)
+    if args.resume:
+        logger.info("续跑: 进度日志里已有 %(sites)d 个站点、%(saved_files)d 个已保存的郡", journal.counts())
+    else:
+        journal.clear()
+    collector.journal = journal
+    # 续跑时沿用第一次开始的时间，中断期间修改的页面下次增量更新还能查到
+    run_started = journal.get_meta('run_started') or collector._utc_now_iso()
+    journal.set_meta('run_started', run_started)
 
     counties_list = ["Antrim", "Armagh", "Carlow", "Cavan", "Clare", "Cork", "Derry", 
                     "Donegal", "Down", "Dublin", "Fermanagh", "Galway", "Kerry", 
@@ -1484,14 +2131,30 @@ if __name__ == "__main__":
                     "Wexford", "Wicklow"]
 
     for county in counties_list:
-        print(f"\n处理郡: {county}")
-        county_data = collector.collect_county_data(county, max_sites=None)
-        
-        if county_data:
-            collector.save_complete_data(county_data, f'{county.lower()}_all_data.json')
-            collector.generate_summary(county_data)
-            print(f"{county} 数据保存成功")
+        if args.resume and journal.is_saved(county):
+            logger.info("%s 已在上次运行中保存，跳过", county)
+            continue
+
+        # 边抓边写：内存里只有正在处理的站点，文件写完才替换旧文件
+        county_iter = collector.iter_county_data(county, max_sites=None)
+        first = next(county_iter, None)
+        
+        if first is not None:
+            filename = f'{county.lower()}_all_data.json' + (f'.{args.compress}' if args.compress else '')
+            collector.save_complete_data(chain([first], county_iter), filename)
+            for stale in other_variants(filename):
+                os.remove(stale)
+            journal.mark_saved(county)
+            collector.generate_summary(load_json(filename))
+            logger.info("%s 数据保存成功", county)
         else:
-            print(f"未找到 {county} 郡的数据")
+            logger.warning("未找到 %s 郡的数据", county)
         
-        time.sleep(1.5)
\ No newline at end of file
+        time.sleep(1.5)
+
+    collector._save_crawl_state('.', run_started)
+    journal.close()
+    collector.journal = None
+    collector.export_app_data('.', args.app_data_dir)
+    collector.metrics.write_report(args.metrics_file)
+    logger.info("运行指标已保存到 %s", args.metrics_file)
\ No newline at end of file
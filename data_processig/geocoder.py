@@ -0,0 +1,222 @@
+import csv
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from crawl_logging import get_logger
+
+logger = get_logger('geocoder')
+
+
+def normalize_query(query):
+    """缓存键：下划线转空格、去掉多余空白、忽略大小写"""
+    if not query:
+        return ""
+    return re.sub(r'\s+', ' ', query.replace('_', ' ')).strip().lower()
+
+
+class GeocodeCache:
+    """
+    地名 -> 坐标 的本地缓存（SQLite）。
+    找不到的查询也会记录（负缓存），negative_ttl 秒内不再重复请求
+    """
+
+    def __init__(self, path='geocode_cache.sqlite', negative_ttl=30 * 24 * 3600):
+        self.negative_ttl = negative_ttl
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            '''CREATE TABLE IF NOT EXISTS geocodes (
+                query TEXT PRIMARY KEY,
+                latitude REAL,
+                longitude REAL,
+                backend TEXT,
+                fetched_at REAL NOT NULL
+            )'''
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        """
+        命中返回 (True, coords 或 None)；没有缓存或负缓存已过期返回 (False, None)
+        """
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT latitude, longitude, backend, fetched_at FROM geocodes WHERE query = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return False, None
+
+        latitude, longitude, backend, fetched_at = row
+        if latitude is None:
+            if self.negative_ttl is not None and time.time() - fetched_at >= self.negative_ttl:
+                return False, None
+            return True, None
+        return True, {"latitude": latitude, "longitude": longitude, "backend": backend}
+
+    def put(self, key, coords, backend=None):
+        latitude = coords["latitude"] if coords else None
+        longitude = coords["longitude"] if coords else None
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO geocodes (query, latitude, longitude, backend, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, latitude, longitude, backend, time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class GazetteerBackend:
+    """
+    离线地名表：JSON ({"名称": {"latitude", "longitude"}}) 或
+    CSV (name,latitude,longitude 三列，带表头)
+    """
+    name = 'gazetteer'
+
+    def __init__(self, path):
+        self.places = {}
+        if path.lower().endswith('.csv'):
+            with open(path, encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    self.places[normalize_query(row['name'])] = {
+                        "latitude": float(row['latitude']),
+                        "longitude": float(row['longitude'])
+                    }
+        else:
+            with open(path, encoding='utf-8') as f:
+                for name, coords in json.load(f).items():
+                    self.places[normalize_query(name)] = {
+                        "latitude": float(coords['latitude']),
+                        "longitude": float(coords['longitude'])
+                    }
+
+    def lookup(self, query):
+        coords = self.places.get(normalize_query(query))
+        return dict(coords) if coords else None
+
+
+class NominatimBackend:
+    """OpenStreetMap Nominatim；http_get 由调用方提供（负责限速）"""
+    name = 'nominatim'
+    url = "https://nominatim.openstreetmap.org/search"
+
+    def __init__(self, http_get):
+        self.http_get = http_get
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+
+    def lookup(self, query):
+        clean_query = query.replace('_', ' ').strip()
+
+        # 先尝试直接搜索，优先选择在爱尔兰的结果
+        params = {
+            'q': f"{clean_query}, Ireland",
+            'format': 'json',
+            'limit': 5,
+            'addressdetails': 1
+        }
+        data = self._search(params)
+        if data:
+            for result in data:
+                display_name = str(result.get('display_name', '')).lower()
+                if any(word in display_name for word in ['ireland', 'irish', 'co.']):
+                    logger.debug("      找到精确坐标: %.60s...", display_name)
+                    return self._to_coords(result)
+
+            # 如果没有在爱尔兰的，至少返回第一个结果
+            logger.debug("     找到坐标（可能不在爱尔兰）: %s", clean_query)
+            return self._to_coords(data[0])
+
+        # 备用：加上 climbing 关键词再搜一次
+        if 'climbing' not in clean_query.lower():
+            data = self._search({'q': f"{clean_query} climbing, Ireland", 'format': 'json', 'limit': 1})
+            if data:
+                logger.debug("     通过climbing关键词找到坐标: %s", clean_query)
+                return self._to_coords(data[0])
+
+        return None
+
+    def _search(self, params):
+        response = self.http_get(self.url, use_session=False, params=params, headers=self.headers, timeout=10)
+        if response.status_code != 200:
+            # 被拒绝/限流不代表地名不存在，抛出去避免写入负缓存
+            raise RuntimeError(f"OSM 拒绝访问 (代码 {response.status_code})")
+        return response.json()
+
+    def _to_coords(self, result):
+        return {"latitude": float(result['lat']), "longitude": float(result['lon'])}
+
+
+class Geocoder:
+    """
+    按顺序尝试多个后端（例如先离线地名表，再 Nominatim），结果写入缓存。
+    geocode_many 会先去重，同一个地名无论出现在多少个郡里都只查一次。
+    cache_negative=False 时找不到的结果不写缓存（例如离线运行时没有查过 Nominatim）
+    """
+
+    def __init__(self, backends, cache=None, metrics=None, cache_negative=True):
+        self.backends = list(backends)
+        self.cache = cache
+        self.metrics = metrics
+        self.cache_negative = cache_negative
+        self._key_locks = {}
+        self._key_locks_lock = threading.Lock()
+
+    def geocode(self, query, retry_not_found=False):
+        """retry_not_found=True 时负缓存不算命中，重新问一遍后端（例如加了新的地名表之后）"""
+        key = normalize_query(query)
+        if not key:
+            return None
+
+        # 同一个地名同时只允许一个线程去查，其它线程等它写完缓存
+        with self._key_locks_lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            if self.cache:
+                hit, coords = self.cache.get(key)
+                if hit and coords is None and retry_not_found:
+                    hit = False
+                if self.metrics:
+                    self.metrics.count('geocode_cache', 'hit' if hit else 'miss')
+                if hit:
+                    return coords
+
+            coords, backend_name = None, None
+            errored = False
+            for backend in self.backends:
+                try:
+                    coords = backend.lookup(query)
+                except Exception as e:
+                    logger.warning("     %s 查询 '%s' 出错: %s", backend.name, query, e)
+                    coords = None
+                    errored = True
+                    continue
+                if coords:
+                    backend_name = backend.name
+                    coords["backend"] = backend_name
+                    break
+
+            if self.metrics:
+                self.metrics.count('geocode_backend', backend_name or ('error' if errored else 'not_found'))
+
+            # 出错不等于"没找到"，这种情况不写负缓存，下次还会重试
+            if self.cache and (coords or (self.cache_negative and not errored)):
+                self.cache.put(key, coords, backend_name)
+            return coords
+
+    def geocode_many(self, queries, retry_not_found=False):
+        """批量查询：返回 {原始查询: coords 或 None}，重复的查询（规范化后相同）只请求一次"""
+        unique = {}
+        for query in queries:
+            unique.setdefault(normalize_query(query), query)
+
+        found = {key: self.geocode(query, retry_not_found) for key, query in unique.items() if key}
+        return {query: found.get(normalize_query(query)) for query in queries}
@@ -0,0 +1,200 @@
+"""
+攀岩难度的统一模型：抓取时把 difficulty / overall_grade / technical_grade 里的原始字符串
+识别一次，和路线一起存下规范写法、难度体系、排序键和跨体系难度段：
+
+- grade        规范写法：'HVS 5a'、'E1'、'5a'、'f6a+'、'Font 6A'、'A2'
+- grade_system 'uk_trad' (M…E11，可带技术难度) / 'uk_tech' (1a…7b) / 'french' / 'font' / 'aid'
+- grade_band   跨体系的难度段：换算成大致相当的法式运动攀难度在 FRENCH 里的下标；
+               App 的难度筛选可以直接做整数范围比较
+- grade_sort   排序键：先按难度段，再按体系、体系内的顺序（传统难度再按技术难度）
+
+换算表只是常见的经验对照，用来排序和筛选，不代表精确等价。
+
+    python grades.py                       # 给当前目录下所有 *_all_data.json 的路线补上这些字段
+"""
+import argparse
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from json_stream import data_files, load_json, write_all_data
+
+# 法式运动攀难度，下标就是跨体系难度段
+FRENCH = ('1', '2', '3', '4a', '4b', '4c', '5a', '5b', '5c',
+          '6a', '6a+', '6b', '6b+', '6c', '6c+', '7a', '7a+', '7b', '7b+', '7c', '7c+',
+          '8a', '8a+', '8b', '8b+', '8c', '8c+', '9a', '9a+', '9b', '9b+', '9c')
+FRENCH_BAND = {g: i for i, g in enumerate(FRENCH)}
+FRENCH_ALIASES = {'4': '4a', '4+': '4c', '5': '5a', '5+': '5c', '3+': '3'}
+
+# 英式传统攀形容词难度 (由易到难) -> 难度段
+UK_TRAD = (
+    ('M', 1), ('D', 2), ('VD', 3), ('HVD', 4), ('MS', 4), ('S', 5), ('HS', 6), ('MVS', 6),
+    ('VS', 7), ('HVS', 8), ('E1', 10), ('E2', 11), ('E3', 13), ('E4', 15), ('E5', 17),
+    ('E6', 19), ('E7', 21), ('E8', 23), ('E9', 25), ('E10', 27), ('E11', 28),
+)
+UK_TRAD_ALIASES = {'MOD': 'M', 'DIFF': 'D', 'VDIFF': 'VD', 'V.DIFF': 'VD', 'HVDIFF': 'HVD', 'SEV': 'S'}
+
+# 英式技术难度 (单个动作的难度) -> 难度段
+UK_TECH = (
+    ('1a', 0), ('1b', 0), ('1c', 0), ('2a', 1), ('2b', 1), ('2c', 1), ('3a', 2), ('3b', 2), ('3c', 2),
+    ('4a', 4), ('4b', 5), ('4c', 6), ('5a', 7), ('5b', 9), ('5c', 11), ('6a', 13), ('6b', 16),
+    ('6c', 19), ('7a', 22), ('7b', 25), ('7c', 28),
+)
+
+# Font 抱石难度 -> 难度段（抱石同样的数字比运动攀难一到两级）
+FONT = (
+    ('3', 2), ('4', 4), ('4+', 5), ('5', 6), ('5+', 8), ('6A', 10), ('6A+', 11), ('6B', 12),
+    ('6B+', 13), ('6C', 14), ('6C+', 15), ('7A', 17), ('7A+', 18), ('7B', 19), ('7B+', 20),
+    ('7C', 21), ('7C+', 22), ('8A', 24), ('8A+', 25), ('8B', 26), ('8B+', 27), ('8C', 28),
+    ('8C+', 29), ('9A', 31),
+)
+
+SYSTEMS = ('uk_trad', 'uk_tech', 'french', 'font', 'aid')
+
+_TRAD_POS = {name: i for i, (name, _) in enumerate(UK_TRAD)}
+_TRAD_BAND = dict(UK_TRAD)
+_TECH_POS = {name: i for i, (name, _) in enumerate(UK_TECH)}
+_TECH_BAND = dict(UK_TECH)
+_FONT_POS = {name: i for i, (name, _) in enumerate(FONT)}
+_FONT_BAND = dict(FONT)
+
+_TRAD = re.compile(r'(E1[01]|E[1-9]|[A-Z.]+)(?:/[0-9]+)?(?:\s+([1-7][abc]))?', re.IGNORECASE)
+_TECH = re.compile(r'[1-7][abc]', re.IGNORECASE)
+_FRENCH = re.compile(r'F\s*([1-9](?:[abc]\+?|\+)?)', re.IGNORECASE)
+_FONT = re.compile(r'(?:FONT|FB|F\.B\.)\s*([3-9](?:[abc]\+?|\+)?)', re.IGNORECASE)
+_BARE_PLUS = re.compile(r'[3-9](?:[abc])?\+', re.IGNORECASE)
+_AID = re.compile(r'A[0-5]\+?', re.IGNORECASE)
+
+
+class Grade(NamedTuple):
+    system: str
+    canonical: str
+    band: Optional[int]
+    sort_key: Optional[int]
+
+
+def _sort_key(band, system, position, technical=0):
+    if band is None:
+        return None
+    return band * 10000 + SYSTEMS.index(system) * 1000 + position * 20 + technical
+
+
+def _trad(name, technical=None):
+    tech_pos = _TECH_POS[technical] + 1 if technical else 0
+    band = _TRAD_BAND[name]
+    canonical = f"{name} {technical}" if technical else name
+    return Grade('uk_trad', canonical, band, _sort_key(band, 'uk_trad', _TRAD_POS[name], tech_pos))
+
+
+def _tech(name):
+    band = _TECH_BAND.get(name)
+    if band is None:
+        return None
+    return Grade('uk_tech', name, band, _sort_key(band, 'uk_tech', _TECH_POS[name]))
+
+
+def _french(name):
+    base = FRENCH_ALIASES.get(name, name)
+    band = FRENCH_BAND.get(base)
+    if band is None:
+        return None
+    return Grade('french', 'f' + name, band, _sort_key(band, 'french', band))
+
+
+def _font(name):
+    band = _FONT_BAND.get(name)
+    if band is None:
+        return None
+    return Grade('font', 'Font ' + name, band, _sort_key(band, 'font', _FONT_POS[name]))
+
+
+@lru_cache(maxsize=None)
+def parse_grade(text, hint=None):
+    """
+    原始难度字符串 -> Grade，认不出来时返回 None。
+    没有前缀的 '6a' 这类写法默认按英式技术难度；hint='font' / 'french' 时按抱石 / 运动攀理解
+    """
+    if not text:
+        return None
+    t = ' '.join(text.strip().strip('()').split())
+    if not t:
+        return None
+
+    m = _FONT.fullmatch(t)
+    if m:
+        return _font(m.group(1).upper())
+
+    m = _TRAD.fullmatch(t)
+    if m:
+        name = m.group(1).upper()
+        name = UK_TRAD_ALIASES.get(name, name)
+        if name in _TRAD_BAND:
+            return _trad(name, m.group(2).lower() if m.group(2) else None)
+
+    if _TECH.fullmatch(t) or _BARE_PLUS.fullmatch(t):
+        if hint == 'font':
+            grade = _font(t.upper())
+            if grade is not None:
+                return grade
+        if hint == 'french' or _BARE_PLUS.fullmatch(t):
+            return _french(t.lower())
+        return _tech(t.lower())
+
+    m = _FRENCH.fullmatch(t)
+    if m:
+        return _french(m.group(1).lower())
+
+    if _AID.fullmatch(t):
+        return Grade('aid', t.upper().rstrip('+'), None, None)
+    return None
+
+
+def grade_of_route(route, hint=None):
+    """按 overall_grade + technical_grade（没有时用 difficulty）识别一条路线的难度"""
+    overall = route.get('overall_grade') or route.get('difficulty')
+    grade = parse_grade(overall, hint)
+    technical = route.get('technical_grade')
+    if grade is not None and grade.system == 'uk_trad' and technical and ' ' not in grade.canonical:
+        tech = parse_grade(technical)
+        if tech is not None and tech.system == 'uk_tech':
+            grade = _trad(grade.canonical, tech.canonical)
+    return grade
+
+
+def grade_hint(climbing_type):
+    """抱石场地上不带前缀的 '6A' 按 Font 难度理解"""
+    return 'font' if 'boulder' in (climbing_type or '').lower() else None
+
+
+def annotate_route(route, hint=None):
+    """把识别结果存进路线 dict（认不出来时这几个字段为 None），返回 route"""
+    grade = grade_of_route(route, hint)
+    route['grade'] = grade.canonical if grade else None
+    route['grade_system'] = grade.system if grade else None
+    route['grade_band'] = grade.band if grade else None
+    route['grade_sort'] = grade.sort_key if grade else None
+    return route
+
+
+def annotate_data(all_data):
+    """给 {郡: {'climbing_sites': [...]}} 里的所有路线补上难度字段，返回补了多少条"""
+    count = 0
+    for county_data in all_data.values():
+        for site in county_data['climbing_sites']:
+            hint = grade_hint(site.get('climbing_type'))
+            for route in site.get('routes', []):
+                annotate_route(route, hint)
+                count += 1
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='给已有的 *_all_data.json 补上统一的难度字段')
+    parser.add_argument('--data-dir', default='.')
+    args = parser.parse_args()
+
+    for path in data_files(args.data_dir):
+        data = load_json(path)
+        n = annotate_data(data)
+        write_all_data(path, data)
+        print(f"{path}: {n} 条路线")
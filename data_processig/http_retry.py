@@ -0,0 +1,119 @@
+"""
+网络请求的重试和熔断：
+
+- RetryPolicy：指数退避 + 全抖动（0 ~ base * 2^n 之间随机），服务器给了 Retry-After 时按它等
+- 429 / 5xx、连接错误和超时会重试；MediaWiki 的 maxlag 错误（数据库复制延迟）也按 Retry-After 重试
+- CircuitBreaker：每个域名一个，连续失败到阈值就"断开"，冷却期内的请求直接抛 CircuitOpenError，
+  不再去打已经出问题的服务器；冷却后放一个试探请求过去，成功就恢复
+"""
+import email.utils
+import random
+import threading
+import time
+
+import requests
+
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+MAXLAG = 5                 # 发给 MediaWiki API 的 maxlag（秒），从库延迟超过这个值时服务器让我们等一等
+MAXLAG_DEFAULT_WAIT = 5.0  # maxlag 错误没带 Retry-After 时等多久
+
+
+class CircuitOpenError(Exception):
+    """域名的熔断器处于断开状态，请求没有发出去"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host} 暂时熔断，{retry_in:.0f} 秒后再试")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class RetryPolicy:
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        """第 attempt 次（从 0 开始）失败后等多久；Retry-After 优先，但不超过 max_delay"""
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """closed（正常）-> 连续失败 failure_threshold 次 -> open（拒绝请求）-> reset_timeout 秒后 half_open（放一个试探请求）"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def retry_in(self):
+        """还要多久才能再发请求（0 表示现在就可以）"""
+        with self.lock:
+            if self.state != 'open':
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self):
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self.probing = False
+            if self.state == 'half_open' and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = 'closed'
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        """返回 True 表示这次失败让熔断器断开了"""
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self.probing = False
+                return True
+            return False
+
+
+def parse_retry_after(value):
+    """Retry-After 可以是秒数，也可以是 HTTP 日期；认不出来返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def is_maxlag(response):
+    """
+    MediaWiki 在从库延迟超过 maxlag 时返回 {'error': {'code': 'maxlag'}}（状态码 200 或 503），
+    并带上 X-Database-Lag 头；没有这个头的响应不用解析正文
+    """
+    if 'X-Database-Lag' not in response.headers:
+        return False
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    return isinstance(data, dict) and (data.get('error') or {}).get('code') == 'maxlag'
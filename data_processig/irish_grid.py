@@ -0,0 +1,211 @@
+"""
+Irish Grid (TM75) / ITM 坐标本地转换为 WGS84 经纬度，不需要任何网络请求。
+
+- Irish Grid: Airy Modified 椭球 + 横轴墨卡托投影，再用 7 参数 Helmert 转到 WGS84
+  (精度大约几米，足够地图上放标记)
+- ITM: GRS80 椭球，ETRS89 和 WGS84 在这里可以视为相同，不需要基准转换
+- gridrefs_to_wgs84 可以一次转换成千上万个 Grid Ref；装了 numpy 时按数组向量化计算
+"""
+import math
+import re
+from types import SimpleNamespace
+
+try:
+    import numpy as np
+except ImportError:  # numpy 是可选的，没有时逐个计算
+    np = None
+
+
+# 25 个 100km 方格，字母表去掉 I，从西北角 A 开始按行排列，V 在西南角 (0, 0)
+GRID_LETTERS = 'ABCDEFGHJKLMNOPQRSTUVWXYZ'
+
+GRID_REF_PATTERN = re.compile(r'^([A-HJ-Z])\s*(\d+)\s*(\d*)$')
+
+# 投影参数: 椭球长半轴 a、短半轴 b、中央经线比例因子、原点纬度/经度、假东/假北
+IRISH_GRID = SimpleNamespace(
+    a=6377340.189, b=6356034.447, f0=1.000035,
+    lat0=math.radians(53.5), lon0=math.radians(-8.0),
+    e0=200000.0, n0=250000.0,
+)
+ITM = SimpleNamespace(
+    a=6378137.0, b=6356752.314140, f0=0.99982,
+    lat0=math.radians(53.5), lon0=math.radians(-8.0),
+    e0=600000.0, n0=750000.0,
+)
+WGS84 = SimpleNamespace(a=6378137.0, b=6356752.314245)
+
+# Ireland 1965 -> WGS84 的 Helmert 参数 (米 / 角秒 / ppm)
+TM75_TO_WGS84 = SimpleNamespace(
+    tx=482.530, ty=-130.596, tz=564.557,
+    rx=-1.042, ry=-0.214, rz=-0.631, s=8.150,
+)
+
+_ARCSEC = math.pi / (180 * 3600)
+
+_MATH = SimpleNamespace(sin=math.sin, cos=math.cos, tan=math.tan, sqrt=math.sqrt,
+                        atan2=math.atan2, degrees=math.degrees)
+_NUMPY = SimpleNamespace(sin=np.sin, cos=np.cos, tan=np.tan, sqrt=np.sqrt,
+                         atan2=np.arctan2, degrees=np.degrees) if np is not None else None
+
+
+def parse_gridref(grid_ref):
+    """
+    'O 159 344' / 'O159344' / 'H12345678' -> (easting, northing)，单位米，取方格中心。
+    支持 4/6/8/10 位数字；不是爱尔兰网格的返回 None
+    """
+    if not grid_ref:
+        return None
+
+    m = GRID_REF_PATTERN.match(grid_ref.strip().upper())
+    if not m:
+        return None
+
+    letter = m.group(1)
+    digits = m.group(2) + m.group(3)
+    if len(digits) not in (4, 6, 8, 10):
+        return None
+
+    index = GRID_LETTERS.index(letter)
+    square_e = (index % 5) * 100000
+    square_n = (4 - index // 5) * 100000
+
+    half = len(digits) // 2
+    precision = 10 ** (5 - half)  # 4 位 -> 1km, 6 位 -> 100m, 8 位 -> 10m, 10 位 -> 1m
+    easting = square_e + int(digits[:half]) * precision + precision / 2
+    northing = square_n + int(digits[half:]) * precision + precision / 2
+    return easting, northing
+
+
+def gridref_to_wgs84(grid_ref):
+    """单个 Irish Grid Ref 转经纬度，返回 {"latitude", "longitude"} 或 None"""
+    en = parse_gridref(grid_ref)
+    if en is None:
+        return None
+    return irish_grid_to_wgs84(*en)
+
+
+def irish_grid_to_wgs84(easting, northing):
+    lat, lon = _grid_to_wgs84(easting, northing, IRISH_GRID, TM75_TO_WGS84, _MATH)
+    return {"latitude": round(lat, 6), "longitude": round(lon, 6)}
+
+
+def itm_to_wgs84(easting, northing):
+    lat, lon = _grid_to_wgs84(easting, northing, ITM, None, _MATH)
+    return {"latitude": round(lat, 6), "longitude": round(lon, 6)}
+
+
+def gridrefs_to_wgs84(grid_refs):
+    """
+    批量转换：返回和输入等长的列表，无法解析的位置为 None。
+    有 numpy 时所有有效的 Grid Ref 一次性按数组计算
+    """
+    parsed = [parse_gridref(ref) for ref in grid_refs]
+    valid = [i for i, en in enumerate(parsed) if en is not None]
+    results = [None] * len(parsed)
+    if not valid:
+        return results
+
+    if _NUMPY is None:
+        for i in valid:
+            results[i] = irish_grid_to_wgs84(*parsed[i])
+        return results
+
+    eastings = np.array([parsed[i][0] for i in valid], dtype=float)
+    northings = np.array([parsed[i][1] for i in valid], dtype=float)
+    lats, lons = _grid_to_wgs84(eastings, northings, IRISH_GRID, TM75_TO_WGS84, _NUMPY)
+    for i, lat, lon in zip(valid, lats.tolist(), lons.tolist()):
+        results[i] = {"latitude": round(lat, 6), "longitude": round(lon, 6)}
+    return results
+
+
+def _grid_to_wgs84(easting, northing, proj, helmert, xp):
+    """投影坐标 -> 本地椭球经纬度 -> (可选 Helmert) -> WGS84 经纬度(度)；xp 为 math 或 numpy"""
+    lat, lon = _tm_inverse(easting, northing, proj, xp)
+    if helmert is None:
+        return xp.degrees(lat), xp.degrees(lon)
+
+    x, y, z = _geodetic_to_cartesian(lat, lon, proj, xp)
+    x, y, z = _helmert(x, y, z, helmert)
+    lat, lon = _cartesian_to_geodetic(x, y, z, WGS84, xp)
+    return xp.degrees(lat), xp.degrees(lon)
+
+
+def _tm_inverse(easting, northing, proj, xp):
+    """横轴墨卡托反算 (OS 'A guide to coordinate systems in Great Britain' 附录 C)"""
+    a, b, f0 = proj.a, proj.b, proj.f0
+    lat0, lon0 = proj.lat0, proj.lon0
+    e2 = 1 - (b * b) / (a * a)
+    n = (a - b) / (a + b)
+    n2, n3 = n * n, n * n * n
+
+    lat = (northing - proj.n0) / (a * f0) + lat0
+    # 迭代求底点纬度，固定次数方便向量化（4 次后误差已远小于 1mm）
+    for _ in range(6):
+        d_lat = lat - lat0
+        s_lat = lat + lat0
+        m = b * f0 * (
+            (1 + n + 1.25 * n2 + 1.25 * n3) * d_lat
+            - (3 * n + 3 * n2 + 2.625 * n3) * xp.sin(d_lat) * xp.cos(s_lat)
+            + (1.875 * n2 + 1.875 * n3) * xp.sin(2 * d_lat) * xp.cos(2 * s_lat)
+            - (35 / 24) * n3 * xp.sin(3 * d_lat) * xp.cos(3 * s_lat)
+        )
+        lat = lat + (northing - proj.n0 - m) / (a * f0)
+
+    sin_lat = xp.sin(lat)
+    cos_lat = xp.cos(lat)
+    tan_lat = xp.tan(lat)
+    tan2 = tan_lat * tan_lat
+    tan4 = tan2 * tan2
+    tan6 = tan4 * tan2
+    sec_lat = 1 / cos_lat
+
+    nu = a * f0 / xp.sqrt(1 - e2 * sin_lat * sin_lat)
+    rho = a * f0 * (1 - e2) / (1 - e2 * sin_lat * sin_lat) ** 1.5
+    eta2 = nu / rho - 1
+
+    vii = tan_lat / (2 * rho * nu)
+    viii = tan_lat / (24 * rho * nu ** 3) * (5 + 3 * tan2 + eta2 - 9 * tan2 * eta2)
+    ix = tan_lat / (720 * rho * nu ** 5) * (61 + 90 * tan2 + 45 * tan4)
+    x = sec_lat / nu
+    xi = sec_lat / (6 * nu ** 3) * (nu / rho + 2 * tan2)
+    xii = sec_lat / (120 * nu ** 5) * (5 + 28 * tan2 + 24 * tan4)
+    xiia = sec_lat / (5040 * nu ** 7) * (61 + 662 * tan2 + 1320 * tan4 + 720 * tan6)
+
+    de = easting - proj.e0
+    lat = lat - vii * de ** 2 + viii * de ** 4 - ix * de ** 6
+    lon = lon0 + x * de - xi * de ** 3 + xii * de ** 5 - xiia * de ** 7
+    return lat, lon
+
+
+def _geodetic_to_cartesian(lat, lon, ellipsoid, xp):
+    a, b = ellipsoid.a, ellipsoid.b
+    e2 = 1 - (b * b) / (a * a)
+    sin_lat = xp.sin(lat)
+    nu = a / xp.sqrt(1 - e2 * sin_lat * sin_lat)
+    x = nu * xp.cos(lat) * xp.cos(lon)
+    y = nu * xp.cos(lat) * xp.sin(lon)
+    z = (1 - e2) * nu * sin_lat
+    return x, y, z
+
+
+def _helmert(x, y, z, t):
+    """7 参数 Helmert 变换 (position vector 约定)"""
+    s = t.s * 1e-6
+    rx, ry, rz = t.rx * _ARCSEC, t.ry * _ARCSEC, t.rz * _ARCSEC
+    x2 = t.tx + (1 + s) * x - rz * y + ry * z
+    y2 = t.ty + rz * x + (1 + s) * y - rx * z
+    z2 = t.tz - ry * x + rx * y + (1 + s) * z
+    return x2, y2, z2
+
+
+def _cartesian_to_geodetic(x, y, z, ellipsoid, xp):
+    a, b = ellipsoid.a, ellipsoid.b
+    e2 = 1 - (b * b) / (a * a)
+    p = xp.sqrt(x * x + y * y)
+    lat = xp.atan2(z, p * (1 - e2))
+    for _ in range(6):
+        sin_lat = xp.sin(lat)
+        nu = a / xp.sqrt(1 - e2 * sin_lat * sin_lat)
+        lat = xp.atan2(z + e2 * nu * sin_lat, p)
+    lon = xp.atan2(y, x)
+    return lat, lon
@@ -0,0 +1,132 @@
+"""
+郡数据文件 (*_all_data.json) 的流式读写：
+
+- write_all_data(path, data)：一个郡、一个站点地写出，站点可以是生成器（边抓边写，
+  内存里只有正在处理的站点）。输出和 json.dump(data, f, indent=2, ensure_ascii=False) 逐字节相同
+- 先写同目录下的临时文件，写完 fsync 再 os.replace，中途出错或被中断时原文件保持不变
+- 按后缀压缩：.json.gz 用 gzip，.json.zst 用 zstandard（需要 pip install zstandard）
+"""
+import glob
+import gzip
+import io
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ImportError:  # 只有写 / 读 .zst 文件时才需要
+    zstandard = None
+
+DATA_FILE_PATTERN = '*_all_data.json'
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+INDENT = 2
+
+
+def data_files(data_dir='.'):
+    """目录下所有郡数据文件（含压缩的），按文件名排序"""
+    paths = glob.glob(os.path.join(data_dir, DATA_FILE_PATTERN))
+    for suffix in COMPRESSED_SUFFIXES:
+        paths += glob.glob(os.path.join(data_dir, DATA_FILE_PATTERN + suffix))
+    return sorted(paths)
+
+
+def other_variants(path):
+    """同一个文件其它压缩方式的版本（例如 path 是 x.json.gz 时已存在的 x.json、x.json.zst）"""
+    base = path
+    for suffix in COMPRESSED_SUFFIXES:
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+    return [p for p in (base,) + tuple(base + suffix for suffix in COMPRESSED_SUFFIXES)
+            if p != path and os.path.exists(p)]
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError("读写 .zst 文件需要先安装 zstandard: pip install zstandard")
+
+
+def _wrap_binary(raw, path, mode):
+    """按后缀给二进制文件对象套上解压 / 压缩和文本编码"""
+    if path.endswith('.gz'):
+        raw = gzip.GzipFile(fileobj=raw, mode=mode + 'b', mtime=0)
+    elif path.endswith('.zst'):
+        _require_zstandard()
+        if mode == 'w':
+            raw = zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False)
+        else:
+            raw = zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+    return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+
+
+def load_json(path):
+    with open(path, 'rb') as raw:
+        with _wrap_binary(raw, path, 'r') as f:
+            return json.load(f)
+
+
+@contextmanager
+def atomic_open(path):
+    """
+    写文本到 path（按后缀压缩）：先写临时文件，正常结束时 fsync 后替换 path；
+    出错时删掉临时文件，path 保持原样
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            f = _wrap_binary(raw, path, 'w')
+            yield f
+            f.flush()
+            stream = f.detach()
+            if stream is not raw:
+                stream.close()  # 写出压缩流的结尾，不会关闭 raw
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _dump(value, level):
+    """和 json.dump(indent=2) 相同的排版，嵌在第 level 层"""
+    text = json.dumps(value, indent=INDENT, ensure_ascii=False)
+    return text.replace('\n', '\n' + ' ' * (INDENT * level))
+
+
+def _items(data):
+    return data.items() if isinstance(data, dict) else data
+
+
+def write_all_data(path, data):
+    """
+    data: {郡: {'county_info': {...}, 'climbing_sites': 站点的可迭代对象, ...}}，
+    或者按顺序产出 (郡, county_data) 的可迭代对象。返回 {'counties': 郡数, 'sites': 站点数}
+    """
+    pad = ' ' * INDENT
+    counties = sites_written = 0
+    with atomic_open(path) as f:
+        f.write('{')
+        for county, county_data in _items(data):
+            f.write((',' if counties else '') + '\n' + pad + json.dumps(county, ensure_ascii=False) + ': {')
+            fields = 0
+            for key, value in county_data.items():
+                f.write((',' if fields else '') + '\n' + pad * 2 + json.dumps(key, ensure_ascii=False) + ': ')
+                fields += 1
+                if key != 'climbing_sites':
+                    f.write(_dump(value, 2))
+                    continue
+                f.write('[')
+                n = 0
+                for site in value:
+                    f.write((',' if n else '') + '\n' + pad * 3 + _dump(site, 3))
+                    n += 1
+                f.write(('\n' + pad * 2 if n else '') + ']')
+                sites_written += n
+            f.write(('\n' + pad if fields else '') + '}')
+            counties += 1
+        f.write(('\n' if counties else '') + '}')
+    return {'counties': counties, 'sites': sites_written}
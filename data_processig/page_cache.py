@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class PageCache:
+    """
+    本地 wikitext 缓存（SQLite），按页面标题 + revid 存储压缩后的原始内容。
+    - ttl 秒内的缓存直接使用，超过 ttl 需要用 prop=info 确认 revid 是否变化
+    - max_bytes 限制缓存总大小，超出时按最久未使用的顺序淘汰
+    """
+
+    def __init__(self, path='wiki_page_cache.sqlite', ttl=7 * 24 * 3600, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            '''CREATE TABLE IF NOT EXISTS pages (
+                title TEXT PRIMARY KEY,
+                revid INTEGER,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )'''
+        )
+        self.conn.commit()
+
+    def get(self, title):
+        """返回 {'revid', 'content', 'fetched_at'}，没有缓存时返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT revid, content, fetched_at FROM pages WHERE title = ?', (title,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE pages SET accessed_at = ? WHERE title = ?', (time.time(), title))
+            self.conn.commit()
+
+        revid, blob, fetched_at = row
+        return {
+            'revid': revid,
+            'content': zlib.decompress(blob).decode('utf-8'),
+            'fetched_at': fetched_at
+        }
+
+    def put(self, title, revid, content):
+        blob = zlib.compress(content.encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO pages (title, revid, content, size, fetched_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (title, revid, blob, len(blob), now, now)
+            )
+            self.conn.commit()
+
+    def touch(self, title):
+        """revid 没变：刷新抓取时间，重新开始计算 ttl"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE title = ?', (now, now, title)
+            )
+            self.conn.commit()
+
+    def delete(self, title):
+        with self.lock:
+            self.conn.execute('DELETE FROM pages WHERE title = ?', (title,))
+            self.conn.commit()
+
+    def is_fresh(self, entry):
+        return self.ttl is not None and time.time() - entry['fetched_at'] < self.ttl
+
+    def evict(self):
+        """按 accessed_at 从旧到新删除，直到总大小不超过 max_bytes"""
+        if self.max_bytes is None:
+            return 0
+
+        removed = 0
+        with self.lock:
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            rows = self.conn.execute('SELECT title, size FROM pages ORDER BY accessed_at').fetchall()
+            for title, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute('DELETE FROM pages WHERE title = ?', (title,))
+                total -= size
+                removed += 1
+            self.conn.commit()
+        return removed
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
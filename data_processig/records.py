@@ -0,0 +1,238 @@
+"""
+郡 / 站点 / 路线 / 分段的紧凑内存表示，用来一次读入所有 *_all_data.json 做分析或重新导出：
+
+- Site / Route / Pitch / Coordinates 用 __slots__，没有每个对象一份的 __dict__ 和重复的键字符串
+- 难度、难度体系、岩场类型、坐标来源、郡名等重复出现的字符串放进 StringPool，同样的值只存一份
+- 路线和分段存成 tuple（比 list 省掉预留的空间）
+- to_dict() 和原来的 JSON 完全一致：缺少的键不补，键的顺序不同时记下原来的顺序，
+  不认识的键原样放进 extra，ClimbingStore.from_dict(data).to_dict() == data
+
+    python records.py                      # 读入当前目录所有郡的数据，校验往返一致并比较内存占用
+"""
+import argparse
+import tracemalloc
+
+from json_stream import data_files, load_json, write_all_data
+
+
+class StringPool:
+    """相同的字符串只保留一个对象（键的顺序 tuple 也放在这里）"""
+
+    def __init__(self):
+        self.values = {}
+
+    def __call__(self, value):
+        if isinstance(value, (str, tuple)):
+            return self.values.setdefault(value, value)
+        return value
+
+    def __len__(self):
+        return len(self.values)
+
+
+class _Record:
+    """
+    FIELDS 是 JSON 里的键（按导出时的顺序），INTERNED 是要放进 StringPool 的字段。
+    _order 只有在键的顺序或者有没有某个键和 FIELDS 不同时才存，_extra 放不认识的键
+    """
+    FIELDS = ()
+    INTERNED = frozenset()
+    __slots__ = ('_order', '_extra')
+
+    @classmethod
+    def from_dict(cls, data, pool):
+        record = cls.__new__(cls)
+        keys = tuple(data)
+        record._order = None if keys == cls.FIELDS else pool(keys)
+        record._extra = {k: v for k, v in data.items() if k not in cls.FIELDS} or None
+        for field in cls.FIELDS:
+            value = data.get(field)
+            if field in cls.INTERNED:
+                value = pool(value)
+            setattr(record, field, record._convert(field, value, pool))
+        return record
+
+    def _convert(self, field, value, pool):
+        """子类把嵌套的 dict / list 换成记录对象"""
+        return value
+
+    def _export(self, field, value):
+        return value
+
+    def _items(self, export):
+        for key in self._order or self.FIELDS:
+            yield key, export(key, getattr(self, key)) if key in self.FIELDS else self._extra[key]
+
+    def to_dict(self):
+        return dict(self._items(self._export))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{f}={getattr(self, f)!r}' for f in self.FIELDS[:2])}, ...)"
+
+
+def _records(cls, values, pool):
+    """dict 的列表 -> 记录的 tuple；格式不对（不是 list 或者元素不是 dict）时原样保留"""
+    if not isinstance(values, list) or not all(isinstance(v, dict) for v in values):
+        return values
+    return tuple(cls.from_dict(v, pool) for v in values)
+
+
+def _dicts(values):
+    return [v.to_dict() for v in values] if isinstance(values, tuple) else values
+
+
+class Coordinates(_Record):
+    FIELDS = ('latitude', 'longitude', 'source', 'estimated')
+    INTERNED = frozenset({'source'})
+    __slots__ = FIELDS
+
+
+class Pitch(_Record):
+    FIELDS = ('pitch_number', 'height', 'description', 'technical_grade')
+    INTERNED = frozenset({'technical_grade'})
+    __slots__ = FIELDS
+
+
+class Route(_Record):
+    FIELDS = ('name', 'height', 'difficulty', 'overall_grade', 'technical_grade',
+              'sub_routes', 'first_ascent', 'description',
+              'grade', 'grade_system', 'grade_band', 'grade_sort')
+    INTERNED = frozenset({'difficulty', 'overall_grade', 'technical_grade', 'first_ascent',
+                          'grade', 'grade_system'})
+    __slots__ = FIELDS
+
+    def _convert(self, field, value, pool):
+        return _records(Pitch, value, pool) if field == 'sub_routes' else value
+
+    def _export(self, field, value):
+        return _dicts(value) if field == 'sub_routes' else value
+
+
+class Site(_Record):
+    FIELDS = ('name', 'page_title', 'climbing_type', 'url', 'routes', 'routes_count', 'coordinates')
+    INTERNED = frozenset({'climbing_type'})
+    __slots__ = FIELDS
+
+    def _convert(self, field, value, pool):
+        if field == 'routes':
+            return _records(Route, value, pool)
+        if field == 'coordinates' and isinstance(value, dict):
+            return Coordinates.from_dict(value, pool)
+        return value
+
+    def _export(self, field, value):
+        if field == 'routes':
+            return _dicts(value)
+        if field == 'coordinates' and isinstance(value, Coordinates):
+            return value.to_dict()
+        return value
+
+
+class County(_Record):
+    """name 是 all_data 里的键（例如 'Co. Antrim'），不在 FIELDS 里"""
+    FIELDS = ('county_info', 'climbing_sites')
+    __slots__ = FIELDS + ('name',)
+
+    @classmethod
+    def from_dict(cls, data, pool, name=None):
+        record = super().from_dict(data, pool)
+        record.name = pool(name)
+        return record
+
+    def _convert(self, field, value, pool):
+        if field == 'county_info' and isinstance(value, dict):
+            return {k: pool(v) for k, v in value.items()}
+        return _records(Site, value, pool) if field == 'climbing_sites' else value
+
+    def _export(self, field, value):
+        if field == 'county_info' and isinstance(value, dict):
+            return dict(value)
+        return _dicts(value) if field == 'climbing_sites' else value
+
+    def _export_streaming(self, field, value):
+        if field == 'climbing_sites' and isinstance(value, tuple):
+            return (site.to_dict() for site in value)
+        return self._export(field, value)
+
+    def to_stream_dict(self):
+        """和 to_dict() 相同，但站点是逐个生成 dict 的生成器（写文件时不用先把整个郡转成 dict）"""
+        return dict(self._items(self._export_streaming))
+
+
+class ClimbingStore:
+    """所有郡的记录，郡的顺序和读入时一致；所有记录共用一个 StringPool"""
+
+    def __init__(self, counties=(), pool=None):
+        self.pool = pool or StringPool()
+        self.counties = list(counties)
+
+    @classmethod
+    def from_dict(cls, all_data, store=None):
+        """all_data 和 collect_all_data() 的返回值格式相同；传入 store 时追加到它后面"""
+        if store is None:
+            store = cls()
+        for name, county_data in all_data.items():
+            store.counties.append(County.from_dict(county_data, store.pool, name))
+        return store
+
+    @classmethod
+    def load(cls, data_dir='.'):
+        """逐个文件读入所有郡数据（内存里同时只有一个文件的 dict）"""
+        store = cls()
+        for path in data_files(data_dir):
+            cls.from_dict(load_json(path), store)
+        return store
+
+    def to_dict(self):
+        return {county.name: county.to_dict() for county in self.counties}
+
+    def iter_data(self):
+        """(郡, county_data) 按顺序产出，站点是生成器，可以直接交给 write_all_data"""
+        for county in self.counties:
+            yield county.name, county.to_stream_dict()
+
+    def save(self, path):
+        return write_all_data(path, self.iter_data())
+
+    def iter_sites(self):
+        for county in self.counties:
+            for site in county.climbing_sites or ():
+                yield county, site
+
+    def iter_routes(self):
+        for county, site in self.iter_sites():
+            for route in site.routes or ():
+                yield county, site, route
+
+    def __len__(self):
+        return sum(len(county.climbing_sites or ()) for county in self.counties)
+
+
+def _traced_size(load):
+    tracemalloc.start()
+    try:
+        value = load()
+        return value, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='读入所有郡数据，校验记录对象往返一致并比较内存占用')
+    parser.add_argument('--data-dir', default='.')
+    args = parser.parse_args()
+
+    files, dict_bytes = _traced_size(lambda: [load_json(path) for path in data_files(args.data_dir)])
+    store, store_bytes = _traced_size(lambda: ClimbingStore.load(args.data_dir))
+    # 不同文件里可能有同名的郡，逐个文件比较
+    counties = iter(store.counties)
+    for data in files:
+        if {county.name: county.to_dict() for county in [next(counties) for _ in data]} != data:
+            raise SystemExit("记录对象转回 dict 和原始数据不一致")
+    routes = sum(1 for _ in store.iter_routes())
+    print(f"{len(store.counties)} 个郡, {len(store)} 个站点, {routes} 条路线, 字符串池 {len(store.pool)} 项")
+    print(f"dict: {dict_bytes // 1024} KB，记录对象: {store_bytes // 1024} KB "
+          f"({store_bytes / max(dict_bytes, 1):.0%})")
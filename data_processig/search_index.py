@@ -0,0 +1,180 @@
+"""
+站点名 / 路线名 / 首攀者 / 描述关键词的全文倒排索引，导出时预先建好 (climbing_search.json)。
+
+- 分词：NFKD 去掉重音、转小写、按非字母数字切开；描述里去掉停用词和太短的词
+- 词表排好序：同一个前缀的词在词表里是连续的一段，二分查找就能拿到所有前缀匹配
+  （相当于一棵压平的前缀树），所以输入时最后一个词可以只打一半
+- 每个词的倒排表是 [文档, 字段位掩码, ...]；文档是站点本身或站点下的一条路线
+- 打分：每个查询词取命中字段里权重最高的一个（前缀命中打折），所有词都要命中
+
+文档里的站点编号是它在 climbing_index.json 里的顺序编号，路线编号是在该站点 routes 里的位置；
+导出文件里倒排表的文档编号存成和前一个的差值（小整数，JSON 更短）
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+SEARCH_VERSION = 1
+
+# 字段位掩码和打分权重
+SITE_NAME = 1
+COUNTY = 2
+ROUTE_NAME = 4
+FIRST_ASCENT = 8
+DESCRIPTION = 16
+FIELD_WEIGHTS = {SITE_NAME: 8.0, COUNTY: 2.0, ROUTE_NAME: 5.0, FIRST_ASCENT: 2.0, DESCRIPTION: 1.0}
+PREFIX_FACTOR = 0.6        # 只是前缀命中时的折扣
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset("""
+a an and are as at be but by climb climbs climbed for from go goes in into is it its of off on onto or
+over the then this that to up via with
+""".split())
+MIN_DESCRIPTION_TOKEN = 3
+
+
+def normalize(text):
+    """去重音、转小写：'Ó Ceallaigh' -> 'o ceallaigh'"""
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def keywords(text):
+    """描述用的关键词：去掉停用词、纯数字和太短的词"""
+    return [t for t in tokenize(text)
+            if len(t) >= MIN_DESCRIPTION_TOKEN and t not in STOPWORDS and not t.isdigit()]
+
+
+class SearchIndex:
+
+    def __init__(self, terms, postings, docs):
+        self.terms = terms          # 排好序的词表
+        self.postings = postings    # 和词表平行：[文档, 位掩码, 文档, 位掩码, ...]
+        self.docs = docs            # [[站点编号, 路线编号 或 -1]]
+
+    @classmethod
+    def build(cls, all_data):
+        """all_data 和 collect_all_data() 的返回值格式相同"""
+        index = defaultdict(lambda: defaultdict(int))
+        docs = []
+
+        def add(doc, field, tokens):
+            for token in tokens:
+                index[token][doc] |= field
+
+        site_key = 0
+        for county, county_data in all_data.items():
+            county_tokens = tokenize(county_data['county_info'].get('name', county))
+            for site in county_data['climbing_sites']:
+                doc = len(docs)
+                docs.append([site_key, -1])
+                add(doc, SITE_NAME, tokenize(site.get('name')))
+                add(doc, COUNTY, county_tokens)
+                for r, route in enumerate(site.get('routes', [])):
+                    doc = len(docs)
+                    docs.append([site_key, r])
+                    add(doc, ROUTE_NAME, tokenize(route.get('name')))
+                    first_ascent = route.get('first_ascent')
+                    if first_ascent and first_ascent != 'Unknown':
+                        add(doc, FIRST_ASCENT, tokenize(first_ascent))
+                    add(doc, DESCRIPTION, keywords(route.get('description')))
+                site_key += 1
+
+        terms = sorted(index)
+        postings = []
+        for term in terms:
+            flat = []
+            for doc, mask in sorted(index[term].items()):
+                flat += [doc, mask]
+            postings.append(flat)
+        return cls(terms, postings, docs)
+
+    def prefix_range(self, prefix):
+        """以 prefix 开头的词在词表里的下标范围 [lo, hi)"""
+        lo = bisect_left(self.terms, prefix)
+        hi = bisect_left(self.terms, prefix + '\uffff', lo)
+        return lo, hi
+
+    def _token_scores(self, token, prefix):
+        """一个查询词 -> {文档: 分数}"""
+        if prefix:
+            lo, hi = self.prefix_range(token)
+        else:
+            lo = bisect_left(self.terms, token)
+            hi = lo + 1 if lo < len(self.terms) and self.terms[lo] == token else lo
+
+        scores = {}
+        for t in range(lo, hi):
+            factor = 1.0 if self.terms[t] == token else PREFIX_FACTOR
+            flat = self.postings[t]
+            for j in range(0, len(flat), 2):
+                doc, mask = flat[j], flat[j + 1]
+                score = factor * max(w for field, w in FIELD_WEIGHTS.items() if mask & field)
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+        return scores
+
+    def search(self, query, limit=20):
+        """
+        返回 [(分数, 站点编号, 路线编号 或 None)]，分数从高到低。
+        所有查询词都要命中；最后一个词按前缀匹配（边输入边搜）
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        total = None
+        for n, token in enumerate(tokens):
+            scores = self._token_scores(token, prefix=(n == len(tokens) - 1))
+            if total is None:
+                total = scores
+            else:
+                total = {doc: total[doc] + s for doc, s in scores.items() if doc in total}
+            if not total:
+                return []
+
+        ranked = sorted(total.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(score, self.docs[doc][0], None if self.docs[doc][1] < 0 else self.docs[doc][1])
+                for doc, score in ranked]
+
+    def search_sites(self, query, limit=20):
+        """按站点汇总：每个站点取它自己或其路线里的最高分，返回 [(分数, 站点编号)]"""
+        best = {}
+        for score, site, _ in self.search(query, limit=None):
+            if score > best.get(site, 0.0):
+                best[site] = score
+        return sorted(((score, site) for site, score in best.items()), key=lambda item: (-item[0], item[1]))[:limit]
+
+    def to_json(self):
+        postings = []
+        for flat in self.postings:
+            gaps, prev = [], 0
+            for j in range(0, len(flat), 2):
+                gaps += [flat[j] - prev, flat[j + 1]]
+                prev = flat[j]
+            postings.append(gaps)
+        return {
+            'version': SEARCH_VERSION,
+            'fields': {str(field): weight for field, weight in FIELD_WEIGHTS.items()},
+            'prefix_factor': PREFIX_FACTOR,
+            'terms': self.terms,
+            'postings': postings,
+            'docs': self.docs,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get('version') != SEARCH_VERSION:
+            raise ValueError(f"不支持的搜索索引版本: {data.get('version')}")
+        postings = []
+        for gaps in data['postings']:
+            flat, doc = [], 0
+            for j in range(0, len(gaps), 2):
+                doc += gaps[j]
+                flat += [doc, gaps[j + 1]]
+            postings.append(flat)
+        return cls(data['terms'], postings, data['docs'])
@@ -0,0 +1,137 @@
+"""
+站点 / 郡的汇总统计，导出时算一次 (climbing_stats.json，站点的摘要也放进 climbing_index.json)，
+App 的列表和地图标记直接显示，不用再遍历路线：
+
+- 路线数、难度范围（按 grades.py 的排序键）、各难度段的路线数
+- 高度：最高 / 最低 / 中位数、最高的路线、按高度区间的分布
+- 首攀年份范围（从 first_ascent 里找四位年份）
+- 主要风格：按路线的难度体系数出 Trad / Sport / Boulder / Aid 里最多的一个
+"""
+import re
+from collections import Counter
+from statistics import median
+
+STATS_VERSION = 1
+
+HEIGHT_BUCKETS = (10, 20, 30, 50, 100)  # 各区间的上界（米），最后一个区间是 100+
+STYLE_BY_SYSTEM = {'uk_trad': 'Trad', 'uk_tech': 'Trad', 'french': 'Sport', 'font': 'Boulder', 'aid': 'Aid'}
+FA_YEAR = re.compile(r'\b(1[89]\d\d|20\d\d)\b')
+
+
+def fa_year(first_ascent):
+    """'K Lindsay, A Blair. Autumn 1994.' -> 1994；多个年份时取最早的"""
+    if not first_ascent:
+        return None
+    years = [int(y) for y in FA_YEAR.findall(first_ascent)]
+    return min(years) if years else None
+
+
+HEIGHT_LABELS = tuple(f'{low}-{high}' for low, high in zip((0,) + HEIGHT_BUCKETS, HEIGHT_BUCKETS)) \
+    + (f'{HEIGHT_BUCKETS[-1]}+',)
+
+
+def height_bucket(height):
+    for label, high in zip(HEIGHT_LABELS, HEIGHT_BUCKETS):
+        if height < high:
+            return label
+    return HEIGHT_LABELS[-1]
+
+
+def _height_histogram(counts):
+    """按区间从低到高排列，省掉空区间"""
+    return {label: counts[label] for label in HEIGHT_LABELS if counts.get(label)}
+
+
+def _grade_range(routes):
+    graded = [r for r in routes if r.get('grade') and r.get('grade_sort') is not None]
+    if not graded:
+        return None, None
+    lowest = min(graded, key=lambda r: r['grade_sort'])
+    highest = max(graded, key=lambda r: r['grade_sort'])
+    return lowest['grade'], highest['grade']
+
+
+def _years_range(years):
+    return (min(years), max(years)) if years else (None, None)
+
+
+def site_stats(site):
+    routes = site.get('routes', [])
+    measured = [r for r in routes if isinstance(r.get('height'), (int, float)) and r['height'] > 0]
+    heights = [r['height'] for r in measured]
+    years = [y for y in (fa_year(r.get('first_ascent')) for r in routes) if y]
+    styles = Counter(STYLE_BY_SYSTEM[r['grade_system']] for r in routes if r.get('grade_system') in STYLE_BY_SYSTEM)
+    grade_min, grade_max = _grade_range(routes)
+    fa_min, fa_max = _years_range(years)
+    tallest = max(measured, key=lambda r: r['height'], default=None)
+
+    return {
+        'routes_count': len(routes),
+        'graded_routes': sum(1 for r in routes if r.get('grade')),
+        'grade_min': grade_min,
+        'grade_max': grade_max,
+        'grade_histogram': dict(sorted(Counter(r['grade_band'] for r in routes
+                                               if r.get('grade_band') is not None).items())),
+        'height_min': min(heights) if heights else None,
+        'height_max': max(heights) if heights else None,
+        'height_median': median(heights) if heights else None,
+        'tallest_route': tallest['name'] if tallest else None,
+        'height_histogram': _height_histogram(Counter(height_bucket(h) for h in heights)),
+        'fa_year_min': fa_min,
+        'fa_year_max': fa_max,
+        'dominant_style': styles.most_common(1)[0][0] if styles else None,
+        'styles': dict(styles),
+        'routes_with_first_ascent': sum(1 for r in routes if r.get('first_ascent') not in (None, '', 'Unknown')),
+        'routes_with_description': sum(1 for r in routes if r.get('description')),
+    }
+
+
+def county_stats(county_data, sites_stats=None):
+    """郡的汇总；sites_stats 是已经算好的各站点 site_stats（和 climbing_sites 平行）"""
+    sites = county_data['climbing_sites']
+    if sites_stats is None:
+        sites_stats = [site_stats(site) for site in sites]
+
+    grade_histogram = Counter()
+    height_histogram = Counter()
+    styles = Counter()
+    for stats in sites_stats:
+        grade_histogram.update(stats['grade_histogram'])
+        height_histogram.update(stats['height_histogram'])
+        styles.update(stats['styles'])
+
+    routes = [route for site in sites for route in site.get('routes', [])]
+    grade_min, grade_max = _grade_range(routes)
+    tallest = max(((site, stats) for site, stats in zip(sites, sites_stats) if stats['height_max']),
+                  key=lambda pair: pair[1]['height_max'], default=None)
+    fa_min, fa_max = _years_range([y for s in sites_stats for y in (s['fa_year_min'], s['fa_year_max']) if y])
+
+    return {
+        'sites_count': len(sites),
+        'sites_with_coordinates': sum(1 for site in sites
+                                      if (site.get('coordinates') or {}).get('latitude') is not None),
+        'sites_with_routes': sum(1 for stats in sites_stats if stats['routes_count']),
+        'routes_count': sum(stats['routes_count'] for stats in sites_stats),
+        'grade_min': grade_min,
+        'grade_max': grade_max,
+        'grade_histogram': dict(sorted(grade_histogram.items())),
+        'height_max': tallest[1]['height_max'] if tallest else None,
+        'tallest_route': {'site': tallest[0]['name'], 'route': tallest[1]['tallest_route']} if tallest else None,
+        'height_histogram': _height_histogram(height_histogram),
+        'fa_year_min': fa_min,
+        'fa_year_max': fa_max,
+        'dominant_style': styles.most_common(1)[0][0] if styles else None,
+        'styles': dict(styles),
+    }
+
+
+def aggregate(all_data):
+    """
+    all_data 和 collect_all_data() 的返回值格式相同 ->
+    {'version', 'counties': {郡: {...郡汇总, 'sites': [站点汇总, ...]}}}，站点顺序和 climbing_sites 一致
+    """
+    counties = {}
+    for county, county_data in all_data.items():
+        sites_stats = [site_stats(site) for site in county_data['climbing_sites']]
+        counties[county] = dict(county_stats(county_data, sites_stats), sites=sites_stats)
+    return {'version': STATS_VERSION, 'counties': counties}
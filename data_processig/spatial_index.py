@@ -0,0 +1,194 @@
+"""
+攀岩点的空间索引：按 Web Mercator 瓦片 (z/x/y，和地图缩放级别一致) 分桶的四叉树。
+
+- bbox(south, west, north, east)：只看和范围相交的瓦片，耗时和结果数量成正比
+- nearest(lat, lon, k)：从根瓦片开始按"到瓦片的最近距离"做最佳优先搜索，
+  只展开可能更近的瓦片，不用逐个比较所有站点
+- clusters(zoom)：每个瓦片一个聚合标记（数量 + 质心），导出时预先算好几个缩放级别
+
+导出的 climbing_spatial.json 里站点用它在 climbing_index.json 中的顺序编号
+"""
+import heapq
+import math
+from collections import defaultdict
+
+SPATIAL_VERSION = 1
+MAX_ZOOM = 16              # 大约 600 米一块瓦片，足够区分相邻的岩场
+CLUSTER_ZOOMS = (5, 6, 7, 8, 9, 10, 11, 12)
+LEAF_SIZE = 8              # 瓦片里站点不超过这么多时直接比较距离，不再往下分
+EARTH_RADIUS_KM = 6371.0088
+MAX_LAT = 85.05112878      # Web Mercator 能表示的纬度范围
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def tile_of(lat, lon, zoom):
+    """经纬度 -> 该缩放级别的瓦片 (x, y)"""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    n = 1 << zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(x, y, zoom):
+    """瓦片 -> (south, west, north, east)"""
+    n = 1 << zoom
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+def _min_distance_km(lat, lon, bounds):
+    """点到瓦片的最近距离（把点夹到瓦片的经纬度范围里再算球面距离，爱尔兰这种尺度下误差可以忽略）"""
+    south, west, north, east = bounds
+    return haversine_km(lat, lon, min(max(lat, south), north), min(max(lon, west), east))
+
+
+class SpatialIndex:
+    """
+    entries: [(key, lat, lon)]，key 可以是任意值（站点编号、站点 dict ...）。
+    每个缩放级别一个 {(x, y): [点编号]}，级别 z 的瓦片只在有点时才存在
+    """
+
+    def __init__(self, entries, max_zoom=MAX_ZOOM):
+        self.max_zoom = max_zoom
+        self.keys = []
+        self.lats = []
+        self.lons = []
+        self.levels = [defaultdict(list) for _ in range(max_zoom + 1)]
+
+        for key, lat, lon in entries:
+            if lat is None or lon is None:
+                continue
+            i = len(self.keys)
+            self.keys.append(key)
+            self.lats.append(lat)
+            self.lons.append(lon)
+            x, y = tile_of(lat, lon, max_zoom)
+            for zoom in range(max_zoom, -1, -1):
+                shift = max_zoom - zoom
+                self.levels[zoom][(x >> shift, y >> shift)].append(i)
+
+    @classmethod
+    def from_sites(cls, sites, max_zoom=MAX_ZOOM):
+        """sites: decode_site_index() 的结果或任意带 coordinates 的站点列表，key 是站点在列表里的位置"""
+        entries = []
+        for i, site in enumerate(sites):
+            coords = site.get('coordinates') or {}
+            entries.append((i, coords.get('latitude'), coords.get('longitude')))
+        return cls(entries, max_zoom)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _zoom_for_bbox(self, south, west, north, east):
+        """让范围大约覆盖 2x2 块瓦片的缩放级别"""
+        span = max(east - west, north - south, 1e-9)
+        return max(0, min(self.max_zoom, int(math.log2(360.0 / span))))
+
+    def bbox(self, south, west, north, east):
+        """范围内的所有 key（不跨 180° 经线）"""
+        zoom = self._zoom_for_bbox(south, west, north, east)
+        x0, y0 = tile_of(north, west, zoom)
+        x1, y1 = tile_of(south, east, zoom)
+        level = self.levels[zoom]
+        result = []
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                for i in level.get((x, y), ()):
+                    if south <= self.lats[i] <= north and west <= self.lons[i] <= east:
+                        result.append(self.keys[i])
+        return result
+
+    def nearest(self, lat, lon, k=1, max_km=None):
+        """离 (lat, lon) 最近的 k 个点，返回 [(距离 km, key)]，按距离从近到远"""
+        if not self.keys or k <= 0:
+            return []
+        # 堆里混放瓦片和点：(距离下界, 序号, 瓦片 (z, x, y) 或 None, 点编号)
+        heap = [(0.0, 0, (0, 0, 0), None)]
+        counter = 1
+        result = []
+        while heap and len(result) < k:
+            dist, _, tile, i = heapq.heappop(heap)
+            if max_km is not None and dist > max_km:
+                break
+            if tile is None:
+                result.append((dist, self.keys[i]))
+                continue
+            zoom, x, y = tile
+            members = self.levels[zoom].get((x, y), ())
+            if zoom == self.max_zoom or len(members) <= LEAF_SIZE:
+                for j in members:
+                    heapq.heappush(heap, (haversine_km(lat, lon, self.lats[j], self.lons[j]), counter, None, j))
+                    counter += 1
+                continue
+            for cx in (2 * x, 2 * x + 1):
+                for cy in (2 * y, 2 * y + 1):
+                    if (cx, cy) in self.levels[zoom + 1]:
+                        child_dist = _min_distance_km(lat, lon, tile_bounds(cx, cy, zoom + 1))
+                        heapq.heappush(heap, (child_dist, counter, (zoom + 1, cx, cy), None))
+                        counter += 1
+        return result
+
+    def clusters(self, zoom, bbox=None):
+        """
+        每个非空瓦片一个聚合标记：{'tile', 'count', 'latitude', 'longitude', 'keys'}；
+        bbox=(south, west, north, east) 时只返回和范围相交的瓦片
+        """
+        zoom = max(0, min(self.max_zoom, zoom))
+        level = self.levels[zoom]
+        if bbox is None:
+            tiles = sorted(level)
+        else:
+            south, west, north, east = bbox
+            x0, y0 = tile_of(north, west, zoom)
+            x1, y1 = tile_of(south, east, zoom)
+            tiles = [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1) if (x, y) in level]
+
+        result = []
+        for x, y in tiles:
+            members = level[(x, y)]
+            result.append({
+                'tile': (zoom, x, y),
+                'count': len(members),
+                'latitude': sum(self.lats[i] for i in members) / len(members),
+                'longitude': sum(self.lons[i] for i in members) / len(members),
+                'keys': [self.keys[i] for i in members],
+            })
+        return result
+
+    def to_json(self, coord_scale=10_000_000, cluster_zooms=CLUSTER_ZOOMS):
+        """
+        导出给 App 用：每个缩放级别的聚合标记 [x, y, 数量, 纬度, 经度, [key...]]，
+        坐标和 climbing_index.json 一样是定点整数
+        """
+        clusters = {}
+        for zoom in cluster_zooms:
+            clusters[str(zoom)] = [
+                [c['tile'][1], c['tile'][2], c['count'],
+                 round(c['latitude'] * coord_scale), round(c['longitude'] * coord_scale), c['keys']]
+                for c in self.clusters(zoom)
+            ]
+        return {
+            'version': SPATIAL_VERSION,
+            'coord_scale': coord_scale,
+            'max_zoom': self.max_zoom,
+            'points': [[key, round(lat * coord_scale), round(lon * coord_scale)]
+                       for key, lat, lon in zip(self.keys, self.lats, self.lons)],
+            'clusters': clusters,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        """从 to_json() 的结果重建索引（瓦片分桶重新计算，很快）"""
+        if data.get('version') != SPATIAL_VERSION:
+            raise ValueError(f"不支持的空间索引版本: {data.get('version')}")
+        scale = data['coord_scale']
+        return cls(((key, lat / scale, lon / scale) for key, lat, lon in data['points']), data['max_zoom'])
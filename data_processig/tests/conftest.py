@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 爬虫的模块都是 data_processig/ 下互相直接 import 的平级文件
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,69 @@
+import json
+import os
+
+from export_bundle import (decode_bundle, decode_site_index, encode_site_index, export_app_data, shard_name,
+                           site_id)
+from grades import annotate_route
+
+
+def county(name, sites):
+    return {'county_info': {'name': name}, 'climbing_sites': sites}
+
+
+def crag(name, lat=None, routes=()):
+    return {'name': name, 'page_title': name.replace(' ', '_'), 'climbing_type': 'Trad',
+            'url': 'http://wiki.climbing.ie/index.php?title=' + name.replace(' ', '_'),
+            'routes': [annotate_route({'name': r, 'difficulty': g, 'height': h, 'first_ascent': fa})
+                       for r, g, h, fa in routes],
+            'routes_count': len(routes),
+            'coordinates': {'latitude': lat, 'longitude': -6.0 if lat else None, 'source': 'manual'}}
+
+
+DATA = {
+    'Co. Antrim': county('Co. Antrim', [crag('Fair Head', 55.2, [('Ulysses', 'E2 5c', 80, 'C Torrans 1980')]),
+                                        crag('Binnian', None)]),
+    'Co. Dublin': county('Co. Dublin', [crag('Dalkey Quarry', 53.27, [('Paradise Lost', 'VS 4c', 20, None),
+                                                                      ('Helios', 'E1 5b', 15, None)])]),
+}
+
+
+def test_names():
+    assert shard_name('Co. Antrim') == 'antrim'
+    assert shard_name('Co Londonderry / Derry') == 'londonderry_derry'
+    assert site_id('Co. Antrim', {'name': "Fair Head (North)"}) == 'Co__Antrim_Unknown_Fair_Head__North_'
+
+
+def test_site_index_points_at_detail_shards():
+    entries = decode_site_index(json.loads(json.dumps(encode_site_index(DATA))))
+    assert [(e['shard'], e['detail_index'], e['name']) for e in entries] == [
+        ('antrim', 0, 'Fair Head'), ('antrim', 1, 'Binnian'), ('dublin', 0, 'Dalkey Quarry')]
+    fair_head, binnian, dalkey = entries
+    assert fair_head['coordinates'] == {'latitude': 55.2, 'longitude': -6.0}
+    assert binnian['coordinates'] is None and binnian['grades'] == []
+    assert fair_head['url'] == DATA['Co. Antrim']['climbing_sites'][0]['url']
+    assert dalkey['route_names'] == ['Paradise Lost', 'Helios']
+    assert [g['name'] for g in dalkey['grades']] == ['VS 4c', 'E1 5b']
+    assert dalkey['stats']['grade_min'] == 'VS 4c' and dalkey['stats']['grade_max'] == 'E1 5b'
+    assert fair_head['stats']['fa_year_min'] == 1980 and fair_head['stats']['height_max'] == 80
+
+
+def test_export_app_data_writes_index_shards_and_loader(tmp_path):
+    details = tmp_path / 'climbing_details'
+    details.mkdir()
+    (details / 'kerry.json').write_text('{}')  # 上次导出留下、这次已经没有的郡
+
+    export_app_data(DATA, str(tmp_path))
+    assert sorted(os.listdir(details)) == ['antrim.json', 'dublin.json', 'shards.ts']
+    for name, county_name in (('antrim', 'Co. Antrim'), ('dublin', 'Co. Dublin')):
+        shard = json.loads((details / f'{name}.json').read_text(encoding='utf-8'))
+        assert decode_bundle(shard) == {county_name: DATA[county_name]}
+
+    loader = (details / 'shards.ts').read_text(encoding='utf-8')
+    assert """  "antrim": () => require('./antrim.json'),""" in loader
+    assert """  "dublin": () => require('./dublin.json'),""" in loader
+
+    index = json.loads((tmp_path / 'climbing_index.json').read_text(encoding='utf-8'))
+    assert len(decode_site_index(index)) == 3
+    for name in ('climbing_spatial.json', 'climbing_search.json', 'climbing_stats.json'):
+        assert (tmp_path / name).exists()
+    assert not [p for p in os.listdir(tmp_path) if p.endswith('.tmp')]
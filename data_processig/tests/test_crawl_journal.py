@@ -0,0 +1,82 @@
+import pytest
+
+from crawl_journal import CrawlJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = CrawlJournal(str(tmp_path / 'journal.sqlite'))
+    yield journal
+    journal.close()
+
+
+def test_sites_files_and_meta_persist(tmp_path):
+    path = str(tmp_path / 'journal.sqlite')
+    journal = CrawlJournal(path)
+    journal.record_site('Co. Clare', {'name': 'Ailladie', 'page_title': 'Ailladie', 'routes': [{'name': 'Ó'}]})
+    journal.mark_saved('Clare')
+    journal.set_meta('run_started', '2024-01-01T00:00:00Z')
+    journal.close()
+
+    journal = CrawlJournal(path)
+    assert journal.done_titles('Co. Clare') == {'Ailladie'}
+    assert journal.done_titles('Co. Kerry') == set()
+    assert journal.load_site('Co. Clare', 'Ailladie')['routes'] == [{'name': 'Ó'}]
+    assert journal.load_site('Co. Clare', 'Missing') is None
+    assert journal.is_saved('Clare') and not journal.is_saved('Kerry')
+    assert journal.get_meta('run_started') == '2024-01-01T00:00:00Z'
+    assert journal.counts() == {'sites': 1, 'saved_files': 1}
+
+    journal.clear()
+    assert journal.counts() == {'sites': 0, 'saved_files': 0}
+    assert journal.get_meta('run_started', 'none') == 'none'
+    journal.close()
+
+
+def test_resume_skips_finished_sites(journal, tmp_path, monkeypatch):
+    finalTest_A = pytest.importorskip('finalTest_A')
+    monkeypatch.chdir(tmp_path)
+    sites = [{'name': name, 'page_title': name.replace(' ', '_'), 'url': 'http://wiki.climbing.ie/' + name}
+             for name in ('Ailladie', 'Doolin', 'Fisherstreet', 'Ballyryan')]
+    requested = []
+
+    def crawler():
+        collector = finalTest_A.IrishClimbingRobust(cache_path=None, geocode_cache_path=None,
+                                                    index_cache_path=None, global_rate=1000)
+        collector.journal = journal
+
+        def fetch(titles):
+            requested.append(list(titles))
+            # Doolin 这一次下载失败
+            return {title: '{{coord|53.0|-9.4}}' for title in titles if title != 'Doolin'}
+
+        collector._fetch_revisions_batch = fetch
+        return collector
+
+    # 第一次运行处理完两个站点后被中断
+    first = crawler()._iter_sites(sites, 'Co. Clare')
+    done = [next(first), next(first)]
+    first.close()
+    assert journal.done_titles('Co. Clare') == {'Ailladie'}
+    assert done[1]['coordinates']['latitude'] is None  # 下载失败的站点不写进日志
+
+    requested.clear()
+    resumed = list(crawler()._iter_sites(sites, 'Co. Clare'))
+    assert requested == [['Doolin', 'Fisherstreet', 'Ballyryan']]
+    assert [site['name'] for site in resumed] == ['Ailladie', 'Doolin', 'Fisherstreet', 'Ballyryan']
+    assert resumed[0] == done[0]
+    assert journal.done_titles('Co. Clare') == {'Ailladie', 'Fisherstreet', 'Ballyryan'}
+
+
+def test_resume_keeps_names_of_sites_sharing_a_page(journal, tmp_path, monkeypatch):
+    finalTest_A = pytest.importorskip('finalTest_A')
+    monkeypatch.chdir(tmp_path)
+    sites = [{'name': 'Wiki', 'page_title': 'Irish_Climbing_Wiki', 'url': 'http://wiki.climbing.ie/a'},
+             {'name': 'Wiki (old)', 'page_title': 'Irish_Climbing_Wiki', 'url': 'http://wiki.climbing.ie/b'}]
+    collector = finalTest_A.IrishClimbingRobust(cache_path=None, geocode_cache_path=None, index_cache_path=None)
+    collector._fetch_revisions_batch = lambda titles: {title: '{{coord|53.0|-6.3}}' for title in titles}
+    collector.journal = journal
+    fresh = list(collector._iter_sites(sites, 'Co. Wicklow'))
+
+    collector._fetch_revisions_batch = None  # 续跑时不应该再下载
+    assert list(collector._iter_sites(sites, 'Co. Wicklow')) == fresh
@@ -0,0 +1,138 @@
+import pytest
+
+from geocoder import GeocodeCache
+
+finalTest_A = pytest.importorskip('finalTest_A')
+
+PAGE = "{{coord|53.01|-6.33}}\nA crag."
+
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    collector = finalTest_A.IrishClimbingRobust(cache_path=None, geocode_cache_path=None,
+                                                index_cache_path=None, global_rate=1000)
+    collector.host_rate_limits['wiki.climbing.ie'] = (1000, 1000)
+    return collector
+
+
+def site(name, page_title):
+    return {'name': name, 'page_title': page_title,
+            'url': 'http://wiki.climbing.ie/index.php?title=' + page_title}
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_sites_sharing_a_page_title_share_one_download(collector, workers):
+    collector.workers = workers
+    requested = []
+
+    def fetch(titles):
+        requested.append(list(titles))
+        return {title: PAGE for title in titles}
+
+    collector._fetch_revisions_batch = fetch
+    sites = [site('Wiki', 'Irish_Climbing_Wiki'), site('Lough Bray', 'Lough_Bray'),
+             site('Wiki (old)', 'Irish_Climbing_Wiki')]
+    result = list(collector._iter_sites(sites, 'Co. Wicklow'))
+    assert requested == [['Irish_Climbing_Wiki', 'Lough_Bray']]
+    assert [s['name'] for s in result] == ['Wiki', 'Lough Bray', 'Wiki (old)']
+    assert result[0]['coordinates'] == result[2]['coordinates'] == {
+        'latitude': 53.01, 'longitude': -6.33, 'source': 'wiki_template'}
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+def test_revisions_batch_follows_continue(collector):
+    responses = [
+        {'continue': {'rvcontinue': '12|34', 'continue': '||'},
+         'query': {'normalized': [{'from': 'Fair_Head', 'to': 'Fair Head'}],
+                   'pages': {'1': {'title': 'Fair Head', 'revisions': [{'revid': 7, '*': 'fair'}]},
+                             '2': {'title': 'Dalkey Quarry'}}}},
+        {'query': {'normalized': [{'from': 'Fair_Head', 'to': 'Fair Head'}],
+                   'pages': {'1': {'title': 'Fair Head'},
+                             '2': {'title': 'Dalkey Quarry', 'revisions': [{'revid': 8, '*': 'dalkey'}]}}}},
+    ]
+    sent = []
+
+    def http_get(url, params=None, **kwargs):
+        sent.append(dict(params))
+        return FakeResponse(responses.pop(0))
+
+    collector._http_get = http_get
+    assert collector._fetch_revisions_batch(['Fair_Head', 'Dalkey Quarry']) == {
+        'Fair_Head': 'fair', 'Dalkey Quarry': 'dalkey'}
+    assert 'rvcontinue' not in sent[0] and sent[1]['rvcontinue'] == '12|34'
+    assert sent[1]['titles'] == 'Fair_Head|Dalkey Quarry'
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-01-01', '2024-01-01T00:00:00Z'),
+    ('2024-01-01T10:30', '2024-01-01T10:30:00Z'),
+    ('2024-01-01T10:30:00Z', '2024-01-01T10:30:00Z'),
+    ('2024-01-01T10:30:00+01:00', '2024-01-01T09:30:00Z'),
+])
+def test_normalize_timestamp(value, expected):
+    assert finalTest_A.normalize_timestamp(value) == expected
+
+
+def test_normalize_timestamp_rejects_garbage():
+    with pytest.raises(ValueError):
+        finalTest_A.normalize_timestamp('yesterday')
+
+
+def test_incremental_update_accepts_a_plain_date(collector, tmp_path):
+    data = {'Co. Dublin': {'county_info': {}, 'climbing_sites': [
+        site('Dalkey Quarry', 'Dalkey_Quarry'), site('Ballyman Glen', 'Ballyman_Glen')]}}
+    finalTest_A.write_all_data(str(tmp_path / 'dublin_all_data.json'), data)
+
+    def http_get(url, params=None, **kwargs):
+        assert params['prop'] == 'revisions'
+        return FakeResponse({'query': {'pages': {
+            '1': {'title': 'Dalkey Quarry', 'revisions': [{'timestamp': '2024-01-01T00:00:01Z'}]},
+            '2': {'title': 'Ballyman Glen', 'revisions': [{'timestamp': '2023-12-31T23:59:59Z'}]},
+        }}})
+
+    collector._http_get = http_get
+    collector._collect_sites = lambda sites: [dict(s, routes=[]) for s in sites]
+    assert collector.update_changed_sites(str(tmp_path), since='2024-01-01') == {
+        str(tmp_path / 'dublin_all_data.json'): ['Dalkey Quarry']}
+    sites = finalTest_A.load_json(str(tmp_path / 'dublin_all_data.json'))['Co. Dublin']['climbing_sites']
+    assert [s.get('routes') for s in sites] == [[], None]
+    assert collector._load_crawl_state(str(tmp_path)).endswith('Z')
+
+
+def test_geocode_backup_sites_queries_each_place_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    backup = {'latitude': 54.864, 'longitude': -6.268, 'source': 'backup', 'estimated': True}
+    sligo = [dict(site('Ben Bulben', 'Ben_Bulben'), coordinates=dict(backup)),
+             dict(site('Gleniff', 'Gleniff'), coordinates=dict(backup))]
+    leitrim = [dict(site('Ben Bulben', 'Ben_Bulben'), coordinates=dict(backup)),
+               dict(site('Fowley', 'Fowley'), coordinates={'latitude': 54.3, 'longitude': -8.2, 'source': 'manual'})]
+    finalTest_A.write_all_data('sligo_all_data.json', {'Co. Sligo': {'climbing_sites': sligo}})
+    finalTest_A.write_all_data('leitrim_all_data.json', {'Co. Leitrim': {'climbing_sites': leitrim}})
+    (tmp_path / 'places.json').write_text('{"Ben Bulben": {"latitude": 54.36, "longitude": -8.47}}')
+
+    # 之前的抓取在 Nominatim 上没找到这两个地名，缓存里是负结果
+    cache = GeocodeCache('geocode_cache.sqlite')
+    for name in ('ben bulben', 'gleniff'):
+        cache.put(name, None)
+    cache.close()
+
+    collector = finalTest_A.IrishClimbingRobust(cache_path=None, offline=True, index_cache_path=None,
+                                                gazetteer_path='places.json')
+    lookups = []
+    gazetteer = collector.geocoder.backends[0]
+    monkeypatch.setattr(gazetteer, 'lookup', lambda query, lookup=gazetteer.lookup: lookups.append(query) or lookup(query))
+    assert collector.geocode_backup_sites('.') == {'./leitrim_all_data.json': 1, './sligo_all_data.json': 1}
+    assert sorted(lookups) == ['Ben Bulben', 'Gleniff']
+
+    for name, county in (('sligo', 'Co. Sligo'), ('leitrim', 'Co. Leitrim')):
+        sites = finalTest_A.load_json(f'{name}_all_data.json')[county]['climbing_sites']
+        assert sites[0]['coordinates'] == {'latitude': 54.36, 'longitude': -8.47, 'source': 'gazetteer'}
+    assert finalTest_A.load_json('sligo_all_data.json')['Co. Sligo']['climbing_sites'][1]['coordinates'] == backup
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from export_bundle import BUNDLE_VERSION, URL_PREFIX, decode_bundle, encode_bundle
+
+
+def round_trip(data):
+    return decode_bundle(json.loads(json.dumps(encode_bundle(data))))
+
+
+SITE = {
+    'name': 'Glendalough', 'page_title': 'Glendalough', 'climbing_type': 'Inland, Trad',
+    'url': URL_PREFIX + 'Glendalough',
+    'routes': [
+        {'name': 'Quartz Gully', 'height': 30, 'difficulty': 'VD', 'overall_grade': 'VD', 'technical_grade': None,
+         'sub_routes': [{'pitch_number': 1, 'height': 15, 'description': '', 'technical_grade': '4a'}],
+         'first_ascent': None, 'description': 'Classic.',
+         'grade': 'VD', 'grade_system': 'uk_trad', 'grade_band': 3, 'grade_sort': 30060},
+        {'name': 'Spillikin Ridge', 'height': None, 'difficulty': 'HS', 'overall_grade': 'HS',
+         'technical_grade': '4b', 'sub_routes': [], 'first_ascent': 'Unknown', 'description': ''},
+    ],
+    'routes_count': 2,
+    'coordinates': {'latitude': 53.0114123, 'longitude': -6.3295, 'source': 'grid_reference', 'estimated': False},
+}
+
+
+def test_round_trip_of_crawler_output():
+    data = {'Co. Wicklow': {'county_info': {'name': 'Co. Wicklow'}, 'climbing_sites': [SITE, dict(SITE, name='Luggala')]}}
+    bundle = encode_bundle(data)
+    assert bundle['version'] == BUNDLE_VERSION
+    assert bundle['sites']['url'] == [None, None]           # 由 page_title 推出，不存字符串
+    assert bundle['strings'].count('Glendalough') == 1
+    assert 'extra' not in bundle['sites']
+    assert round_trip(data) == data
+
+
+def test_round_trip_of_unusual_records():
+    odd_site = {'page_title': 'Luggala', 'name': 'Luggala', 'note': 'private land', 'routes_count': 5,
+                'coordinates': {'latitude': None, 'longitude': None}}
+    bare_site = {'name': 'Bare'}
+    odd_route = dict(SITE['routes'][1], sub_routes=None, rating=3)
+    del odd_route['height']
+    data = {
+        'Co. Wicklow': {'county_info': {'name': 'Wicklow', 'url': 'x'}, 'climbing_sites': [
+            odd_site, bare_site, dict(SITE, url=None, routes=[odd_route], coordinates={'lat': 1})]},
+        'Co. Empty': {'county_info': {'name': 'Co. Empty'}, 'climbing_sites': [], 'note': 1},
+    }
+    assert round_trip(data) == data
+
+
+def test_rejects_unknown_version():
+    with pytest.raises(ValueError):
+        decode_bundle(dict(encode_bundle({}), version=BUNDLE_VERSION + 1))
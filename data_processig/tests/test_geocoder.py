@@ -0,0 +1,108 @@
+import pytest
+
+import geocoder
+from geocoder import GazetteerBackend, GeocodeCache, Geocoder, NominatimBackend, normalize_query
+
+
+class Backend:
+    def __init__(self, name, places=None, error=None):
+        self.name = name
+        self.places = places or {}
+        self.error = error
+        self.queries = []
+
+    def lookup(self, query):
+        self.queries.append(query)
+        if self.error:
+            raise self.error
+        coords = self.places.get(query)
+        return dict(coords) if coords else None
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return GeocodeCache(str(tmp_path / 'geocode.sqlite'))
+
+
+def test_normalize_query():
+    assert normalize_query('  Fair_Head   North ') == 'fair head north'
+    assert normalize_query(None) == ''
+
+
+def test_backends_in_order_and_cached(cache):
+    first = Backend('gazetteer', {'Fair Head': {'latitude': 55.2, 'longitude': -6.1}})
+    second = Backend('nominatim', {'Dalkey Quarry': {'latitude': 53.3, 'longitude': -6.1}})
+    coder = Geocoder([first, second], cache)
+    assert coder.geocode('Fair Head') == {'latitude': 55.2, 'longitude': -6.1, 'backend': 'gazetteer'}
+    assert coder.geocode('Dalkey Quarry')['backend'] == 'nominatim'
+    assert second.queries == ['Dalkey Quarry']
+
+    # 缓存命中不再问后端，键忽略大小写和下划线
+    assert coder.geocode('dalkey_quarry') == {'latitude': 53.3, 'longitude': -6.1, 'backend': 'nominatim'}
+    assert second.queries == ['Dalkey Quarry']
+
+
+def test_negative_cache_and_retry_not_found(cache):
+    backend = Backend('nominatim')
+    coder = Geocoder([backend], cache)
+    assert coder.geocode('Nowhere') is None
+    assert coder.geocode('Nowhere') is None
+    assert backend.queries == ['Nowhere']
+    assert coder.geocode('Nowhere', retry_not_found=True) is None
+    assert backend.queries == ['Nowhere', 'Nowhere']
+
+
+def test_negative_cache_expires(cache, monkeypatch):
+    cache.put('nowhere', None)
+    assert cache.get('nowhere') == (True, None)
+    cache.negative_ttl = 60
+    now = geocoder.time.time()
+    monkeypatch.setattr(geocoder.time, 'time', lambda: now + 61)
+    assert cache.get('nowhere') == (False, None)
+
+
+def test_errors_are_not_cached_as_not_found(cache):
+    coder = Geocoder([Backend('nominatim', error=RuntimeError('429'))], cache)
+    assert coder.geocode('Fair Head') is None
+    assert cache.get('fair head') == (False, None)
+
+
+def test_offline_runs_skip_negative_cache(cache):
+    coder = Geocoder([Backend('gazetteer')], cache, cache_negative=False)
+    assert coder.geocode('Fair Head') is None
+    assert cache.get('fair head') == (False, None)
+
+
+def test_geocode_many_dedupes_queries(cache):
+    backend = Backend('gazetteer', {'Fair Head': {'latitude': 55.2, 'longitude': -6.1}})
+    results = Geocoder([backend], cache).geocode_many(['Fair Head', 'fair_head', 'Nowhere', '', 'Fair Head'])
+    assert backend.queries == ['Fair Head', 'Nowhere']
+    assert results['fair_head'] == results['Fair Head']
+    assert results['Nowhere'] is None and results[''] is None
+
+
+def test_gazetteer_json_and_csv(tmp_path):
+    (tmp_path / 'places.json').write_text('{"Fair Head": {"latitude": "55.2", "longitude": -6.1}}')
+    (tmp_path / 'places.csv').write_text('name,latitude,longitude\nDalkey Quarry,53.3,-6.1\n')
+    assert GazetteerBackend(str(tmp_path / 'places.json')).lookup('fair_head') == {'latitude': 55.2, 'longitude': -6.1}
+    assert GazetteerBackend(str(tmp_path / 'places.csv')).lookup('DALKEY QUARRY') == {'latitude': 53.3, 'longitude': -6.1}
+
+
+def test_nominatim_prefers_irish_results_and_raises_on_refusal():
+    results = [{'display_name': 'Fair Head, Wales', 'lat': '51.0', 'lon': '-3.0'},
+               {'display_name': 'Fair Head, County Antrim, Ireland', 'lat': '55.2', 'lon': '-6.1'}]
+    backend = NominatimBackend(lambda url, **kwargs: FakeResponse(200, results))
+    assert backend.lookup('Fair_Head') == {'latitude': 55.2, 'longitude': -6.1}
+
+    refused = NominatimBackend(lambda url, **kwargs: FakeResponse(403))
+    with pytest.raises(RuntimeError):
+        refused.lookup('Fair Head')
@@ -0,0 +1,55 @@
+import pytest
+
+from grades import annotate_route, grade_hint, grade_of_route, parse_grade
+
+
+@pytest.mark.parametrize('text, system, canonical, band', [
+    ('HVS 5a', 'uk_trad', 'HVS 5a', 8),
+    ('E1', 'uk_trad', 'E1', 10),
+    ('Diff', 'uk_trad', 'D', 2),
+    ('(VDiff)', 'uk_trad', 'VD', 3),
+    ('5a', 'uk_tech', '5a', 7),
+    ('f6a+', 'french', 'f6a+', 10),
+    ('6a+', 'french', 'f6a+', 10),
+    ('Font 6A', 'font', 'Font 6A', 10),
+    ('7A', 'uk_tech', '7a', 22),
+    ('A2', 'aid', 'A2', None),
+])
+def test_parse_grade(text, system, canonical, band):
+    grade = parse_grade(text)
+    assert (grade.system, grade.canonical, grade.band) == (system, canonical, band)
+
+
+def test_font_hint_for_unprefixed_grades():
+    assert parse_grade('6a+', 'font')[1:3] == ('Font 6A+', 11)
+    assert parse_grade('7A', 'font')[1:3] == ('Font 7A', 17)
+    # 有前缀的写法不受 hint 影响
+    assert parse_grade('HVS 5a', 'font').system == 'uk_trad'
+
+
+@pytest.mark.parametrize('text', [None, '', '  ', '()', 'unknown', 'Q9'])
+def test_unrecognised_grades(text):
+    assert parse_grade(text) is None
+
+
+def test_sort_keys_order_by_difficulty():
+    grades = ['D', 'VD', 'S', 'HS', 'VS', 'HVS 5a', 'E1', 'E3']
+    keys = [parse_grade(g).sort_key for g in grades]
+    assert keys == sorted(keys)
+    assert parse_grade('HVS 5a').sort_key > parse_grade('HVS').sort_key
+    assert parse_grade('A2').sort_key is None
+
+
+def test_grade_of_route_adds_technical_grade():
+    route = {'difficulty': 'HVS', 'overall_grade': 'HVS', 'technical_grade': '5b'}
+    assert grade_of_route(route).canonical == 'HVS 5b'
+    assert grade_of_route({'difficulty': 'E2 5c', 'technical_grade': '5b'}).canonical == 'E2 5c'
+    assert grade_of_route({'difficulty': 'VS'}).canonical == 'VS'
+    assert grade_of_route({}) is None
+
+
+def test_annotate_route():
+    route = annotate_route({'difficulty': '6A'}, grade_hint('Bouldering'))
+    assert (route['grade'], route['grade_system'], route['grade_band']) == ('Font 6A', 'font', 10)
+    route = annotate_route({'difficulty': '??'})
+    assert route['grade'] is None and route['grade_sort'] is None
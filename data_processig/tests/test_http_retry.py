@@ -0,0 +1,175 @@
+import email.utils
+import time
+
+import pytest
+import requests
+
+import http_retry
+from http_retry import CircuitBreaker, RetryPolicy, is_maxlag, parse_retry_after
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+        self.content = b'{}'
+
+    def json(self):
+        if self._body is None:
+            raise ValueError('not json')
+        return self._body
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(http_retry.time, 'monotonic', fake)
+    return fake
+
+
+def test_delay_is_jittered_within_exponential_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0)
+    for attempt in range(8):
+        for _ in range(50):
+            assert 0 <= policy.delay(attempt) <= min(10.0, 2 ** attempt)
+
+
+def test_retry_after_wins_but_is_capped():
+    policy = RetryPolicy(max_delay=30.0)
+    assert policy.delay(0, retry_after=7) == 7
+    assert policy.delay(5, retry_after=3600) == 30.0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(' 5 ') == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    future = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= parse_retry_after(future) <= 61
+    past = email.utils.formatdate(time.time() - 60, usegmt=True)
+    assert parse_retry_after(past) == 0.0
+
+
+def test_is_maxlag():
+    lagged = FakeResponse(200, {'error': {'code': 'maxlag'}}, {'X-Database-Lag': '7'})
+    assert is_maxlag(lagged)
+    assert is_maxlag(FakeResponse(503, {'error': {'code': 'maxlag'}}, {'X-Database-Lag': '7'}))
+    # 没有 X-Database-Lag 头时不解析正文
+    assert not is_maxlag(FakeResponse(200, {'error': {'code': 'maxlag'}}))
+    assert not is_maxlag(FakeResponse(200, {'error': {'code': 'badtitle'}}, {'X-Database-Lag': '1'}))
+    assert not is_maxlag(FakeResponse(503, None, {'X-Database-Lag': '1'}))
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    assert [breaker.record_failure() for _ in range(3)] == [False, False, True]
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    assert breaker.retry_in() == 60
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock.now += 59
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.retry_in() == 0
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    assert not breaker.allow()  # 试探请求还没结束
+
+
+def test_probe_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() and breaker.allow()
+
+
+def test_probe_failure_reopens_and_probes_again_later(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow()
+    assert breaker.record_failure()  # 半开状态下一次失败就重新断开
+    assert breaker.state == 'open' and not breaker.allow()
+    clock.now += 60
+    assert breaker.allow()
+
+
+def test_non_retryable_probe_error_does_not_wedge_the_breaker(clock, monkeypatch):
+    finalTest_A = pytest.importorskip('finalTest_A')
+    monkeypatch.setattr(finalTest_A.time, 'sleep', lambda seconds: None)
+    collector = finalTest_A.IrishClimbingRobust(cache_path=None, geocode_cache_path=None, global_rate=1000)
+    host = 'wiki.climbing.ie'
+    collector.host_rate_limits[host] = (1000, 1000)
+    breaker = collector._get_host_breaker(host)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    clock.now += breaker.reset_timeout
+
+    def broken(url, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError('connection broken')
+
+    collector.session.get = broken
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        collector._http_get(collector.api_url)
+    assert breaker.state == 'open' and not breaker.probing
+
+    clock.now += breaker.reset_timeout
+    collector.session.get = lambda url, **kwargs: FakeResponse(200, {})
+    assert collector._http_get(collector.api_url).status_code == 200
+    assert breaker.state == 'closed'
+
+
+def test_http_get_retries_then_returns(monkeypatch):
+    finalTest_A = pytest.importorskip('finalTest_A')
+    waits = []
+    monkeypatch.setattr(finalTest_A.time, 'sleep', waits.append)
+    collector = finalTest_A.IrishClimbingRobust(cache_path=None, geocode_cache_path=None, global_rate=1000)
+    collector.host_rate_limits['wiki.climbing.ie'] = (1000, 1000)
+    responses = [
+        requests.ConnectionError('reset'),
+        FakeResponse(503, headers={'Retry-After': '2'}),
+        FakeResponse(200, {'error': {'code': 'maxlag'}}, {'X-Database-Lag': '9', 'Retry-After': '3'}),
+        FakeResponse(200, {'query': {}}),
+    ]
+    sent = []
+
+    def get(url, **kwargs):
+        sent.append(kwargs['params'])
+        item = responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    collector.session.get = get
+    assert collector._http_get(collector.api_url, params={'action': 'query'}).json() == {'query': {}}
+    assert all(params['maxlag'] == http_retry.MAXLAG for params in sent)
+    assert waits[1:] == [2, 3]
+    assert dict(collector.metrics.counters['http_retry']) == {'ConnectionError': 1, '503': 1, 'maxlag': 1}
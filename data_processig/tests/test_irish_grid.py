@@ -0,0 +1,47 @@
+import pytest
+
+from irish_grid import gridref_to_wgs84, gridrefs_to_wgs84, irish_grid_to_wgs84, parse_gridref
+
+
+@pytest.mark.parametrize('grid_ref, expected', [
+    ('O1535', (315500.0, 235500.0)),                 # 4 位 -> 1km 方格中心
+    ('O 159 344', (315950.0, 234450.0)),             # 6 位 -> 100m
+    ('o159344', (315950.0, 234450.0)),
+    ('V 1234 5678', (12345.0, 56785.0)),             # V 在西南角 (0, 0)
+    ('A1234567890', (12345.5, 467890.5)),
+])
+def test_parse_gridref(grid_ref, expected):
+    assert parse_gridref(grid_ref) == expected
+
+
+@pytest.mark.parametrize('grid_ref', ['', None, 'O12345', 'I123456', 'OO123456', '123456', 'O 12'])
+def test_parse_gridref_rejects_invalid(grid_ref):
+    assert parse_gridref(grid_ref) is None
+
+
+@pytest.mark.parametrize('grid_ref, lat, lon', [
+    ('O 159 345', 53.3498, -6.2603),   # Dublin, O'Connell St
+    ('J 338 741', 54.5964, -5.9301),   # Belfast City Hall
+    ('M 298 252', 53.2719, -9.0490),   # Galway
+])
+def test_gridref_to_wgs84_known_places(grid_ref, lat, lon):
+    coords = gridref_to_wgs84(grid_ref)
+    assert coords['latitude'] == pytest.approx(lat, abs=0.01)
+    assert coords['longitude'] == pytest.approx(lon, abs=0.01)
+
+
+def test_batch_matches_single_conversion():
+    refs = ['O 159 345', 'bad', 'J 338 741', None, 'V 1234 5678']
+    results = gridrefs_to_wgs84(refs)
+    assert results[1] is None and results[3] is None
+    for ref, result in zip(refs, results):
+        if result is not None:
+            single = gridref_to_wgs84(ref)
+            assert result['latitude'] == pytest.approx(single['latitude'], abs=1e-6)
+            assert result['longitude'] == pytest.approx(single['longitude'], abs=1e-6)
+
+
+def test_false_origin_is_south_west_of_ireland():
+    origin = irish_grid_to_wgs84(0, 0)
+    assert 51.0 < origin['latitude'] < 51.5
+    assert -11.0 < origin['longitude'] < -10.5
@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from json_stream import atomic_open, data_files, load_json, other_variants, write_all_data
+
+SAMPLE = {
+    'Co. Antrim': {
+        'county_info': {'name': 'Antrim', 'url': 'https://example.org/Antrim'},
+        'climbing_sites': [
+            {'name': 'Fair Head', 'routes': [{'name': 'Ulysses', 'sub_routes': [], 'height': None}],
+             'coordinates': {'latitude': 55.22, 'longitude': -6.15, 'estimated': False}},
+            {'name': "Cúil Ó bhFionn", 'routes': [], 'coordinates': None},
+        ],
+    },
+    'Co. Armagh': {'county_info': {}, 'climbing_sites': []},
+    'Co. Down': {},
+}
+
+
+def read_text(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('data', [SAMPLE, {}, {'Co. Cork': {'climbing_sites': [{}]}}])
+def test_output_matches_json_dump(tmp_path, data):
+    path = str(tmp_path / 'x_all_data.json')
+    write_all_data(path, data)
+    assert read_text(path) == json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def test_streams_generators_and_counts(tmp_path):
+    path = str(tmp_path / 'x_all_data.json')
+
+    def counties():
+        for county, county_data in SAMPLE.items():
+            sites = county_data.get('climbing_sites')
+            if sites is not None:
+                county_data = dict(county_data, climbing_sites=(site for site in sites))
+            yield county, county_data
+
+    assert write_all_data(path, counties()) == {'counties': 3, 'sites': 2}
+    assert read_text(path) == json.dumps(SAMPLE, indent=2, ensure_ascii=False)
+
+
+def test_gzip_round_trip(tmp_path):
+    path = str(tmp_path / 'x_all_data.json.gz')
+    write_all_data(path, SAMPLE)
+    assert load_json(path) == SAMPLE
+
+
+def test_failed_write_keeps_original(tmp_path):
+    path = str(tmp_path / 'x_all_data.json')
+    write_all_data(path, SAMPLE)
+    before = read_text(path)
+
+    def broken_sites():
+        yield {'name': 'half written'}
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        write_all_data(path, {'Co. Antrim': {'climbing_sites': broken_sites()}})
+    assert read_text(path) == before
+    assert os.listdir(tmp_path) == ['x_all_data.json']
+
+
+def test_atomic_open_replaces_on_success(tmp_path):
+    path = str(tmp_path / 'state.json')
+    with atomic_open(path) as f:
+        f.write('{}')
+    assert read_text(path) == '{}'
+    assert os.listdir(tmp_path) == ['state.json']
+
+
+def test_data_files_and_variants(tmp_path):
+    for name in ('b_all_data.json', 'a_all_data.json.gz', 'a_all_data.json', 'notes.json'):
+        (tmp_path / name).write_text('{}')
+    assert [os.path.basename(p) for p in data_files(str(tmp_path))] == [
+        'a_all_data.json', 'a_all_data.json.gz', 'b_all_data.json']
+    assert other_variants(str(tmp_path / 'a_all_data.json.zst')) == [
+        str(tmp_path / 'a_all_data.json'), str(tmp_path / 'a_all_data.json.gz')]
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+import page_cache
+from page_cache import PageCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(page_cache.time, 'time', fake)
+    return fake
+
+
+def test_put_get_survives_reopen(tmp_path):
+    path = str(tmp_path / 'pages.sqlite')
+    cache = PageCache(path)
+    cache.put('Fair Head', 42, "== Routes ==\nUlysses 'ó'")
+    cache.close()
+
+    entry = PageCache(path).get('Fair Head')
+    assert (entry['revid'], entry['content']) == (42, "== Routes ==\nUlysses 'ó'")
+    assert PageCache(path).get('Dalkey') is None
+
+
+def test_ttl_and_touch(tmp_path, clock):
+    cache = PageCache(str(tmp_path / 'pages.sqlite'), ttl=60)
+    cache.put('Fair Head', 1, 'x')
+    assert cache.is_fresh(cache.get('Fair Head'))
+    clock.now += 60
+    assert not cache.is_fresh(cache.get('Fair Head'))
+    cache.touch('Fair Head')
+    assert cache.is_fresh(cache.get('Fair Head'))
+    assert not PageCache(str(tmp_path / 'other.sqlite'), ttl=None).is_fresh(cache.get('Fair Head'))
+
+
+def test_evict_removes_least_recently_used(tmp_path, clock):
+    cache = PageCache(str(tmp_path / 'pages.sqlite'))
+    for title in ('a', 'b', 'c'):
+        cache.put(title, 1, os.urandom(300).hex())  # 随机内容压缩不了，大小可预期
+        clock.now += 1
+    cache.get('a')
+    cache.max_bytes = sum(size for (size,) in cache.conn.execute('SELECT size FROM pages')) - 1
+    assert cache.evict() == 1
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.evict() == 0
+
+
+def test_crawler_revalidates_stale_pages_by_revid(tmp_path, clock):
+    finalTest_A = pytest.importorskip('finalTest_A')
+    collector = finalTest_A.IrishClimbingRobust(cache_path=str(tmp_path / 'pages.sqlite'), cache_ttl=60,
+                                                geocode_cache_path=None, index_cache_path=None)
+    collector.page_cache.put('Fair Head', 1, 'old fair head')
+    collector.page_cache.put('Dalkey Quarry', 5, 'old dalkey')
+    collector.page_cache.put('Ailladie', 9, 'fresh ailladie')
+    clock.now += 50
+    collector.page_cache.touch('Ailladie')
+    clock.now += 20
+
+    checked = []
+
+    def latest_revids(titles):
+        checked.extend(titles)
+        return {'Fair Head': 1, 'Dalkey Quarry': 6}
+
+    collector._fetch_latest_revids = latest_revids
+    assert collector._get_cached_wikitext(['Fair Head', 'Dalkey Quarry', 'Ailladie']) == {
+        'Fair Head': 'old fair head', 'Ailladie': 'fresh ailladie'}
+    assert sorted(checked) == ['Dalkey Quarry', 'Fair Head']
+    assert collector.page_cache.is_fresh(collector.page_cache.get('Fair Head'))
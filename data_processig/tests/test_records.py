@@ -0,0 +1,51 @@
+import json
+
+from records import ClimbingStore, Site
+
+DATA = {
+    'Co. Wicklow': {
+        'county_info': {'name': 'Wicklow', 'url': 'http://wiki.climbing.ie/index.php?title=Wicklow'},
+        'climbing_sites': [
+            {
+                'name': 'Glendalough', 'page_title': 'Glendalough', 'climbing_type': 'Trad',
+                'url': 'http://wiki.climbing.ie/index.php?title=Glendalough',
+                'routes': [
+                    {'name': 'Quartz Gully', 'height': '30m', 'difficulty': 'VD', 'overall_grade': 'VD',
+                     'technical_grade': None, 'first_ascent': None, 'description': 'Classic.',
+                     'sub_routes': [{'pitch_number': 1, 'height': '15m', 'description': '', 'technical_grade': '4a'}]},
+                    {'name': 'Spillikin Ridge', 'height': None, 'difficulty': 'HS', 'overall_grade': 'HS',
+                     'technical_grade': '4b', 'sub_routes': [], 'first_ascent': None, 'description': ''},
+                ],
+                'routes_count': 2,
+                'coordinates': {'latitude': 53.0114, 'longitude': -6.3295, 'source': 'grid_ref', 'estimated': False},
+            },
+            # 键的顺序不同、缺键和不认识的键都要原样保留
+            {'page_title': 'Luggala', 'name': 'Luggala', 'routes': [], 'coordinates': None, 'note': 'private land'},
+        ],
+    },
+}
+
+
+def test_store_round_trip():
+    store = ClimbingStore.from_dict(DATA)
+    assert store.to_dict() == DATA
+    assert [list(site) for site in store.to_dict()['Co. Wicklow']['climbing_sites']] == [
+        list(site) for site in DATA['Co. Wicklow']['climbing_sites']]
+    assert len(store) == 2 and sum(1 for _ in store.iter_routes()) == 2
+    assert isinstance(store.counties[0].climbing_sites[0], Site)
+
+
+def test_store_interns_repeated_strings():
+    store = ClimbingStore.from_dict(json.loads(json.dumps(DATA)))
+    routes = [route for _, _, route in store.iter_routes()]
+    other = ClimbingStore.from_dict(json.loads(json.dumps(DATA)), store)
+    assert other is store
+    copies = [route for _, _, route in store.iter_routes()][2:]
+    assert all(a.difficulty is b.difficulty for a, b in zip(routes, copies))
+
+
+def test_store_save_matches_json_dump(tmp_path):
+    path = tmp_path / 'wicklow_all_data.json'
+    ClimbingStore.from_dict(DATA).save(str(path))
+    assert path.read_text(encoding='utf-8') == json.dumps(DATA, indent=2, ensure_ascii=False)
+
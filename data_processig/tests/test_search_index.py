@@ -0,0 +1,70 @@
+import pytest
+
+from search_index import SearchIndex, keywords, normalize, tokenize
+
+DATA = {
+    'Co. Dublin': {
+        'county_info': {'name': 'Dublin'},
+        'climbing_sites': [
+            {'name': 'Dalkey Quarry', 'routes': [
+                {'name': 'Graham Crackers', 'first_ascent': 'Ó Ceallaigh 1971', 'description': 'Climbs the crack to a tree.'},
+                {'name': 'Paradise Lost', 'first_ascent': 'Unknown', 'description': 'Quarry classic with polished holds.'},
+            ]},
+            {'name': 'Ballyman Glen', 'routes': []},
+        ],
+    },
+    'Co. Donegal': {
+        'county_info': {'name': 'Donegal'},
+        'climbing_sites': [
+            {'name': 'Fair Head Quarry', 'routes': [{'name': 'Quarry Crack', 'first_ascent': None, 'description': ''}]},
+        ],
+    },
+}
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SearchIndex.build(DATA)
+
+
+def test_tokenizing():
+    assert normalize('Ó Ceallaigh') == 'o ceallaigh'
+    assert tokenize("Graham's Crackers (E1)") == ['graham', 's', 'crackers', 'e1']
+    assert keywords('Climbs the crack to a tree, 20 m.') == ['crack', 'tree']
+
+
+def test_site_name_ranks_above_route_name(index):
+    results = index.search('quarry')
+    assert results[0][1:] in {(0, None), (2, None)}
+    assert (0, None) in [r[1:] for r in results] and (2, 0) in [r[1:] for r in results]
+    site_score = next(s for s, site, route in results if (site, route) == (0, None))
+    route_score = next(s for s, site, route in results if (site, route) == (2, 0))
+    assert site_score > route_score
+
+
+def test_all_tokens_must_match_and_last_is_a_prefix(index):
+    assert [r[1:] for r in index.search('graham crac')] == [(0, 0)]
+    assert index.search('graham paradise') == []
+    assert [r[1:] for r in index.search('ceallaigh')] == [(0, 0)]      # 首攀者去掉了重音
+    assert index.search('unknown') == []                                  # 'Unknown' 首攀不进索引
+    assert index.search('') == [] and index.search('!!') == []
+
+
+def test_exact_match_scores_above_prefix(index):
+    exact = index.search('crack')
+    prefixed = {(site, route): score for score, site, route in index.search('cra')}
+    for score, site, route in exact:
+        assert score >= prefixed[(site, route)]
+
+
+def test_search_sites_groups_routes(index):
+    assert [site for _, site in index.search_sites('quarry')] == [0, 2]
+    assert index.search_sites('dublin') == [(2.0, 0), (2.0, 1)]
+
+
+def test_json_round_trip(index):
+    rebuilt = SearchIndex.from_json(index.to_json())
+    assert rebuilt.postings == index.postings
+    assert rebuilt.search('quarry cr') == index.search('quarry cr')
+    with pytest.raises(ValueError):
+        SearchIndex.from_json(dict(index.to_json(), version=99))
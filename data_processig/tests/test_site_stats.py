@@ -0,0 +1,61 @@
+from grades import annotate_route
+from site_stats import aggregate, county_stats, fa_year, height_bucket, site_stats
+
+
+def route(name, grade, height=None, first_ascent=None, description=''):
+    return annotate_route({'name': name, 'height': height, 'difficulty': grade, 'overall_grade': grade,
+                           'technical_grade': None, 'first_ascent': first_ascent, 'description': description})
+
+
+AILLADIE = {'name': 'Ailladie', 'coordinates': {'latitude': 53.06, 'longitude': -9.36}, 'routes': [
+    route('Ground Control', 'E3 5c', 25, 'K Lindsay, A Blair. Autumn 1994.', 'Steep.'),
+    route('Mr Mussels', 'VS 4c', 18, 'Unknown'),
+    route('The Ramp', 'D', 8, 'P Redmond 1979, rebolted 2011'),
+    route('Aid Line', 'A2'),
+    route('Mystery', '???', 0),
+]}
+BALLYRYAN = {'name': 'Ballyryan', 'coordinates': None, 'routes': [route('Big One', 'HVS 5a', 40, 'F Doyle 2002')]}
+BOULDERS = {'name': 'Boulders', 'coordinates': {'latitude': 53.0, 'longitude': -9.4}, 'routes': []}
+
+
+def test_fa_year_and_height_bucket():
+    assert fa_year('K Lindsay, A Blair. Autumn 1994.') == 1994
+    assert fa_year('P Redmond 1979, rebolted 2011') == 1979
+    assert fa_year('Unknown') is None and fa_year(None) is None
+    assert [height_bucket(h) for h in (5, 10, 29.5, 99, 150)] == ['0-10', '10-20', '20-30', '50-100', '100+']
+
+
+def test_site_stats():
+    stats = site_stats(AILLADIE)
+    assert stats['routes_count'] == 5 and stats['graded_routes'] == 4
+    assert (stats['grade_min'], stats['grade_max']) == ('D', 'E3 5c')
+    assert (stats['height_min'], stats['height_max'], stats['height_median']) == (8, 25, 18)
+    assert stats['tallest_route'] == 'Ground Control'
+    assert stats['height_histogram'] == {'0-10': 1, '10-20': 1, '20-30': 1}
+    assert (stats['fa_year_min'], stats['fa_year_max']) == (1979, 1994)
+    assert stats['styles'] == {'Trad': 3, 'Aid': 1} and stats['dominant_style'] == 'Trad'
+    assert stats['routes_with_first_ascent'] == 2 and stats['routes_with_description'] == 1
+
+
+def test_site_without_routes():
+    stats = site_stats(BOULDERS)
+    assert stats['routes_count'] == 0
+    assert stats['grade_min'] is None and stats['height_median'] is None and stats['dominant_style'] is None
+
+
+def test_county_stats_combine_sites():
+    county = {'county_info': {}, 'climbing_sites': [AILLADIE, BALLYRYAN, BOULDERS]}
+    stats = county_stats(county)
+    assert stats['sites_count'] == 3 and stats['sites_with_coordinates'] == 2 and stats['sites_with_routes'] == 2
+    assert stats['routes_count'] == 6
+    assert (stats['grade_min'], stats['grade_max']) == ('D', 'E3 5c')
+    assert stats['tallest_route'] == {'site': 'Ballyryan', 'route': 'Big One'}
+    assert (stats['fa_year_min'], stats['fa_year_max']) == (1979, 2002)
+    assert sum(stats['grade_histogram'].values()) == 4  # 人工攀登没有难度段
+
+
+def test_aggregate_keeps_site_order():
+    report = aggregate({'Co. Clare': {'county_info': {}, 'climbing_sites': [AILLADIE, BALLYRYAN, BOULDERS]}})
+    clare = report['counties']['Co. Clare']
+    assert [s['routes_count'] for s in clare['sites']] == [5, 1, 0]
+    assert clare['routes_count'] == 6
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from spatial_index import SpatialIndex, haversine_km, tile_bounds, tile_of
+
+
+@pytest.fixture(scope='module')
+def points():
+    rng = random.Random(7)
+    points = [(i, rng.uniform(51.4, 55.4), rng.uniform(-10.5, -5.4)) for i in range(500)]
+    # 几个挤在一起的点，超过叶子大小，逼着搜索往下分
+    points += [(500 + i, 53.27 + i * 1e-4, -6.11 - i * 1e-4) for i in range(20)]
+    return points
+
+
+@pytest.fixture(scope='module')
+def index(points):
+    return SpatialIndex(points)
+
+
+def test_haversine_dublin_to_belfast():
+    assert haversine_km(53.3498, -6.2603, 54.5973, -5.9301) == pytest.approx(140.5, abs=1)
+
+
+def test_tile_bounds_contain_the_point():
+    for zoom in (0, 5, 12, 16):
+        x, y = tile_of(53.35, -6.26, zoom)
+        south, west, north, east = tile_bounds(x, y, zoom)
+        assert south <= 53.35 <= north and west <= -6.26 <= east
+
+
+def test_points_without_coordinates_are_skipped():
+    index = SpatialIndex.from_sites([{'coordinates': {'latitude': 53.0, 'longitude': -6.0}},
+                                     {'coordinates': None}, {'coordinates': {'latitude': None, 'longitude': None}}])
+    assert len(index) == 1 and index.keys == [0]
+
+
+@pytest.mark.parametrize('box', [(53.0, -7.0, 53.5, -6.0), (51.0, -11.0, 56.0, -5.0), (53.2699, -6.1121, 53.2711, -6.1099)])
+def test_bbox_matches_brute_force(index, points, box):
+    south, west, north, east = box
+    expected = {key for key, lat, lon in points if south <= lat <= north and west <= lon <= east}
+    assert sorted(index.bbox(*box)) == sorted(expected)
+
+
+@pytest.mark.parametrize('lat, lon', [(53.27, -6.11), (52.0, -9.0), (55.5, -7.5)])
+def test_nearest_matches_brute_force(index, points, lat, lon):
+    expected = sorted((haversine_km(lat, lon, p_lat, p_lon), key) for key, p_lat, p_lon in points)[:10]
+    result = index.nearest(lat, lon, k=10)
+    assert [key for _, key in result] == [key for _, key in expected]
+    assert [d for d, _ in result] == pytest.approx([d for d, _ in expected])
+
+
+def test_nearest_max_km(index):
+    assert all(d <= 1 for d, _ in index.nearest(53.27, -6.11, k=100, max_km=1))
+    assert index.nearest(53.27, -6.11, k=0) == []
+    assert SpatialIndex([]).nearest(53.0, -6.0) == []
+
+
+def test_clusters_cover_every_point(index, points):
+    for zoom in (5, 9, 12):
+        clusters = index.clusters(zoom)
+        assert sum(c['count'] for c in clusters) == len(points)
+        assert sorted(k for c in clusters for k in c['keys']) == sorted(key for key, _, _ in points)
+
+
+def test_json_round_trip(index):
+    data = index.to_json()
+    assert set(data['clusters']) == {'5', '6', '7', '8', '9', '10', '11', '12'}
+    rebuilt = SpatialIndex.from_json(data)
+    assert rebuilt.keys == index.keys
+    before, after = index.nearest(53.3, -6.2, k=5), rebuilt.nearest(53.3, -6.2, k=5)
+    assert [key for _, key in after] == [key for _, key in before]
+    assert [d for d, _ in after] == pytest.approx([d for d, _ in before], abs=1e-3)
+    with pytest.raises(ValueError):
+        SpatialIndex.from_json(dict(data, version=0))
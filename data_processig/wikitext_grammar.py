@@ -0,0 +1,175 @@
+import re
+
+# finalTest.py 和 finalTest_A.py 共用的正则语法：全部在导入时预编译，
+# 解析循环里直接用这里的对象，不再每次调用 re.sub/re.search 时查正则缓存
+
+# ---------- wikitext 标记 ----------
+HTML_COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+TEMPLATE = re.compile(r'\{\{.*?\}\}', re.DOTALL)
+TEMPLATE_INLINE = re.compile(r'\{\{[^\}]+\}\}')
+FILE_LINK = re.compile(r'\[\[File:.*?\]\]', re.IGNORECASE)
+WIKILINK = re.compile(r'\[\[(?:[^|\]]*\|)?([^\]]+)\]\]')  # [[页面]] / [[页面|显示文本]] -> 显示文本
+WIKILINK_BLOCK = re.compile(r'\[\[[^\]]+\]\]')  # 整个链接（连同文字一起去掉）
+EXTERNAL_LINK = re.compile(r'\[(?:https?://[^\s]+)\s+([^\]]+)\]')
+BOLD = re.compile(r"'''(.*?)'''")
+ITALIC = re.compile(r"''(.*?)''")
+QUOTE_MARKUP = re.compile(r"''+")
+HTML_TAG = re.compile(r'<[^>]+>')
+BLOCK_TAG_OPEN = re.compile(r'<(?:br|p|div)\s*/?>', re.IGNORECASE)
+BLOCK_TAG_CLOSE = re.compile(r'</(?:p|div)>', re.IGNORECASE)
+INLINE_TAG = re.compile(r'</?(?:b|strong|i|em|span)[^>]*>', re.IGNORECASE)
+BR = re.compile(r'<br\s*/?>')
+EDIT_MARKER = re.compile(r'\[edit\]')
+
+# ---------- 段落 ----------
+ROUTES_HEADING = re.compile(r'==+\s*(Routes?|Climbs?)\s*==+', re.IGNORECASE)
+NEXT_HEADING = re.compile(r'\n==[^=].*?==', re.IGNORECASE)
+
+# ---------- 空白 ----------
+WHITESPACE = re.compile(r'\s+')
+SPACES = re.compile(r'[ \t]+')
+BLANK_LINES = re.compile(r'\n\s*\n+')
+
+# ---------- 路线名 / 编号 ----------
+NUMBER_PREFIX = re.compile(r'^\s*\d+[a-zA-Z]?\.?\s*')  # "12a. " "3 "
+LIST_NUMBER = re.compile(r'^\s*\d+[\.\)]\s*')  # "1. " "2) "
+NAME_SYMBOLS = re.compile(r'[\*\#\|\-]+')
+NAME_EDGE_SYMBOLS = re.compile(r'^[\*\-\:\s]+|[\*\-\:\s]+$')
+DIGITS_ONLY = re.compile(r'^[\d\s]+$')
+
+# ---------- 高度 ----------
+HEIGHT = re.compile(r'(\d+)\s*m', re.IGNORECASE)  # 行内任意位置的 "18m" / "18 m"
+HEIGHT_TOKEN = re.compile(r'(\d{1,3})m')  # 单个 token 完全等于 "18m"
+
+# ---------- 难度 ----------
+UK_TRAD_GRADES = frozenset({
+    "M", "MS", "D", "VD", "Diff", "VDiff", "HVD",
+    "S", "HS", "VS", "HVS",
+    "E1", "E2", "E3", "E4", "E5", "E6", "E7", "E8", "E9"
+})
+# E1 / E1/2 / 技术难度 4a-9c(+/-) / 4A-9D
+GRADE_TOKEN = re.compile(r'E[1-9](?:/[1-9])?|[3-9][abcABCD][+-]?')
+
+# 按优先级排列：前面的模式匹配到就不再看后面的（不是取最靠前的位置）
+ROUTE_LINE_GRADES = (
+    re.compile(r'\b(E[1-9][0-9]?)\b', re.IGNORECASE),  # E1, E2, E3...
+    re.compile(r'\b(HVS|VS|HS|S|VD|HVD|D|MS|M)\b', re.IGNORECASE),  # 传统难度
+    re.compile(r'\b([1-9][abc])\b', re.IGNORECASE),  # 技术难度 5a, 6b等
+    re.compile(r'\b(F[0-9][abc])\b', re.IGNORECASE),  # 法国难度
+    re.compile(r'\b([A-Z][0-9])\b', re.IGNORECASE),  # A1, A2等
+)
+ROUTE_GRADE_HINT = re.compile(r'\b(E[1-9]|HVS|VS|HS|S|VD|[1-9][abc])\b', re.IGNORECASE)
+PITCH_GRADE = re.compile(r'\b([A-Z][0-9]?[a-z]?[+-]?|[0-9][abc][+-]?)\b')
+
+# ---------- 首攀 ----------
+CAPITALISED_WORD = re.compile(r'[A-Z][a-z]+')
+YEAR = re.compile(r'\d{4}')
+YEAR_1000S = re.compile(r'[12]\d{3}\b')
+SURNAME_COMMA = re.compile(r'[A-Z][a-z]+,')
+FA_MARKER = re.compile(r'FA[:\.]|First\s+Ascent', re.IGNORECASE)
+FA_TEXT = re.compile(r'FA[:\.]\s*(.+?)(?=\n|$|<br>)', re.IGNORECASE)
+FIRST_ASCENT_PATTERNS = tuple(re.compile(p, re.IGNORECASE | re.DOTALL) for p in (
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*(?:,\s*[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)*\.?\s*(?:\d{1,2}/\d{1,2}/)?\d{4}\.?)\b',
+    r'([A-Z]\s+[A-Z][a-z]+(?:,\s*[A-Z]\s+[A-Z][a-z]+)*\.\s*(?:\d{1,2}/)?\d{4}\.?)\b',
+    r'(?:FA[:\s]+)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*(?:,\s*[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)*\s+(?:\d{1,2}/\d{1,2}/)?\d{4})',
+    r'(?:First\s+ascent[:\s]+)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*(?:,\s*[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)*[^.]+\d{4}\.?)\b',
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*[^.]+\d{4})\.',
+))
+
+# ---------- 分段 (pitch) ----------
+SUB_ROUTE_PATTERNS = tuple(re.compile(p, re.IGNORECASE | re.DOTALL) for p in (
+    r'(\d+)\)\s*(\d+)m\.?\s*(.*?)(?=\s*\d+\)\s*\d+m|$)',
+    r'(\d+)/\s*(\d+)m\.?\s*(.*?)(?=\s*\d+/\s*\d+m|$)',
+    r'Pitch\s*(\d+)[:\-]\s*(\d+)m\.?\s*(.*?)(?=\s*Pitch\s*\d+[:\-]|$)',
+))
+PITCH_LINE = re.compile(r'(\d+)[)/]\.?\s*(\d+)m\.?\s*(.*)')
+PITCH_PREFIX = re.compile(r'^\d+[\)/]')
+
+# ---------- 描述 ----------
+ROUTE_HEADLINE = re.compile(r'^\d+[\.\)]?\s*\w+\s+\d+m')
+HEIGHT_GRADE_START = re.compile(r'^\d+m\s+[A-Z]')
+TRAILING_BOLD = re.compile(r'\s*\*\*.*$')
+TRAILING_LINK = re.compile(r'\s*\[\[.*$')
+
+# ---------- finalTest.py 的粗体 / 纯文本路线格式 ----------
+BOLD_ROUTE = re.compile(r'\*\*([^*]+?)\s+(\d+)m\s+([A-Z/]+)\*\*')
+NEXT_ROUTE_PATTERNS = tuple(re.compile(p) for p in (
+    r'\n\s*\*\*[^*]+\s+\d+m\s+[A-Z]',
+    r'\n\s*\d+[a-zA-Z]?\.?\s+[A-Z]',
+    r'\n\s*[A-Z][A-Za-z]*(?:\s+[A-Z][A-Za-z]*)*\s+\d+m\s+[A-Z]',
+))
+FA_SENTENCE_PATTERNS = tuple(re.compile(p) for p in (
+    r'^([A-Z][^\.]+?\.\s*\d{2,4}[^\.]*\.)',
+    r'^([A-Z][^\.]+?\d{4}[^\.]*\.)',
+    r'([A-Z][^\.]+?\.\s*\d{2,4}[^\.]*\.)',
+))
+BOLD_HEADLINE = re.compile(r'\*\*.+?\d+m\s+[A-Z].+?\*\*')
+HEADLINE_LINE = re.compile(r'^\s*[A-Z].*?\d+m\s+[A-Z].*?$', re.MULTILINE)
+PITCH_LINE_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(\d+)/\s*\.?\s*(\d+)m\s*([\w/+]+)?\s*(.*)',
+    r'Pitch\s+(\d+)[:\s]*(\d+)m\s*([\w/+]+)?\s*(.*)',
+))
+PITCH_SLASH_LINE = re.compile(r'(\d+)/\.\s*(\d+)m\s*([\dabc+/]+)?\s*(.*)')
+
+# ---------- 坐标 / Grid Ref ----------
+COORD_TEMPLATE = re.compile(r"\{\{[Cc]oord\|([0-9\.]+)\|([0-9\.\-]+)\}\}", re.IGNORECASE)
+# 4/6/8/10 位数字都可以，中间允许一个空格（如 "J 123 456"）；按顺序尝试。
+# 前缀只能是一个爱尔兰网格字母（没有 I）；最后两个不带标签的模式只认大写字母，并要求前后是单词边界，
+# 匹配到的候选还要用 irish_grid.parse_gridref 校验，不合法就继续找
+GRID_REF_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'Grid\s*Ref\.?\s*:?\s*\b([A-HJ-Z]\s*\d{2,5}\s?\d{2,5})\b',
+    r'Grid\s*Reference\.?\s*:?\s*\b([A-HJ-Z]\s*\d{2,5}\s?\d{2,5})\b',
+    r'OS\s*Grid\s*Ref\.?\s*:?\s*\b([A-HJ-Z]\s*\d{2,5}\s?\d{2,5})\b',
+    r'OS\s*Grid\s*Reference\.?\s*:?\s*\b([A-HJ-Z]\s*\d{2,5}\s?\d{2,5})\b',
+    r'\b([A-HJ-Z]\s*\d{2,5}\s?\d{2,5})\s*\(OS\s*Grid\)',
+    r'\b((?-i:[A-HJ-Z])\s*\d{3}\s*\d{3})\b',
+    r'\b((?-i:[A-HJ-Z])\s*\d{4}(?:\d{2})?)\b',
+))
+
+# ---------- 岩场类型关键词（对小写后的全文做子串匹配）----------
+SEA_CLIFF_WORDS = re.compile(r'sea cliff|sea-cliff|tidal|coastal|cliff')
+QUARRY_WORDS = re.compile(r'quarry|quarries')
+MOUNTAIN_WORDS = re.compile(r'mountain|hill|alpine|slieve')
+SPORT_WORDS = re.compile(r'sport|bolt|bolted|clip')
+BOULDER_WORDS = re.compile(r'boulder|problem')
+
+
+def strip_quotes_and_links(text):
+    """去掉 ''粗体/斜体'' 标记，[[链接|文本]] 只保留显示文本"""
+    return WIKILINK.sub(r'\1', QUOTE_MARKUP.sub('', text))
+
+
+def collapse_whitespace(text):
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def extract_routes_section(full_text):
+    """从整篇 wikitext 中截取出 Routes / Climbs 那一节，找不到就返回全文"""
+    if not full_text:
+        return ""
+    m = ROUTES_HEADING.search(full_text)
+    if not m:
+        return full_text
+    start = m.end()
+    m2 = NEXT_HEADING.search(full_text, start)
+    if m2:
+        return full_text[start:m2.start()]
+    return full_text[start:]
+
+
+def clean_route_name(name):
+    """清理路线名：去编号、星号、多余符号"""
+    if not name:
+        return ""
+    name = NUMBER_PREFIX.sub('', name)
+    cleaned = NAME_SYMBOLS.sub(' ', name)
+    cleaned = WHITESPACE.sub(' ', cleaned)
+    return cleaned.strip(' \t\n\r\"\'')
+
+
+def looks_like_grade(difficulty):
+    """判断字符串看起来是不是攀岩等级（只接受带字母的）"""
+    if not difficulty:
+        return False
+    d = difficulty.strip()
+    return d in UK_TRAD_GRADES or GRADE_TOKEN.fullmatch(d) is not None
@@ -0,0 +1,118 @@
+import re
+from functools import cached_property
+
+import wikitext_grammar as grammar
+
+# 行内 token 类型
+TEXT = 'text'
+QUOTE = 'quote'        # '' / ''' 粗体斜体标记
+LINK = 'link'          # [[页面]] / [[页面|显示文本]]
+TEMPLATE = 'template'  # {{...}}（单行）
+BR = 'br'              # <br> / <br/>
+TAG = 'tag'            # 其它 HTML 标签
+
+# 一次扫描，按出现位置依次切出各种标记；标记之间的部分就是普通文本
+INLINE_TOKEN = re.compile(
+    r"(?P<quote>''+)"
+    r"|(?P<link>\[\[(?:[^|\]]*\|)?(?P<label>[^\]]+)\]\])"
+    r"|(?P<template>\{\{[^\}]+\}\})"
+    r"|(?P<br><br\s*/?>)"
+    r"|(?P<tag><[^>]+>)"
+)
+HEADING_LINE = re.compile(r'^(=+)\s*(.*?)\s*\1$')
+LIST_MARKER = re.compile(r'^[\*\#\:\;]+')
+
+
+def tokenize_inline(text):
+    """把一行 wikitext 切成 [(类型, 原文, 链接显示文本)]"""
+    tokens = []
+    pos = 0
+    for m in INLINE_TOKEN.finditer(text):
+        if m.start() > pos:
+            tokens.append((TEXT, text[pos:m.start()], None))
+        kind = m.lastgroup if m.lastgroup != 'label' else LINK
+        tokens.append((kind, m.group(0), m.group('label') if kind == LINK else None))
+        pos = m.end()
+    if pos < len(text):
+        tokens.append((TEXT, text[pos:], None))
+    return tokens
+
+
+class WikiLine:
+    """
+    一行 wikitext 的 token 序列。
+    解析器需要的几种清洗结果都从同一份 token 渲染，第一次用到时计算并缓存，
+    同一行不管被多少条路线、多少个提取步骤读到都只处理一次
+    """
+
+    def __init__(self, index, raw):
+        self.index = index
+        self.raw = raw
+        self.stripped = raw.strip()
+        self.tokens = tokenize_inline(self.stripped)
+
+    def __repr__(self):
+        return f"WikiLine({self.index}, {self.stripped[:40]!r})"
+
+    @cached_property
+    def heading(self):
+        """== 标题 == 行返回 (级别, 标题文字)，否则 None"""
+        m = HEADING_LINE.match(self.stripped)
+        return (len(m.group(1)), m.group(2)) if m else None
+
+    @cached_property
+    def list_marker(self):
+        """行首的 * # : ; 列表标记，没有时为空字符串"""
+        m = LIST_MARKER.match(self.stripped)
+        return m.group(0) if m else ''
+
+    @cached_property
+    def plain(self):
+        """去掉粗体/斜体标记，链接只保留显示文本；模板和 HTML 标签原样保留"""
+        parts = []
+        for kind, value, label in self.tokens:
+            if kind == QUOTE:
+                continue
+            if kind == LINK:
+                parts.append(grammar.QUOTE_MARKUP.sub('', label))
+            elif kind in (TEMPLATE, TAG) and ("'" in value or '[[' in value):
+                parts.append(grammar.strip_quotes_and_links(value))
+            else:
+                parts.append(value)
+        return ''.join(parts)
+
+    @cached_property
+    def bare(self):
+        """去掉粗体/斜体标记，链接连同文字一起去掉（用来找路线行和首攀行）"""
+        parts = []
+        for kind, value, label in self.tokens:
+            if kind in (QUOTE, LINK):
+                continue
+            if kind in (TEMPLATE, TAG) and ("'" in value or '[[' in value):
+                value = grammar.WIKILINK_BLOCK.sub('', grammar.QUOTE_MARKUP.sub('', value))
+            parts.append(value)
+        return ''.join(parts)
+
+    @cached_property
+    def text(self):
+        """纯文本：去掉所有标记、模板和 HTML 标签，合并空白（用于描述）"""
+        parts = []
+        for kind, value, label in self.tokens:
+            if kind == TEXT:
+                parts.append(value)
+            elif kind == LINK:
+                label = grammar.QUOTE_MARKUP.sub('', label)
+                if '{{' in label or '<' in label:
+                    label = grammar.HTML_TAG.sub('', grammar.TEMPLATE_INLINE.sub('', label))
+                parts.append(label)
+        return grammar.collapse_whitespace(''.join(parts))
+
+
+def iter_lines(wikitext):
+    """逐行产出 WikiLine（包括空行，index 和 split('\\n') 的下标一致）"""
+    for index, raw in enumerate(wikitext.split('\n')):
+        yield WikiLine(index, raw)
+
+
+def tokenize(wikitext):
+    return list(iter_lines(wikitext))
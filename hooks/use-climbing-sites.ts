@@ -1,36 +1,9 @@
 import AsyncStorage from '@react-native-async-storage/async-storage';
 import { useEffect, useMemo, useState } from 'react';
+import { InteractionManager } from 'react-native';
 
-import antrimData from '../data_processig/antrim_all_data.json';
-import cavanData from '../data_processig/cavan_all_data.json';
-import clareData from '../data_processig/clare_all_data.json';
-import corkData from '../data_processig/cork_all_data.json';
-import derryData from '../data_processig/derry_all_data.json';
-import donegalData from '../data_processig/donegal_all_data.json';
-import downData from '../data_processig/down_all_data.json';
-import dublinData from '../data_processig/dublin_all_data.json';
-import fermanaghData from '../data_processig/fermanagh_all_data.json';
-import galwayData from '../data_processig/galway_all_data.json';
-import kerryData from '../data_processig/kerry_all_data.json';
-import kildareData from '../data_processig/kildare_all_data.json';
-import kilkennyData from '../data_processig/kilkenny_all_data.json';
-import laoisData from '../data_processig/laois_all_data.json';
-import leitrimData from '../data_processig/leitrim_all_data.json';
-import limerickData from '../data_processig/limerick_all_data.json';
-import longfordData from '../data_processig/longford_all_data.json';
-import louthData from '../data_processig/louth_all_data.json';
-import mayoData from '../data_processig/mayo_all_data.json';
-import meathData from '../data_processig/meath_all_data.json';
-import monaghanData from '../data_processig/monaghan_all_data.json';
-import offalyData from '../data_processig/offaly_all_data.json';
-import roscommonData from '../data_processig/roscommon_all_data.json';
-import sligoData from '../data_processig/sligo_all_data.json';
-import tipperaryData from '../data_processig/tipperary_all_data.json';
-import tyroneData from '../data_processig/tyrone_all_data.json';
-import waterfordData from '../data_processig/waterford_all_data.json';
-import westmeathData from '../data_processig/westmeath_all_data.json';
-import wexfordData from '../data_processig/wexford_all_data.json';
-import wicklowData from '../data_processig/wicklow_all_data.json';
+import { ClimbingIndex, decodeClimbingIndex, loadSiteRoutes } from '../lib/climbing-bundle';
+import climbingIndex from '../data_processig/climbing_index.json';
 
 export type RouteInfo = {
   name: string;
@@ -41,6 +14,27 @@ export type RouteInfo = {
   description?: string;
   sub_routes?: RouteInfo[];
   first_ascent?: string; 
+  grade?: string | null;         // 规范写法 (data_processig/grades.py)
+  grade_system?: string | null;
+  grade_band?: number | null;    // 跨体系难度段
+  grade_sort?: number | null;    // 排序键
+};
+
+// 站点索引里的难度：规范写法 + 跨体系难度段 + 排序键
+export type SiteGrade = {
+  name: string;
+  band: number | null;
+  sort: number | null;
+};
+
+// 导出时算好的站点汇总 (data_processig/site_stats.py)，地图标记和列表直接显示
+export type SiteStats = {
+  grade_min: string | null;
+  grade_max: string | null;
+  height_max: number | null;
+  fa_year_min: number | null;
+  fa_year_max: number | null;
+  style: string | null;
 };
 
 export type Coordinates = {
@@ -63,6 +57,11 @@ export type ClimbingSite = {
   climbing_type?: string;
   area?: string;
   types?: string[];
+  shard?: string;              // 详情所在的郡数据文件
+  detail_index?: number;       // 在该郡 climbing_sites 里的位置
+  grades?: SiteGrade[];        // 索引里带的难度列表（按路线顺序去重），筛选用
+  route_names?: string[];      // 索引里带的路线名，搜索用
+  stats?: SiteStats;
 };
 
 type CountyInfo = {
@@ -87,82 +86,42 @@ export function useClimbingSites() {
   const [syncing, setSyncing] = useState(false); 
 
   const loadDataFromJson = () => {
-    const rawData: RawData = {
-      ...(antrimData as any),
-      ...(cavanData as any),
-      ...(clareData as any),
-      ...(corkData as any),
-      ...(donegalData as any),
-      ...(dublinData as any), 
-      ...(galwayData as any),
-      ...(kerryData as any),
-      ...(kildareData as any),
-      ...(kilkennyData as any),
-      ...(laoisData as any),
-      ...(leitrimData as any),
-      ...(limerickData as any),
-      ...(longfordData as any),
-      ...(louthData as any),
-      ...(mayoData as any),
-      ...(meathData as any),
-      ...(monaghanData as any),
-      ...(offalyData as any),
-      ...(roscommonData as any),
-      ...(sligoData as any),
-      ...(tipperaryData as any),
-      ...(tyroneData as any),
-      ...(waterfordData as any),
-      ...(westmeathData as any),
-      ...(wexfordData as any),
-      ...(wicklowData as any),
-      ...(derryData as any),
-      ...(downData as any),
-      ...(fermanaghData as any),
-    };
+    // 启动时只加载站点索引 (data_processig/export_bundle.py 导出)，路线详情由 useSiteRoutes 按需加载
+    const indexSites = decodeClimbingIndex(climbingIndex as unknown as ClimbingIndex);
 
     const merged: ClimbingSite[] = [];
 
-    Object.values(rawData).forEach((countyData) => {
-      const countyName = countyData.county_info?.name ?? 'Unknown';
-
-      countyData.climbing_sites.forEach((site) => {
-        if (
-          site.coordinates &&
-          typeof site.coordinates.latitude === 'number' &&
-          typeof site.coordinates.longitude === 'number'
-        ) {
-          
-          const areaName = site.area || 'Unknown';
-          const id = `${countyName}_${areaName}_${site.name}`.replace(/[^a-zA-Z0-9]/g, '_');
-          
-          let siteTypes: string[] = [];
-          const climbingType = site.climbing_type || '';
+    indexSites.forEach((site) => {
+      if (
+        site.coordinates &&
+        typeof site.coordinates.latitude === 'number' &&
+        typeof site.coordinates.longitude === 'number'
+      ) {
+        let siteTypes: string[] = [];
+        const climbingType = site.climbing_type || '';
 
-          if (climbingType.includes(',')) {
-            siteTypes = climbingType.split(',').map(t => t.trim());
-          } else {
-            if (climbingType.includes('Sea')) siteTypes.push('Sea Cliff');
-            if (climbingType.includes('Quarry')) siteTypes.push('Quarry');
-            if (climbingType.includes('Mountain')) siteTypes.push('Mountain');
-            if (climbingType.includes('Inland')) siteTypes.push('Inland');
-            if (climbingType.includes('Trad')) siteTypes.push('Trad');
-            if (climbingType.includes('Sport')) siteTypes.push('Sport');
-            if (climbingType.includes('Boulder')) siteTypes.push('Boulder');
-          }
+        if (climbingType.includes(',')) {
+          siteTypes = climbingType.split(',').map(t => t.trim());
+        } else {
+          if (climbingType.includes('Sea')) siteTypes.push('Sea Cliff');
+          if (climbingType.includes('Quarry')) siteTypes.push('Quarry');
+          if (climbingType.includes('Mountain')) siteTypes.push('Mountain');
+          if (climbingType.includes('Inland')) siteTypes.push('Inland');
+          if (climbingType.includes('Trad')) siteTypes.push('Trad');
+          if (climbingType.includes('Sport')) siteTypes.push('Sport');
+          if (climbingType.includes('Boulder')) siteTypes.push('Boulder');
+        }
 
-          if (siteTypes.length === 0) {
-            siteTypes = ['Inland', 'Trad'];
-            console.log('  使用默认值:', siteTypes);
-          }
-          
-          merged.push({
-            ...site,
-            id,
-            countyName,
-            types: siteTypes,
-          });
+        if (siteTypes.length === 0) {
+          siteTypes = ['Inland', 'Trad'];
+          console.log('  使用默认值:', siteTypes);
         }
-      });
+        
+        merged.push({
+          ...site,
+          types: siteTypes,
+        });
+      }
     });
 
     return merged;
@@ -207,15 +166,15 @@ export function useClimbingSites() {
         const freshSite = freshData.find(s => s.id === oldSite.id);
         if (!freshSite) return;
         
-        const oldRouteNames = new Set(oldSite.routes?.map(r => r.name) || []);
-        const newRoutes = freshSite.routes?.filter(r => !oldRouteNames.has(r.name)) || [];
+        const oldRouteNames = new Set(oldSite.route_names || []);
+        const newRouteNames = freshSite.route_names?.filter(r => !oldRouteNames.has(r)) || [];
         
-        if (newRoutes.length > 0) {
-          const mergedRoutes = [...(oldSite.routes || []), ...newRoutes];
+        if (newRouteNames.length > 0) {
+          const mergedRouteNames = [...(oldSite.route_names || []), ...newRouteNames];
           updatedSites.push({
-            ...oldSite,
-            routes: mergedRoutes,
-            routes_count: mergedRoutes.length
+            ...freshSite,
+            route_names: mergedRouteNames,
+            routes_count: mergedRouteNames.length
           });
         }
       });
@@ -244,7 +203,7 @@ export function useClimbingSites() {
         updated: true, 
         newSitesCount: newSites.length,
         updatedSitesCount: updatedSites.length,
-        totalNewRoutes: updatedSites.reduce((acc, site) => acc + (site.routes?.length || 0) - (allSites.find(s => s.id === site.id)?.routes?.length || 0), 0)
+        totalNewRoutes: updatedSites.reduce((acc, site) => acc + (site.route_names?.length || 0) - (allSites.find(s => s.id === site.id)?.route_names?.length || 0), 0)
       };
     } catch (error) {
       console.error('刷新失败:', error);
@@ -277,30 +236,20 @@ export function useClimbingSites() {
   }, [allSites]);
   
   const difficultyOptions = useMemo(() => {
-    const set = new Set<string>();
+    const grades = new Map<string, SiteGrade>();
 
     allSites.forEach((site) => {
-      site.routes?.forEach((route) => {
-        if (route.difficulty) {
-          set.add(route.difficulty);
-        }
-      });
+      site.grades?.forEach((grade) => grades.set(grade.name, grade));
     });
 
-    const difficultyOrder: Record<string, number> = {
-      'VD': 1, 'S': 2, 'HS': 3, 'VS': 4, 'HVS': 5,
-      'E1': 6, 'E2': 7, 'E3': 8, 'E4': 9, 'E5': 10, 'E6': 11
-    };
-
-    const sorted = Array.from(set).sort((a, b) => {
-      const orderA = difficultyOrder[a] ?? 99;
-      const orderB = difficultyOrder[b] ?? 99;
-      return orderA - orderB;
-    });
+    // 排序键在导出时算好（data_processig/grades.py），认不出来的难度排在最后
+    const sorted = Array.from(grades.values()).sort(
+      (a, b) => (a.sort ?? Number.MAX_SAFE_INTEGER) - (b.sort ?? Number.MAX_SAFE_INTEGER)
+    );
 
     return [
-      { id: null, label: 'All difficulties' },
-      ...sorted.map(d => ({ id: d, label: d }))
+      { id: null, label: 'All difficulties', band: null },
+      ...sorted.map(g => ({ id: g.name, label: g.name, band: g.band }))
     ];
   }, [allSites]);
   
@@ -313,4 +262,37 @@ export function useClimbingSites() {
     syncing,        
     refreshFromJson 
   };
-}
\ No newline at end of file
+}
+
+// 站点详情页用：按需加载该站点所在郡的 detail shard，取出路线
+export function useSiteRoutes(site?: ClimbingSite) {
+  const [routes, setRoutes] = useState<RouteInfo[]>([]);
+  const [loading, setLoading] = useState(false);
+
+  useEffect(() => {
+    if (!site) {
+      setRoutes([]);
+      return;
+    }
+    // 解码郡详情是同步的：等页面切换动画结束后再做，先渲染出 loading 状态
+    setLoading(true);
+    let cancelled = false;
+    const task = InteractionManager.runAfterInteractions(() => {
+      if (cancelled) return;
+      try {
+        setRoutes(loadSiteRoutes(site));
+      } catch (error) {
+        console.error('加载站点详情失败:', error);
+        setRoutes([]);
+      } finally {
+        setLoading(false);
+      }
+    });
+    return () => {
+      cancelled = true;
+      task.cancel();
+    };
+  }, [site?.shard, site?.detail_index]);
+
+  return { routes, loading };
+}
@@ -0,0 +1,266 @@
+import type { ClimbingSite, RawData, RouteInfo } from '../hooks/use-climbing-sites';
+import { detailShards } from '../data_processig/climbing_details/shards';
+
+// data_processig/export_bundle.py 导出的列式数据包；格式改动时两边要一起改
+type Column<T> = (T | null)[];
+type Extra = Record<string, any> | null;
+
+export type ClimbingBundle = {
+  version: number;
+  coord_scale: number;
+  url_prefix: string;
+  strings: string[];
+  enums: {
+    grade: string[];
+    grade_system: string[];
+    climbing_type: string[];
+    coord_source: string[];
+  };
+  counties: {
+    name: number[];
+    site_count: number[];
+    extra?: Extra[];
+  };
+  sites: {
+    name: Column<number>;
+    page_title: Column<number>;
+    climbing_type: Column<number>;
+    url: Column<number>;
+    route_count: number[];
+    routes_count: Column<number>;
+    lat: Column<number>;
+    lon: Column<number>;
+    coord_source: Column<number>;
+    estimated: Column<number>;
+    extra?: Extra[];
+  };
+  routes: {
+    name: Column<number>;
+    height: Column<number>;
+    difficulty: Column<number>;
+    overall_grade: Column<number>;
+    technical_grade: Column<number>;
+    sub_routes: Column<RouteInfo[]>;
+    first_ascent: Column<number>;
+    description: Column<number>;
+    grade: Column<number>;
+    grade_system: Column<number>;
+    grade_band: Column<number>;
+    grade_sort: Column<number>;
+    extra?: Extra[];
+  };
+};
+
+// 启动时加载的站点索引 (climbing_index.json)，路线详情在各郡的 detail shard 里
+export type ClimbingIndex = {
+  version: number;
+  coord_scale: number;
+  url_prefix: string;
+  strings: string[];
+  enums: {
+    grade: string[];
+    grade_sort: (number | null)[];
+    grade_band: (number | null)[];
+    climbing_type: string[];
+    style: string[];
+  };
+  counties: {
+    name: number[];
+    site_count: number[];
+    shard: string[];
+  };
+  sites: {
+    id: number[];
+    name: Column<number>;
+    url: Column<number>;
+    page_title: Column<number>;
+    climbing_type: Column<number>;
+    routes_count: number[];
+    lat: Column<number>;
+    lon: Column<number>;
+    grades: number[][];
+    route_names: Column<number>[];
+    grade_min: Column<number>;
+    grade_max: Column<number>;
+    height_max: Column<number>;
+    fa_year_min: Column<number>;
+    fa_year_max: Column<number>;
+    style: Column<number>;
+  };
+};
+
+const BUNDLE_VERSION = 2;
+const INDEX_VERSION = 3;
+
+export function decodeClimbingBundle(bundle: ClimbingBundle): RawData {
+  if (bundle.version !== BUNDLE_VERSION) {
+    throw new Error(`不支持的数据包版本: ${bundle.version}`);
+  }
+
+  const { strings, enums, counties, sites, routes } = bundle;
+  const str = (i: number | null) => (i === null ? null : strings[i]);
+  const grade = (i: number | null) => (i === null ? null : enums.grade[i]);
+  const gradeSystem = (i: number | null) => (i === null ? null : enums.grade_system[i]);
+
+  const applyExtra = (record: Record<string, any>, extra: Extra) => {
+    if (!extra) return record;
+    (extra._missing ?? []).forEach((key: string) => delete record[key]);
+    Object.keys(extra).forEach((key) => {
+      if (key !== '_missing') record[key] = extra[key];
+    });
+    return record;
+  };
+
+  const decodeRoute = (r: number): RouteInfo =>
+    applyExtra(
+      {
+        name: str(routes.name[r]),
+        height: routes.height[r],
+        difficulty: grade(routes.difficulty[r]),
+        overall_grade: grade(routes.overall_grade[r]),
+        technical_grade: grade(routes.technical_grade[r]),
+        sub_routes: routes.sub_routes[r] ?? [],
+        first_ascent: str(routes.first_ascent[r]),
+        description: str(routes.description[r]),
+        grade: grade(routes.grade[r]),
+        grade_system: gradeSystem(routes.grade_system[r]),
+        grade_band: routes.grade_band[r],
+        grade_sort: routes.grade_sort[r],
+      },
+      routes.extra?.[r] ?? null
+    ) as RouteInfo;
+
+  const decodeSite = (i: number, routeStart: number): ClimbingSite => {
+    const extra: Record<string, any> = { ...(sites.extra?.[i] ?? {}) };
+    const pageTitle = str(sites.page_title[i]);
+    const urlRef = sites.url[i];
+    const url = urlRef === null ? bundle.url_prefix + (pageTitle ?? '') : urlRef === -1 ? null : strings[urlRef];
+
+    const siteRoutes: RouteInfo[] = [];
+    for (let r = routeStart; r < routeStart + sites.route_count[i]; r++) {
+      siteRoutes.push(decodeRoute(r));
+    }
+
+    let coordinates: Record<string, any>;
+    if ('coordinates' in extra) {
+      coordinates = extra.coordinates;
+      delete extra.coordinates;
+    } else {
+      const lat = sites.lat[i];
+      const lon = sites.lon[i];
+      coordinates = {
+        latitude: lat === null ? null : lat / bundle.coord_scale,
+        longitude: lon === null ? null : lon / bundle.coord_scale,
+      };
+      const source = sites.coord_source[i];
+      if (source !== null) coordinates.source = enums.coord_source[source];
+      const estimated = sites.estimated[i];
+      if (estimated !== null) coordinates.estimated = estimated === 1;
+    }
+
+    const climbingType = sites.climbing_type[i];
+    const routesCount = sites.routes_count[i];
+    return applyExtra(
+      {
+        name: str(sites.name[i]),
+        page_title: pageTitle,
+        climbing_type: climbingType === null ? null : enums.climbing_type[climbingType],
+        url,
+        routes: siteRoutes,
+        routes_count: routesCount === null ? siteRoutes.length : routesCount,
+        coordinates,
+      },
+      extra
+    ) as ClimbingSite;
+  };
+
+  const result: RawData = {};
+  let siteIndex = 0;
+  let routeIndex = 0;
+  counties.name.forEach((nameRef, c) => {
+    const county = strings[nameRef];
+    const extra: Record<string, any> = { ...(counties.extra?.[c] ?? {}) };
+    const countySites: ClimbingSite[] = [];
+    for (let n = 0; n < counties.site_count[c]; n++) {
+      countySites.push(decodeSite(siteIndex, routeIndex));
+      routeIndex += sites.route_count[siteIndex];
+      siteIndex++;
+    }
+    const countyInfo = extra.county_info ?? { name: county };
+    delete extra.county_info;
+    result[county] = { ...extra, county_info: countyInfo, climbing_sites: countySites };
+  });
+  return result;
+}
+
+// 索引 -> 站点列表；routes 为空，打开详情时再用 loadSiteRoutes 加载
+export function decodeClimbingIndex(index: ClimbingIndex): ClimbingSite[] {
+  if (index.version !== INDEX_VERSION) {
+    throw new Error(`不支持的索引版本: ${index.version}`);
+  }
+
+  const { strings, enums, counties, sites } = index;
+  const str = (i: number | null) => (i === null ? null : strings[i]);
+  const grade = (i: number | null) => (i === null ? null : enums.grade[i]);
+  const style = (i: number | null) => (i === null ? null : enums.style[i]);
+
+  const result: ClimbingSite[] = [];
+  let i = 0;
+  counties.name.forEach((nameRef, c) => {
+    for (let detailIndex = 0; detailIndex < counties.site_count[c]; detailIndex++) {
+      const pageTitle = str(sites.page_title[i]);
+      const urlRef = sites.url[i];
+      const lat = sites.lat[i];
+      const lon = sites.lon[i];
+      const climbingType = sites.climbing_type[i];
+      result.push({
+        id: strings[sites.id[i]],
+        name: str(sites.name[i]) ?? '',
+        countyName: strings[nameRef],
+        shard: counties.shard[c],
+        detail_index: detailIndex,
+        url: (urlRef === null ? index.url_prefix + (pageTitle ?? '') : urlRef === -1 ? undefined : strings[urlRef]),
+        page_title: pageTitle ?? undefined,
+        climbing_type: climbingType === null ? undefined : enums.climbing_type[climbingType],
+        routes: [],
+        routes_count: sites.routes_count[i],
+        coordinates:
+          lat === null || lon === null
+            ? undefined
+            : { latitude: lat / index.coord_scale, longitude: lon / index.coord_scale },
+        grades: sites.grades[i].map((g) => ({
+          name: enums.grade[g],
+          band: enums.grade_band[g],
+          sort: enums.grade_sort[g],
+        })),
+        route_names: sites.route_names[i].map((r) => str(r) ?? ''),
+        stats: {
+          grade_min: grade(sites.grade_min[i]),
+          grade_max: grade(sites.grade_max[i]),
+          height_max: sites.height_max[i],
+          fa_year_min: sites.fa_year_min[i],
+          fa_year_max: sites.fa_year_max[i],
+          style: style(sites.style[i]),
+        },
+      });
+      i++;
+    }
+  });
+  return result;
+}
+
+// 已经解码过的郡，同一个郡的站点共用
+const decodedShards = new Map<string, RawData>();
+
+export function loadSiteRoutes(site: Pick<ClimbingSite, 'shard' | 'detail_index'>): RouteInfo[] {
+  if (!site.shard || site.detail_index === undefined) return [];
+  let rawData = decodedShards.get(site.shard);
+  if (!rawData) {
+    const loader = detailShards[site.shard];
+    if (!loader) return [];
+    rawData = decodeClimbingBundle(loader() as ClimbingBundle);
+    decodedShards.set(site.shard, rawData);
+  }
+  const countyData = Object.values(rawData)[0];
+  return countyData?.climbing_sites[site.detail_index]?.routes ?? [];
+}